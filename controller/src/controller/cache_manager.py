@@ -3,21 +3,29 @@
 
 from controller.scene import Scene
 from controller.data_source import RestSceneDataSource, FileSceneDataSource
+from controller.uuid_manager import DEFAULT_DATABASE
 
 from scene_common import log
 from scene_common.timestamp import get_epoch_time
 
 REFRESH_TIME = 60
+REFRESH_BACKOFF_BASE = 1
+REFRESH_BACKOFF_MAX = 60
 
 class CacheManager:
   def __init__(self, data_source=None, rest_url=None, rest_auth=None,
-               root_cert=None, tracker_config_data={}):
+               root_cert=None, tracker_config_data={}, synchronous_tracking=False,
+               reid_database=DEFAULT_DATABASE):
     self.cached_child_transforms_by_uid = {}
     self.camera_parameters = {}
     self.tracker_config_data = tracker_config_data
+    self.synchronous_tracking = synchronous_tracking
+    self.reid_database = reid_database
     self.cached_scenes_by_uid = {}
     self._cached_scenes_by_cameraID = {}
     self._cached_scenes_by_sensorID = {}
+    # Scenes waiting for a targeted refresh: uid -> (failures, retry_at, last_failure)
+    self._stale_scenes = {}
 
     if rest_url and rest_auth:
       self.data_source = RestSceneDataSource(rest_url, rest_auth, root_cert)
@@ -47,28 +55,93 @@ class CacheManager:
       self.cached_scenes_by_uid.pop(uid, None)
 
     for scene_data in found:
-      self._refreshCameras(scene_data)
-      if self.tracker_config_data:
-        scene_data["tracker_config"] = [self.tracker_config_data["max_unreliable_time"],
-                                      self.tracker_config_data["non_measurement_time_dynamic"],
-                                      self.tracker_config_data["non_measurement_time_static"]]
-        scene_data["persist_attributes"] = self.tracker_config_data.get("persist_attributes", {})
-
-      uid = scene_data['uid']
-      if uid not in self.cached_scenes_by_uid:
-        scene = Scene.deserialize(scene_data)
-      else:
-        scene = self.cached_scenes_by_uid[uid]
-        scene.updateScene(scene_data)
-
-      for cameraID in scene.cameras.keys():
-        self._cached_scenes_by_cameraID[cameraID] = scene
-      for sensorID in scene.sensors.keys():
-        self._cached_scenes_by_sensorID[sensorID] = scene
-      self.cached_scenes_by_uid[scene.uid] = scene
+      self._updateCachedScene(scene_data)
+    self._stale_scenes = {}
     self._cache_refreshed = get_epoch_time()
     return
 
+  def refreshScene(self, uid):
+    """! Fetches a single scene and rebuilds only its cache entries.
+    @param   uid   uid of the scene to refresh.
+    @return  True if the scene was refreshed or removed, False on failure.
+    """
+    if self.cached_scenes_by_uid is None:
+      self.refreshScenes()
+      return True
+
+    if uid in self._stale_scenes:
+      # Keep the failure count so that repeated failures keep backing off
+      failures, _, last_failure = self._stale_scenes[uid]
+      self._stale_scenes[uid] = (failures, None, last_failure)
+
+    scene_data = self.data_source.getScene(uid)
+    if scene_data is None:
+      scene = self.cached_scenes_by_uid.pop(uid, None)
+      if scene is not None:
+        self._removeFromIndex(scene)
+      self._stale_scenes.pop(uid, None)
+      return True
+
+    if 'uid' not in scene_data:
+      log.error("Failed to get scene", uid, getattr(scene_data, 'statusCode', None))
+      self.invalidateScene(uid)
+      return False
+
+    self._updateCachedScene(scene_data)
+    self._stale_scenes.pop(uid, None)
+    return True
+
+  def invalidateScene(self, uid):
+    """! Marks a single scene for refresh on its next lookup. When a scene keeps
+    failing, the refreshes are spaced out exponentially up to REFRESH_BACKOFF_MAX.
+    @param   uid   uid of the scene to refresh.
+    """
+    now = get_epoch_time()
+    failures, retry_at, last_failure = self._stale_scenes.get(uid, (0, None, None))
+    if retry_at is not None:
+      # Refresh already pending
+      return
+    if last_failure is None or now - last_failure > REFRESH_BACKOFF_MAX:
+      failures = 0
+    delay = 0
+    if failures:
+      delay = min(REFRESH_BACKOFF_MAX, REFRESH_BACKOFF_BASE * 2 ** (failures - 1))
+    self._stale_scenes[uid] = (failures + 1, now + delay, now)
+    return
+
+  def _updateCachedScene(self, scene_data):
+    self._refreshCameras(scene_data)
+    if self.tracker_config_data:
+      scene_data["tracker_config"] = [self.tracker_config_data["max_unreliable_time"],
+                                    self.tracker_config_data["non_measurement_time_dynamic"],
+                                    self.tracker_config_data["non_measurement_time_static"]]
+      scene_data["persist_attributes"] = self.tracker_config_data.get("persist_attributes", {})
+
+    scene_data["reid_database"] = self.reid_database
+
+    uid = scene_data['uid']
+    if uid not in self.cached_scenes_by_uid:
+      scene = Scene.deserialize(scene_data)
+      if self.synchronous_tracking:
+        scene.setSynchronousTracking(True)
+    else:
+      scene = self.cached_scenes_by_uid[uid]
+      scene.updateScene(scene_data)
+
+    self._removeFromIndex(scene)
+    for cameraID in scene.cameras.keys():
+      self._cached_scenes_by_cameraID[cameraID] = scene
+    for sensorID in scene.sensors.keys():
+      self._cached_scenes_by_sensorID[sensorID] = scene
+    self.cached_scenes_by_uid[scene.uid] = scene
+    return scene
+
+  def _removeFromIndex(self, scene):
+    for index in (self._cached_scenes_by_cameraID, self._cached_scenes_by_sensorID):
+      for key in [key for key, value in index.items() if value is scene]:
+        del index[key]
+    return
+
   def _refreshCameras(self, scene_data):
     for camera in scene_data.get('cameras', []):
       update_data = {}
@@ -158,6 +231,11 @@ class CacheManager:
        or not hasattr(self, '_cache_refreshed'):
        #or now - self._cache_refreshed > REFRESH_TIME:
       self.refreshScenes()
+      return
+
+    for uid, (_, retry_at, _) in list(self._stale_scenes.items()):
+      if retry_at is not None and now >= retry_at:
+        self.refreshScene(uid)
     return
 
   def allScenes(self):
@@ -1,33 +1,30 @@
 # SPDX-FileCopyrightText: (C) 2024 - 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import threading
+
 from scene_common import log
 from scene_common.mqtt import PubSub
 
+RECONNECT_MIN = 1
+RECONNECT_MAX = 120
+INVALID_CREDENTIALS = 5
 
 class ChildSceneController():
-  def __init__(self, root_cert, info, parent_controller):
+  """! Subscriptions and connection status of one remote child scene. The
+  broker connection belongs to the RemoteBrokerConnection of its broker."""
 
+  def __init__(self, info, parent_controller):
     self.child_name = info['name']
     self.child_id = info['remote_child_id']
     self.parent_controller = parent_controller
     self.connected = False
 
-    self.client = PubSub(cert=None, rootca=root_cert, broker=info.get('host_name', None),
-                         auth=f"{info.get('mqtt_username', None)}:{info.get('mqtt_password', None)}",
-                         keepalive=240)
-    self.client.onConnect = self.onChildConnect
-    self.client.onDisconnect = self.onChildDisconnect
     self.child_scene_topic = PubSub.formatTopic(PubSub.DATA_EXTERNAL,
                                                 scene_id=self.child_id, thing_type="+")
     self.child_event_topic = PubSub.formatTopic(PubSub.EVENT,
                                                 region_type="+", event_type="+",
                                                 scene_id=self.child_id, region_id="+")
-    try:
-      self.client.connect()
-    except Exception as e:
-      # FIXME - remove this error published , handle known exceptions.
-      self.handleException(str(e))
     return
 
   def handleException(self, e):
@@ -36,23 +33,19 @@ class ChildSceneController():
                                                              scene_id=self.child_id), e)
     return
 
-  def onChildConnect(self, client, userdata, flags, rc):
-    if rc == 5:
-      self.handleException("Invalid credentials")
-      return
-    log.info(f"Connected to remote child {self.child_name} with result code {rc}")
+  def onChildConnect(self, client):
+    log.info(f"Connected to remote child {self.child_name}")
 
     self.connected = True
     self.parent_controller.pubsub.publish(PubSub.formatTopic(PubSub.SYS_CHILDSCENE_STATUS,
                                           scene_id=self.child_id), "connected")
 
-    self.client.addCallback(self.child_event_topic, self.parent_controller.republishEvents)
+    client.addCallback(self.child_event_topic, self.parent_controller.republishEvents)
     log.info("Subscribed to", self.child_event_topic)
 
-    self.client.addCallback(self.child_scene_topic,
-                            self.parent_controller.handleMovingObjectMessage)
+    client.addCallback(self.child_scene_topic,
+                       self.parent_controller.handleMovingObjectMessage)
     log.info("Subscribed to", self.child_scene_topic)
-
     return
 
   def publishStatus(self, client, userdata, message):
@@ -62,7 +55,7 @@ class ChildSceneController():
                           scene_id=self.child_id), "connected" if self.connected else "disconnected")
     return
 
-  def onChildDisconnect(self, client, userdata, rc):
+  def onChildDisconnect(self):
     self.connected = False
     log.info(f"Disconnected remote child {self.child_name}")
 
@@ -70,8 +63,153 @@ class ChildSceneController():
                         scene_id=self.child_id), "disconnected")
     return
 
-  def loopStart(self):
-    return self.client.loopStart()
+  def detach(self, client):
+    if self.connected:
+      client.removeCallback(self.child_event_topic)
+      client.removeCallback(self.child_scene_topic)
+      self.connected = False
+    return
+
+class RemoteBrokerConnection():
+  """! One connection to a remote broker, shared by all the child scenes
+  hosted there. The network loop keeps reconnecting with an exponential
+  backoff between RECONNECT_MIN and RECONNECT_MAX seconds, and the child
+  subscriptions are renewed on every connect."""
+
+  def __init__(self, root_cert, host_name, auth):
+    self.host_name = host_name
+    self.children = {}
+    self.connected = False
+    self.lock = threading.Lock()
+
+    self.client = PubSub(cert=None, rootca=root_cert, broker=host_name,
+                         auth=auth, keepalive=240)
+    self.client.onConnect = self.onConnect
+    self.client.onDisconnect = self.onDisconnect
+    self.client.client.reconnect_delay_set(RECONNECT_MIN, RECONNECT_MAX)
+    return
+
+  def start(self):
+    log.info(f"Connecting to remote broker {self.host_name}")
+    try:
+      self.client.connectAsync()
+      self.client.loopStart()
+    except Exception as e:
+      # FIXME - remove this error published , handle known exceptions.
+      for child in self.childList():
+        child.handleException(str(e))
+    return
+
+  def stop(self):
+    log.info(f"Disconnecting from remote broker {self.host_name}")
+    self.client.disconnect()
+    self.client.loopStop()
+    return
 
-  def loopStop(self):
-    return self.client.loopStop()
+  def childList(self):
+    with self.lock:
+      return list(self.children.values())
+
+  def addChild(self, child):
+    with self.lock:
+      self.children[child.child_id] = child
+      connected = self.connected
+    if connected:
+      child.onChildConnect(self.client)
+    return
+
+  def removeChild(self, child_id):
+    with self.lock:
+      child = self.children.pop(child_id, None)
+    if child is not None:
+      child.detach(self.client)
+    return
+
+  def onConnect(self, client, userdata, flags, rc):
+    if rc == INVALID_CREDENTIALS:
+      for child in self.childList():
+        child.handleException("Invalid credentials")
+      return
+    log.info(f"Connected to remote broker {self.host_name} with result code {rc}")
+
+    with self.lock:
+      self.connected = True
+    for child in self.childList():
+      child.onChildConnect(self.client)
+    return
+
+  def onDisconnect(self, client, userdata, rc):
+    with self.lock:
+      self.connected = False
+    for child in self.childList():
+      child.onChildDisconnect()
+    return
+
+class ChildConnectionManager():
+  """! Connections of a parent controller to its remote child scenes. Child
+  scenes on the same broker with the same credentials share one connection,
+  and updates only connect and disconnect the children that changed."""
+
+  def __init__(self, root_cert, parent_controller):
+    self.root_cert = root_cert
+    self.parent_controller = parent_controller
+    self.connections = {}
+    self.children = {}
+    return
+
+  @staticmethod
+  def connectionKey(info):
+    return (info.get('host_name', None), info.get('mqtt_username', None),
+            info.get('mqtt_password', None))
+
+  def update(self, child_infos):
+    """! Brings the connections in line with the remote child scenes.
+    @param   child_infos  Child scene links of the remote children.
+    @return  Dictionary of remote child id to ChildSceneController.
+    """
+    wanted = {info['remote_child_id']: info for info in child_infos}
+
+    for child_id, (key, child) in list(self.children.items()):
+      info = wanted.get(child_id)
+      if info is None or self.connectionKey(info) != key:
+        self.removeChild(child_id)
+      else:
+        child.child_name = info['name']
+
+    for child_id, info in wanted.items():
+      if child_id not in self.children:
+        self.addChild(info)
+
+    return {child_id: child for child_id, (_, child) in self.children.items()}
+
+  def addChild(self, info):
+    key = self.connectionKey(info)
+    connection = self.connections.get(key)
+    new_connection = connection is None
+    if new_connection:
+      host_name, username, password = key
+      connection = RemoteBrokerConnection(self.root_cert, host_name, f"{username}:{password}")
+      self.connections[key] = connection
+
+    child = ChildSceneController(info, self.parent_controller)
+    self.children[child.child_id] = (key, child)
+    log.info(f"Adding remote child {child.child_id}")
+    connection.addChild(child)
+    if new_connection:
+      connection.start()
+    return child
+
+  def removeChild(self, child_id):
+    key, child = self.children.pop(child_id)
+    log.info(f"Removing remote child {child_id}")
+    connection = self.connections[key]
+    connection.removeChild(child_id)
+    if not connection.children:
+      connection.stop()
+      del self.connections[key]
+    return
+
+  def stop(self):
+    for child_id in list(self.children):
+      self.removeChild(child_id)
+    return
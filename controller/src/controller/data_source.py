@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from abc import ABC, abstractmethod
+from http import HTTPStatus
 from pathlib import Path
 import json
 from scene_common import log
@@ -12,6 +13,12 @@ class SceneDataSource(ABC):
   def getScenes(self):
     pass
 
+  @abstractmethod
+  def getScene(self, scene_uid):
+    """Returns the data of one scene, None if the scene does not exist, or
+    a result without 'uid' if it could not be retrieved"""
+    pass
+
   @abstractmethod
   def getChildScenes(self, scene_uid):
     pass
@@ -32,15 +39,61 @@ class SceneDataSource(ABC):
 class RestSceneDataSource(SceneDataSource):
   def __init__(self, rest_url, rest_auth, root_cert=None):
     self.rest = RESTClient(rest_url, rootcert=root_cert, auth=rest_auth)
+    # Local copy of the scene configuration bundle
+    self.config_supported = True
+    self.config_version = None
+    self.config_etag = None
+    self.config_scenes = {}
+    self.config_children = {}
     return
 
   def getScenes(self):
-    return self.rest.getScenes(None)
+    if not self.config_supported or not self._refreshConfig():
+      return self.rest.getScenes(None)
+    return {'results': list(self.config_scenes.values())}
+
+  def _refreshConfig(self):
+    """Brings the local copy of the scene configuration up to date, fetching
+    only the scenes changed since the version held.
+    @return  True if the local copy is current."""
+    result = self.rest.getSceneConfig(since=self.config_version, etag=self.config_etag)
+    if result.statusCode == HTTPStatus.NOT_MODIFIED:
+      return True
+    if result.statusCode == HTTPStatus.NOT_FOUND:
+      log.info("Manager does not serve scene configuration bundles, using scene list")
+      self.config_supported = False
+      return False
+    if 'version' not in result:
+      log.warn("Failed to get scene configuration", result.statusCode, result.errors)
+      return False
+
+    if result['full']:
+      self.config_scenes = {}
+      self.config_children = {}
+    for uid in result['deleted']:
+      self.config_scenes.pop(uid, None)
+      self.config_children.pop(uid, None)
+    for scene in result['results']:
+      self.config_scenes[scene['uid']] = scene
+    self.config_children.update(result['child_scenes'])
+    self.config_version = result['version']
+    self.config_etag = result.etag
+    return True
+
+  def getScene(self, scene_uid):
+    if self.config_supported and self._refreshConfig():
+      return self.config_scenes.get(scene_uid)
+    result = self.rest.getScene(scene_uid)
+    if result.statusCode == HTTPStatus.NOT_FOUND:
+      return None
+    return result
 
   def setTRSMatrix(self, scene_uid, matrix):
     return self.rest.updateScene(scene_uid, {'trs_matrix': matrix.tolist()})
 
   def getChildScenes(self, scene_uid):
+    if self.config_version is not None and scene_uid in self.config_scenes:
+      return {'results': self.config_children.get(scene_uid, [])}
     return self.rest.getChildScene({'parent': scene_uid})
 
   def getAssets(self):
@@ -80,6 +133,12 @@ class FileSceneDataSource(SceneDataSource):
   def getScenes(self):
     return {"results": self.scenes}
 
+  def getScene(self, scene_uid):
+    for scene in self.scenes:
+      if scene.get("uid") == scene_uid:
+        return scene
+    return None
+
   def getChildScenes(self, scene_uid):
     results = []
 
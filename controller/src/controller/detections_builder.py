@@ -3,39 +3,69 @@
 
 import numpy as np
 
+from controller.reid import encodeReIDVector
 from controller.scene import TripwireEvent
-from scene_common.earth_lla import convertXYZToLLA, calculateHeading
+from scene_common.earth_lla import convertXYZToLLAArray, calculateHeadingArray
 from scene_common.geometry import DEFAULTZ, Point, Size
 from scene_common.timestamp import get_iso_time
 
+REID_ENCODING_LIST = "list"
+REID_ENCODING_BASE64 = "base64"
 
-def buildDetectionsDict(objects, scene):
+def buildDetectionsDict(objects, scene, reid_encoding=REID_ENCODING_LIST):
   result_dict = {}
-  for obj in objects:
-    obj_dict = prepareObjDict(scene, obj, False)
+  geospatial = computeGeospatial(scene, objects)
+  for idx, obj in enumerate(objects):
+    obj_dict = prepareObjDict(scene, obj, False, reid_encoding,
+                              geospatial[idx] if geospatial else None)
     result_dict[obj_dict['id']] = obj_dict
   return result_dict
 
-def buildDetectionsList(objects, scene, update_visibility=False):
+def buildDetectionsList(objects, scene, update_visibility=False,
+                        reid_encoding=REID_ENCODING_LIST):
   result_list = []
-  for obj in objects:
-    obj_dict = prepareObjDict(scene, obj, update_visibility)
+  geospatial = computeGeospatial(scene, objects)
+  for idx, obj in enumerate(objects):
+    obj_dict = prepareObjDict(scene, obj, update_visibility, reid_encoding,
+                              geospatial[idx] if geospatial else None)
     result_list.append(obj_dict)
   return result_list
 
-def prepareObjDict(scene, obj, update_visibility):
+def objectVelocity(aobj):
+  velocity = aobj.velocity
+  if velocity is None:
+    velocity = Point(0, 0, 0)
+  if not velocity.is3D:
+    velocity = Point(velocity.x, velocity.y, DEFAULTZ)
+  return velocity
+
+def computeGeospatial(scene, objects):
+  """! Computes the geospatial output of all objects of a frame in one pass.
+  @param   scene    Scene the objects belong to.
+  @param   objects  Moving objects or tripwire events.
+  @return  List of (lat_long_alt, heading) per object, or None when the scene
+           does not output LLA.
+  """
+  if not scene or not scene.output_lla or not len(objects):
+    return None
+
+  aobjs = [obj.object if isinstance(obj, TripwireEvent) else obj for obj in objects]
+  locations = np.array([aobj.sceneLoc.asCartesianVector for aobj in aobjs], dtype=np.float64)
+  velocities = np.array([objectVelocity(aobj).asCartesianVector for aobj in aobjs],
+                        dtype=np.float64)
+  lat_long_alt = convertXYZToLLAArray(scene.trs_xyz_to_lla, locations)
+  heading = calculateHeadingArray(scene.trs_xyz_to_lla, locations, velocities, lat_long_alt)
+  return list(zip(lat_long_alt.tolist(), heading.tolist()))
+
+def prepareObjDict(scene, obj, update_visibility, reid_encoding=REID_ENCODING_LIST,
+                   geospatial=None):
   aobj = obj
   if isinstance(obj, TripwireEvent):
     aobj = obj.object
   otype = aobj.category
 
   scene_loc_vector = aobj.sceneLoc.asCartesianVector
-
-  velocity = aobj.velocity
-  if velocity is None:
-    velocity = Point(0, 0, 0)
-  if not velocity.is3D:
-    velocity = Point(velocity.x, velocity.y, DEFAULTZ)
+  velocity = objectVelocity(aobj)
 
   obj_dict = aobj.info
   obj_dict.update({
@@ -50,15 +80,19 @@ def prepareObjDict(scene, obj, update_visibility):
   if rotation is not None:
     obj_dict['rotation'] = rotation
 
-  if scene and scene.output_lla:
-    lat_long_alt = convertXYZToLLA(scene.trs_xyz_to_lla, scene_loc_vector)
-    obj_dict['lat_long_alt'] = lat_long_alt.tolist()
-    heading = calculateHeading(scene.trs_xyz_to_lla, aobj.sceneLoc.asCartesianVector, velocity.asCartesianVector)
-    obj_dict['heading'] = heading.tolist()
+  if geospatial is None:
+    geospatial = computeGeospatial(scene, [aobj])
+    geospatial = geospatial[0] if geospatial else None
+  if geospatial is not None:
+    obj_dict['lat_long_alt'], obj_dict['heading'] = geospatial
 
   reid = aobj.reidVector
   if reid is not None:
-    if isinstance(reid, np.ndarray):
+    if reid_encoding == REID_ENCODING_BASE64:
+      # Same encoding as the reid field of camera detections, about a quarter
+      # of the size of the JSON float list
+      obj_dict['reid'] = encodeReIDVector(reid)
+    elif isinstance(reid, np.ndarray):
       obj_dict['reid'] = reid.tolist()
     else:
       obj_dict['reid'] = reid
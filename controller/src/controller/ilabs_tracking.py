@@ -5,23 +5,27 @@ import uuid
 from datetime import datetime
 
 import numpy as np
-import robot_vision as rv
 
 from controller.moving_object import (DEFAULT_EDGE_LENGTH,
-                                      DEFAULT_TRACKING_RADIUS)
+                                      DEFAULT_TRACKING_RADIUS, object_pool)
 from controller.tracking import (MAX_UNRELIABLE_TIME,
                                  NON_MEASUREMENT_TIME_DYNAMIC,
                                  NON_MEASUREMENT_TIME_STATIC, Tracking)
+from controller.uuid_manager import DEFAULT_DATABASE
 from scene_common import log
 from scene_common.geometry import Point
 from scene_common.timestamp import get_epoch_time
+from scene_common.lazy_import import lazyImport
+
+rv = lazyImport("robot_vision")
 
 
 class IntelLabsTracking(Tracking):
 
-  def __init__(self, max_unreliable_time, non_measurement_time_dynamic, non_measurement_time_static):
+  def __init__(self, max_unreliable_time, non_measurement_time_dynamic, non_measurement_time_static,
+               reid_database=DEFAULT_DATABASE):
     """Initialize the tracker with tracker configuration parameters"""
-    super().__init__()
+    super().__init__(reid_database)
     #ref_camera_frame_rate is used to determine the frame-based param values
     self.ref_camera_frame_rate = 30
     tracker_config = rv.tracking.TrackManagerConfig()
@@ -172,6 +176,11 @@ class IntelLabsTracking(Tracking):
     tracks_from_detections = [self.from_tracked_object(tracked_object, objects)
                      for tracked_object in tracked_objects]
 
+    # Detections which did not end up in a reliable track are not referenced
+    # anywhere else, hand them back to the pool for the next frame
+    tracked_ids = set(id(obj) for obj in tracks_from_detections)
+    object_pool.release([obj for obj in objects if id(obj) not in tracked_ids])
+
     # Already tracked objects include moving objects from tracks consumed directly
     self.already_tracked_objects = self.mergeAlreadyTrackedObjects(already_tracked_objects)
     self.all_tracker_objects = tracks_from_detections + self.already_tracked_objects
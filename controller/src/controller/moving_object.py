@@ -1,22 +1,24 @@
 # SPDX-FileCopyrightText: (C) 2021 - 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
-import base64
+import collections
 import datetime
-import struct
 import warnings
 from dataclasses import dataclass
 from threading import Lock
 from typing import Dict, List
 
-import cv2
 import numpy as np
-import open3d as o3d
-from scipy.spatial.transform import Rotation
 
+from controller.reid import decodeReIDVector, encodeReIDVector
+from scene_common import log
 from scene_common.geometry import DEFAULTZ, Line, Point, Rectangle
 from scene_common.options import TYPE_1, TYPE_2
 from scene_common.transform import normalize, rotationToTarget
+from scene_common.lazy_import import lazyImport
+
+cv2 = lazyImport("cv2")
+o3d = lazyImport("open3d")
 
 warnings.simplefilter('ignore', np.RankWarning)
 
@@ -25,8 +27,9 @@ DEFAULT_EDGE_LENGTH = 1.0
 DEFAULT_TRACKING_RADIUS = 2.0
 LOCATION_LIMIT = 20
 SPEED_THRESHOLD = 0.1
+DEFAULT_POOL_SIZE = 4096
 
-@dataclass
+@dataclass(slots=True)
 class ChainData:
   regions: Dict
   publishedLocations: List[Point]
@@ -34,6 +37,8 @@ class ChainData:
   persist: Dict
 
 class Chronoloc:
+  __slots__ = ('point', 'when', 'bounds')
+
   def __init__(self, point: Point, when: datetime, bounds: Rectangle):
     if not point.is3D:
       point = Point(point.x, point.y, DEFAULTZ)
@@ -43,6 +48,8 @@ class Chronoloc:
     return
 
 class Vector:
+  __slots__ = ('camera', 'point', 'last_seen')
+
   def __init__(self, camera, point, when):
     if not point.is3D:
       point = Point(point.x, point.y, DEFAULTZ)
@@ -67,6 +74,22 @@ class MovingObject:
   # 'gid', 'frameCount', 'velocity', 'intersected',
   # 'first_seen', 'category'
 
+  # Attributes are slotted to keep per-detection memory small. Slots listed
+  # in _OPTIONAL_SLOTS are only set on demand and are probed with hasattr(),
+  # so they must stay unset until they have a meaningful value.
+  _OPTIONAL_SLOTS = ('boundingBoxPixels', 'asset_scale', 'uuid', 'rv_id', 'visibility',
+                     'similarity', 'bbMeters', 'bbShadow', 'baseAngle', 'adjusted',
+                     'mesh', 'orig_point', 'vectors', '_reid')
+  __slots__ = ('chain_data', 'size', 'buffer_size', 'tracking_radius', 'shift_type',
+               'project_to_map', 'map_triangle_mesh', 'map_translation', 'map_rotation',
+               'rotation_from_velocity', 'first_seen', 'last_seen', 'camera', 'info',
+               'category', 'boundingBox', 'confidence', 'oid', 'gid', 'frameCount',
+               'velocity', 'location', 'rotation', 'intersected', '_reidVector') \
+              + _OPTIONAL_SLOTS
+  # Slots which reference frame data, cleared when the object is returned to the pool
+  _POOLED_REFERENCES = ('chain_data', 'camera', 'info', 'boundingBox', 'velocity', 'location',
+                        'map_triangle_mesh', '_reidVector')
+
   gid_counter = 0
   gid_lock = Lock()
 
@@ -105,22 +128,43 @@ class MovingObject:
     self.frameCount = 1
     self.velocity = None
     self.location = None
-    self.rotation = np.array([0, 0, 0, 1]).tolist()
+    self.rotation = [0, 0, 0, 1]
     self.intersected = False
-    self.reidVector = None
+    self._reidVector = None
     reid = self.info.get('reid', None)
     if reid is not None:
+      # Decoding is deferred until the vector is first used, most detections
+      # never become reliable tracks and are discarded after matching.
+      self._reid = reid
+    return
+
+  @property
+  def reidVector(self):
+    reid = getattr(self, '_reid', None)
+    if reid is not None:
+      del self._reid
       self._decodeReIDVector(reid)
+    return self._reidVector
+
+  @reidVector.setter
+  def reidVector(self, value):
+    if hasattr(self, '_reid'):
+      del self._reid
+      self.info.pop('reid', None)
+    self._reidVector = value
     return
 
   def _decodeReIDVector(self, reid):
     try:
-      vector = base64.b64decode(reid)
-      self.reidVector = np.array(struct.unpack("256f", vector)).reshape(1, -1)
+      self.reidVector = decodeReIDVector(reid)
       self.info.pop('reid')
     except TypeError:
       if type(reid) == list:
         self.reidVector = reid
+    except ValueError as e:
+      log.warn(f"Dropping invalid re-ID vector of {self.category} {self.oid}: {e}")
+      self.reidVector = None
+      self.info.pop('reid', None)
     return
 
   def setPersistentAttributes(self, info, persist_attributes):
@@ -204,6 +248,7 @@ class MovingObject:
       self.orig_point = Point(info['translation'])
       if camera and hasattr(camera, 'pose'):
         if 'rotation' in info:
+          from scipy.spatial.transform import Rotation
           if self.project_to_map:
             info['translation'], info['rotation'] = camera.pose.projectToMap(info['translation'],
                                                                         info['rotation'],
@@ -268,8 +313,7 @@ class MovingObject:
     @returns  class                     The dynamically created subclass.
     """
 
-    classDict = {'baseClass': cls}
-    classDict.update('')
+    classDict = {'baseClass': cls, '__slots__': ()}
     if methods:
       classDict.update(methods)
 
@@ -325,10 +369,7 @@ class MovingObject:
       'scene_loc': self.sceneLoc.asNumpyCartesian.tolist(),
     }
     if 'reid' in dd and isinstance(dd['reid'], np.ndarray):
-      vector = dd['reid'].flatten().tolist()
-      vector = struct.pack("256f", *vector)
-      vector = base64.b64encode(vector).decode('utf-8')
-      dd['reid'] = vector
+      dd['reid'] = encodeReIDVector(dd['reid'])
     if self.intersected:
       dd['adjusted'] = {'gid': self.adjusted[0],
                         'point': (self.adjusted[1].x, self.adjusted[1].y, self.adjusted[1].z)}
@@ -341,8 +382,11 @@ class MovingObject:
     self.frameCount = info['frame_count']
     self.reidVector = info['reid']
     if self.reidVector is not None:
-      vector = base64.b64decode(self.reidVector)
-      self.reidVector = np.array(struct.unpack("256f", vector)).reshape(1, -1)
+      try:
+        self.reidVector = decodeReIDVector(self.reidVector)
+      except ValueError as e:
+        log.warn(f"Dropping invalid re-ID vector of {self.category} {self.gid}: {e}")
+        self.reidVector = None
     self.first_seen = info['first_seen']
     self.location = [Chronoloc(Point(v['point']), v['timestamp'], Rectangle(v['bounding_box']))
                      for v in info['location']]
@@ -357,6 +401,9 @@ class MovingObject:
     return
 
 class ATagObject(MovingObject):
+  __slots__ = ('tag_id',)
+  _POOLED_REFERENCES = MovingObject._POOLED_REFERENCES + ('tag_id',)
+
   def __init__(self, info, when, sensor):
     super().__init__(info, when, sensor)
 
@@ -388,3 +435,46 @@ class ATagObject(MovingObject):
     rep = super().__repr__()
     rep += " %s" % (self.tag_id)
     return rep
+
+class MovingObjectPool:
+  """! Free list of MovingObject instances which are reused between frames.
+
+  Detections that are not promoted to a reliable track are handed back with
+  release() once the tracker is done with them, and acquire() re-initializes
+  one of those instances instead of allocating a new one.
+  """
+
+  def __init__(self, max_size=DEFAULT_POOL_SIZE):
+    self.max_size = max_size
+    self._free = {}
+    return
+
+  def acquire(self, cls, info, when, camera):
+    free = self._free.get(cls)
+    mobj = None
+    if free:
+      try:
+        mobj = free.pop()
+      except IndexError:
+        pass
+    if mobj is None:
+      return cls(info, when, camera)
+    mobj.__init__(info, when, camera)
+    return mobj
+
+  def release(self, objects):
+    for mobj in objects:
+      free = self._free.get(type(mobj))
+      if free is None:
+        free = self._free.setdefault(type(mobj), collections.deque(maxlen=self.max_size))
+      # Drop the references so a pooled object does not keep frame data alive,
+      # optional slots are unset again for the hasattr() checks
+      for attr in mobj._POOLED_REFERENCES:
+        setattr(mobj, attr, None)
+      for attr in MovingObject._OPTIONAL_SLOTS:
+        if hasattr(mobj, attr):
+          delattr(mobj, attr)
+      free.append(mobj)
+    return
+
+object_pool = MovingObjectPool()
@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import numpy as np
+
+from scene_common.geometry import DEFAULTZ
+
+class ObjectSnapshot:
+  """! Immutable structure-of-arrays view of the current objects of a tracker.
+
+  The tracker thread builds one snapshot per processed frame and publishes it
+  as its current objects. Every per-object value which downstream stages need
+  is stored as a read-only numpy column with one row per object, so those
+  stages can work on whole columns instead of walking the objects attribute
+  by attribute. Values that are missing on an object are stored as NaN.
+
+  The columns are built on first access, a frame whose snapshot is only
+  iterated does not pay for them. Iterating over or indexing the snapshot
+  returns the MovingObject instances themselves, for code that still needs
+  per-object access.
+  """
+
+  _COLUMNS = ('gids', 'positions', 'velocities', 'sizes', 'rotations', 'confidences',
+              'cameras', 'visibility')
+  __slots__ = ('objects',) + _COLUMNS
+
+  def __init__(self, objects=()):
+    self._set('objects', tuple(objects))
+    return
+
+  def __getattr__(self, name):
+    # Only called for slots which are not set yet
+    if name not in self._COLUMNS:
+      raise AttributeError(name)
+    self._buildColumns()
+    return object.__getattribute__(self, name)
+
+  def _buildColumns(self):
+    # Building twice from two threads gives the same columns, no lock needed
+    objects = self.objects
+    count = len(objects)
+
+    gids = []
+    positions = []
+    velocities = []
+    sizes = []
+    rotations = []
+    confidences = []
+    visible_from = []
+    cameras = set()
+    for obj in objects:
+      gids.append(obj.gid)
+      positions.append(obj.sceneLoc.asCartesianVector)
+      velocity = obj.velocity
+      if velocity is None:
+        velocities.append((np.nan,) * 3)
+      elif velocity.is3D:
+        velocities.append((velocity.x, velocity.y, velocity.z))
+      else:
+        velocities.append((velocity.x, velocity.y, DEFAULTZ))
+      sizes.append(obj.size if obj.size is not None else (np.nan,) * 3)
+      rotations.append(obj.rotation if obj.rotation is not None else (np.nan,) * 4)
+      confidences.append(obj.confidence if obj.confidence is not None else np.nan)
+      visibility = getattr(obj, 'visibility', ())
+      visible_from.append(visibility)
+      cameras.update(visibility)
+
+    cameras = tuple(sorted(cameras))
+    camera_index = {camera_id: idx for idx, camera_id in enumerate(cameras)}
+    visible = np.zeros((count, len(cameras)), dtype=bool)
+    for row, visibility in enumerate(visible_from):
+      visible[row, [camera_index[camera_id] for camera_id in visibility]] = True
+
+    self._set('gids', self._column(gids, object, (count,)))
+    self._set('positions', self._column(positions, np.float64, (count, 3)))
+    self._set('velocities', self._column(velocities, np.float64, (count, 3)))
+    self._set('sizes', self._column(sizes, np.float64, (count, 3)))
+    self._set('rotations', self._column(rotations, np.float64, (count, 4)))
+    self._set('confidences', self._column(confidences, np.float64, (count,)))
+    self._set('cameras', cameras)
+    # Bit i of a row is set when the object is visible from cameras[i]
+    self._set('visibility', self._column(np.packbits(visible, axis=1, bitorder='little'),
+                                         np.uint8, (count, (len(cameras) + 7) // 8)))
+    return
+
+  def _set(self, name, value):
+    object.__setattr__(self, name, value)
+    return
+
+  @staticmethod
+  def _column(values, dtype, shape):
+    if dtype is object:
+      column = np.empty(shape, dtype=object)
+      column[:] = values
+    else:
+      column = np.asarray(values, dtype=dtype).reshape(shape)
+    column.flags.writeable = False
+    return column
+
+  def visibleFrom(self, camera_id):
+    """! Returns a boolean mask of the objects visible from a camera.
+    @param   camera_id   ID of the camera.
+    @return  Boolean array with one entry per object.
+    """
+    if camera_id not in self.cameras:
+      return np.zeros(len(self.objects), dtype=bool)
+    idx = self.cameras.index(camera_id)
+    return (self.visibility[:, idx // 8] & (1 << (idx % 8))) != 0
+
+  def visibleCameras(self, row):
+    """! Returns the IDs of the cameras from which an object is visible.
+    @param   row   Index of the object in the snapshot.
+    @return  List of camera IDs.
+    """
+    bits = np.unpackbits(self.visibility[row], count=len(self.cameras), bitorder='little')
+    return [self.cameras[idx] for idx in np.flatnonzero(bits)]
+
+  def __setattr__(self, name, value):
+    raise AttributeError("ObjectSnapshot is immutable")
+
+  def __delattr__(self, name):
+    raise AttributeError("ObjectSnapshot is immutable")
+
+  def __len__(self):
+    return len(self.objects)
+
+  def __iter__(self):
+    return iter(self.objects)
+
+  def __getitem__(self, idx):
+    return self.objects[idx]
+
+  def __repr__(self):
+    return "ObjectSnapshot: %d objects, cameras: %s" % (len(self.objects), list(self.cameras))
+
+EMPTY_SNAPSHOT = ObjectSnapshot()
@@ -9,23 +9,35 @@ Environment variables:
 - CONTROLLER_ENABLE_METRICS: "true"/"false" (default: "false")
 - CONTROLLER_METRICS_ENDPOINT: OTLP gRPC endpoint
 - CONTROLLER_METRICS_EXPORT_INTERVAL_S: Export interval in seconds (default: 60)
+- CONTROLLER_METRICS_STAGE_SAMPLE_RATIO: Share of pipeline stage runs that are timed,
+  0.0-1.0 (default: 0.1)
+- CONTROLLER_METRICS_PROMETHEUS_PORT: Port of an in-process HTTP endpoint serving the
+  metrics in Prometheus text format (default: not served). Metrics are only
+  collected on scrape.
+- CONTROLLER_METRICS_PROMETHEUS_ADDR: Address the Prometheus endpoint listens on
+  (default: "0.0.0.0")
 """
 
 
+import random
 import time
 import os
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 
 from opentelemetry import metrics
+from opentelemetry.metrics import Observation
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
 from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.exporter.prometheus import PrometheusMetricReader
+from prometheus_client import start_http_server
 
 from scene_common import log
 
 # Export simplified public API functions only
-__all__ = ['init', 'inc_messages', 'inc_dropped', 'record_object_count', 'time_mqtt_handler', 'time_tracking']
+__all__ = ['init', 'inc_messages', 'inc_dropped', 'record_object_count', 'time_mqtt_handler', 'time_tracking',
+           'time_stage', 'time_stage_deferred', 'stage_start', 'record_stage', 'add_gauge_source']
 
 # OpenTelemetry metric name constants
 METRIC_MQTT_MESSAGES_COUNT = "scenescape_controller_mqtt_messages"
@@ -33,6 +45,25 @@ METRIC_MQTT_MESSAGES_DROPPED = "scenescape_controller_mqtt_messages_dropped"
 METRIC_MQTT_HANDLER_DURATION = "scenescape_controller_mqtt_handler_duration"
 METRIC_TRACKING_DURATION = "scenescape_controller_tracking_duration"
 METRIC_MQTT_MESSAGES_OBJECT_COUNT = "scenescape_controller_objects_in_mqtt_message"
+METRIC_STAGE_DURATION = "scenescape_controller_stage_duration"
+METRIC_TRACKER_QUEUE_DEPTH = "scenescape_controller_tracker_queue_depth"
+METRIC_ACTIVE_TRACKS = "scenescape_controller_active_tracks"
+METRIC_REID_BACKLOG = "scenescape_controller_reid_backlog"
+METRIC_PUBLISH_QUEUE_DEPTH = "scenescape_controller_publish_queue_depth"
+
+# Pipeline stages timed with time_stage()
+STAGE_DECODE = "decode"
+STAGE_VALIDATE = "validate"
+STAGE_CAMERA_REFRESH = "camera_refresh"
+STAGE_PROJECTION = "projection"
+STAGE_TRACKER_ENQUEUE = "tracker_enqueue"
+STAGE_TRACKER_WAIT = "tracker_wait"
+STAGE_EVENTS = "events"
+STAGE_SERIALIZE = "serialize"
+STAGE_PUBLISH = "publish"
+
+# Stages mostly take well under a millisecond
+STAGE_BUCKETS_MS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
 
 METRIC_INSTRUMENTS = [
     {
@@ -64,12 +95,45 @@ METRIC_INSTRUMENTS = [
         "description": "Object count per MQTT message",
         "unit": "1",
         "kind": "histogram"
+    },
+    {
+        "name": METRIC_STAGE_DURATION,
+        "description": "Processing time of a controller pipeline stage, sampled",
+        "unit": "ms",
+        "kind": "histogram",
+        "buckets": STAGE_BUCKETS_MS
+    },
+    {
+        "name": METRIC_TRACKER_QUEUE_DEPTH,
+        "description": "Frames waiting for the tracker of a category",
+        "unit": "1",
+        "kind": "gauge"
+    },
+    {
+        "name": METRIC_ACTIVE_TRACKS,
+        "description": "Objects currently tracked",
+        "unit": "1",
+        "kind": "gauge"
+    },
+    {
+        "name": METRIC_REID_BACKLOG,
+        "description": "Re-ID queries and entries waiting for the database",
+        "unit": "1",
+        "kind": "gauge"
+    },
+    {
+        "name": METRIC_PUBLISH_QUEUE_DEPTH,
+        "description": "MQTT messages waiting to be sent to the broker",
+        "unit": "1",
+        "kind": "gauge"
     }
 ]
 
 # OpenTelemetry service configuration
 CONTROLLER_SERVICE_NAME = "scene-controller"
 DEFAULT_METRICS_EXPORT_INTERVAL_S = 60
+DEFAULT_STAGE_SAMPLE_RATIO = 0.1
+DEFAULT_PROMETHEUS_ADDR = "0.0.0.0"
 
 # Public API functions for metric operations
 def init():
@@ -85,8 +149,22 @@ def init():
   metrics_endpoint = os.getenv("CONTROLLER_METRICS_ENDPOINT", "")
   export_interval_s = os.getenv("CONTROLLER_METRICS_EXPORT_INTERVAL_S", str(DEFAULT_METRICS_EXPORT_INTERVAL_S))
 
-  if enable_metrics and not metrics_endpoint:
-    log.warning("CONTROLLER_METRICS_ENDPOINT not set; disabling metrics")
+  prometheus_port = os.getenv("CONTROLLER_METRICS_PROMETHEUS_PORT", "")
+  prometheus_addr = os.getenv("CONTROLLER_METRICS_PROMETHEUS_ADDR", DEFAULT_PROMETHEUS_ADDR)
+
+  if prometheus_port:
+    try:
+      prometheus_port = int(prometheus_port)
+      if not (0 < prometheus_port < 65536):
+        raise ValueError()
+    except ValueError:
+      log.warning("Invalid CONTROLLER_METRICS_PROMETHEUS_PORT; not serving Prometheus metrics")
+      prometheus_port = None
+  else:
+    prometheus_port = None
+
+  if enable_metrics and not metrics_endpoint and prometheus_port is None:
+    log.warning("Neither CONTROLLER_METRICS_ENDPOINT nor CONTROLLER_METRICS_PROMETHEUS_PORT set; disabling metrics")
     enable_metrics = False
 
   try:
@@ -97,7 +175,17 @@ def init():
     log.warning(f"Invalid CONTROLLER_METRICS_EXPORT_INTERVAL_S; using default of {DEFAULT_METRICS_EXPORT_INTERVAL_S}s")
     export_interval_s = DEFAULT_METRICS_EXPORT_INTERVAL_S
 
-  _metrics_instance = _metrics(enable_metrics, metrics_endpoint, export_interval_s)
+  stage_sample_ratio = os.getenv("CONTROLLER_METRICS_STAGE_SAMPLE_RATIO", str(DEFAULT_STAGE_SAMPLE_RATIO))
+  try:
+    stage_sample_ratio = float(stage_sample_ratio)
+    if not (0.0 <= stage_sample_ratio <= 1.0):
+      raise ValueError()
+  except ValueError:
+    log.warning(f"Invalid CONTROLLER_METRICS_STAGE_SAMPLE_RATIO; using default of {DEFAULT_STAGE_SAMPLE_RATIO}")
+    stage_sample_ratio = DEFAULT_STAGE_SAMPLE_RATIO
+
+  _metrics_instance = _metrics(enable_metrics, metrics_endpoint, export_interval_s, stage_sample_ratio,
+                               prometheus_port, prometheus_addr)
 
 def inc_messages(attributes=None):
   """Increment processed messages counter."""
@@ -137,49 +225,202 @@ def time_tracking(attributes=None):
   else:
     yield
 
+def time_stage(stage, scene=None, category=None):
+  """Time a pipeline stage on a sample of its runs.
+
+  Returns a context manager. Runs that are not sampled, and all runs when
+  metrics are disabled, get a shared no-op context manager.
+  """
+  start = stage_start()
+  if start is None:
+    return _NO_TIMER
+  return _StageTimer(stage, start, scene, category)
+
+def time_stage_deferred(stage):
+  """Time a pipeline stage whose scene and category are only known later.
+
+  Returns a context manager. Call record(scene, category) on it once they
+  are known, runs that are never recorded are dropped. Runs that are not
+  sampled get a shared no-op timer.
+  """
+  start = stage_start()
+  if start is None:
+    return _NO_DEFERRED_TIMER
+  return _DeferredStageTimer(stage, start)
+
+def stage_start():
+  """Start a sampled stage that ends in another function or thread.
+
+  Returns the start time in monotonic nanoseconds, or None when the run is
+  not sampled. Pass the result to record_stage().
+  """
+  instance = _metrics_instance
+  if instance is None or not instance.enable_metrics \
+      or random.random() >= instance.stage_sample_ratio:
+    return None
+  return time.monotonic_ns()
+
+def record_stage(stage, start, scene=None, category=None):
+  """Record a stage started with stage_start()."""
+  if start is None:
+    return
+  _record_stage_duration(stage, start, time.monotonic_ns(), scene, category)
+
+def _record_stage_duration(stage, start, end, scene, category):
+  instance = _metrics_instance
+  if instance is None:
+    return
+  attributes = {"stage": stage}
+  if scene is not None:
+    attributes["scene"] = scene
+  if category is not None:
+    attributes["category"] = category
+  duration = (end - start) / 1e6  # Convert to milliseconds
+  instance.histogram_record(METRIC_STAGE_DURATION, duration, attributes)
+
+def add_gauge_source(metric_name, source):
+  """Register a function reporting the current value of a gauge.
+
+  The source is called without arguments each time the metrics are
+  collected and returns an iterable of (value, attributes) pairs. Sources
+  can be registered before init().
+  """
+  _gauge_sources.setdefault(metric_name, []).append(source)
+
 # Internal implementation - do not use directly
 _metrics_instance = None
+_NO_TIMER = nullcontext()
+_gauge_sources = {}
+
+class _StageTimer:
+  """Context manager recording one sampled stage run."""
+
+  __slots__ = ("stage", "start", "scene", "category")
+
+  def __init__(self, stage, start, scene, category):
+    self.stage = stage
+    self.start = start
+    self.scene = scene
+    self.category = category
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    record_stage(self.stage, self.start, self.scene, self.category)
+    return False
+
+class _DeferredStageTimer:
+  """Context manager timing one sampled stage run, recorded with record()."""
+
+  __slots__ = ("stage", "start", "end")
+
+  def __init__(self, stage, start):
+    self.stage = stage
+    self.start = start
+    self.end = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.end = time.monotonic_ns()
+    return False
+
+  def record(self, scene=None, category=None):
+    if self.end is not None:
+      _record_stage_duration(self.stage, self.start, self.end, scene, category)
+
+class _NoDeferredStageTimer:
+  """Deferred stage timer of the runs that are not sampled."""
+
+  __slots__ = ()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    return False
+
+  def record(self, scene=None, category=None):
+    return
+
+_NO_DEFERRED_TIMER = _NoDeferredStageTimer()
 
 class _metrics:
   """Internal metrics implementation."""
 
-  def __init__(self, enable_metrics, otlp_endpoint, export_interval_s):
+  def __init__(self, enable_metrics, otlp_endpoint, export_interval_s,
+               stage_sample_ratio=DEFAULT_STAGE_SAMPLE_RATIO,
+               prometheus_port=None, prometheus_addr=DEFAULT_PROMETHEUS_ADDR):
     self.enable_metrics = enable_metrics
+    self.stage_sample_ratio = stage_sample_ratio
     if enable_metrics:
-      log.info(f"Exporting OpenTelemetry metrics to {otlp_endpoint} every {export_interval_s}s")
-      self.meter = self.init_meter(otlp_endpoint, export_interval_s)
+      self.meter = self.init_meter(otlp_endpoint, export_interval_s, prometheus_port, prometheus_addr)
       self.init_metrics()
     else:
       log.info("OpenTelemetry metrics disabled.")
       self.meter = None
 
-  def init_meter(self, otlp_endpoint, export_interval_s):
-    metric_exporter = OTLPMetricExporter(endpoint=otlp_endpoint, insecure=True)
-    metric_reader = PeriodicExportingMetricReader(metric_exporter, export_interval_millis=export_interval_s * 1000)
+  def init_meter(self, otlp_endpoint, export_interval_s, prometheus_port=None,
+                 prometheus_addr=DEFAULT_PROMETHEUS_ADDR):
+    metric_readers = []
+    if otlp_endpoint:
+      log.info(f"Exporting OpenTelemetry metrics to {otlp_endpoint} every {export_interval_s}s")
+      metric_exporter = OTLPMetricExporter(endpoint=otlp_endpoint, insecure=True)
+      metric_readers.append(PeriodicExportingMetricReader(metric_exporter,
+                                                          export_interval_millis=export_interval_s * 1000))
+    if prometheus_port is not None:
+      metric_readers.append(self.init_prometheus(prometheus_port, prometheus_addr))
     resource = Resource(attributes={SERVICE_NAME: CONTROLLER_SERVICE_NAME})
-    provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
+    provider = MeterProvider(resource=resource, metric_readers=metric_readers)
     metrics.set_meter_provider(provider)
     meter = metrics.get_meter(__name__)
     return meter
 
+  def init_prometheus(self, port, addr):
+    """Serve the metrics in Prometheus text format, collected on each scrape."""
+    start_http_server(port, addr=addr)
+    log.info(f"Serving Prometheus metrics on {addr}:{port}")
+    return PrometheusMetricReader()
+
   def init_metrics(self):
     """Create metric instruments."""
     INSTRUMENT_CREATORS = {
         "counter": self.meter.create_counter,
         "histogram": self.meter.create_histogram,
+        "gauge": self.create_gauge,
     }
 
     for instrument in METRIC_INSTRUMENTS:
       try:
         creator = INSTRUMENT_CREATORS[instrument["kind"]]
+        options = {}
+        if "buckets" in instrument:
+          options["explicit_bucket_boundaries_advisory"] = instrument["buckets"]
         setattr(self, instrument["name"], creator(
             name=instrument["name"],
             description=instrument["description"],
-            unit=instrument["unit"]
+            unit=instrument["unit"],
+            **options
         ))
       except KeyError:
         raise ValueError(f"Unknown instrument kind: '{instrument['kind']}'. Supported kinds: {list(INSTRUMENT_CREATORS.keys())}")
 
+  def create_gauge(self, name, description, unit):
+    """Create a gauge reporting the registered gauge sources on collection."""
+    def observe(options):
+      observations = []
+      for source in list(_gauge_sources.get(name, [])):
+        try:
+          observations.extend(Observation(value, attributes) for value, attributes in source())
+        except Exception as e:
+          # Sources read live controller state owned by other threads
+          log.debug(f"Gauge {name} not collected", e)
+      return observations
+    return self.meter.create_observable_gauge(name=name, callbacks=[observe],
+                                              description=description, unit=unit)
+
   def counter_add(self, attr_name, value=1, attributes=None):
     """Add value to counter metric."""
     counter = getattr(self, attr_name, None)
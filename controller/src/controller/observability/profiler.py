@@ -0,0 +1,269 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""On-demand profiling of a running SceneScape controller.
+
+A profile is requested by publishing a JSON command on scenescape/cmd/profile:
+
+    {"id": "slow-queue", "mode": "stack", "duration": 30, "scenes": ["Queuing"]}
+
+- id: Name of the profile, also used in the result topic (default: start time)
+- mode: "stack" samples the stacks of all threads every interval and reports them
+  in collapsed-stack format for flame graphs, "cprofile" runs cProfile on the
+  scene processing and reports pstats (default: "stack")
+- duration: Seconds to profile, at most MAX_DURATION_S (default: 10)
+- interval: Seconds between stack samples (default: 0.01)
+- scenes: uids or names of the scenes to profile, all scenes when empty. Stack
+  samples are only kept while a thread is processing one of these scenes.
+- output: "mqtt" sends the result with PubSub.sendFile on
+  scenescape/sys/profile/result/<id>, "disk" writes it to CONTROLLER_PROFILE_DIR
+  (default: "mqtt", falls back to disk when nobody receives the result)
+
+Progress is reported on scenescape/sys/profile/status. Only one profile runs at
+a time. Outside of a profile the controller only pays for a None check per
+processed message.
+
+Environment variables:
+- CONTROLLER_PROFILE_DIR: Directory for profiles written to disk (default: /tmp/scenescape-profiles)
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+import orjson
+
+from scene_common import log
+from scene_common.mqtt import PubSub
+
+__all__ = ['Profiler']
+
+MODE_STACK = "stack"
+MODE_CPROFILE = "cprofile"
+OUTPUT_MQTT = "mqtt"
+OUTPUT_DISK = "disk"
+
+DEFAULT_DURATION_S = 10
+MAX_DURATION_S = 300
+DEFAULT_INTERVAL_S = 0.01
+MIN_INTERVAL_S = 0.001
+DEFAULT_PROFILE_DIR = "/tmp/scenescape-profiles"
+SCOPE_EXIT_TIMEOUT_S = 1
+
+_NO_SCOPE = nullcontext()
+
+class Profiler:
+  """Runs one time-bounded profile at a time on request."""
+
+  def __init__(self, pubsub, output_dir=None):
+    self.pubsub = pubsub
+    self.output_dir = output_dir or os.getenv("CONTROLLER_PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    self.session = None
+    self.lock = threading.Lock()
+    return
+
+  def handle_command(self, client, userdata, message):
+    """MQTT callback for profile commands."""
+    try:
+      request = orjson.loads(message.payload)
+      if not isinstance(request, dict):
+        raise ValueError("Profile command must be a JSON object")
+      self.start(**request)
+    except (ValueError, TypeError) as e:
+      log.warn("Invalid profile command", e)
+      self.publish_status(None, "failed", error=str(e))
+    return
+
+  def start(self, id=None, mode=MODE_STACK, duration=DEFAULT_DURATION_S,
+            interval=DEFAULT_INTERVAL_S, scenes=None, output=OUTPUT_MQTT):
+    """Start a profile in the background.
+
+    Returns False when another profile is still running.
+    """
+    if mode not in (MODE_STACK, MODE_CPROFILE):
+      raise ValueError(f"Unknown profile mode {mode}")
+    if output not in (OUTPUT_MQTT, OUTPUT_DISK):
+      raise ValueError(f"Unknown profile output {output}")
+    profile_id = str(id) if id is not None else time.strftime("%Y%m%d-%H%M%S")
+    # The id becomes part of a topic and a file name
+    if not profile_id or '/' in profile_id or '+' in profile_id or '#' in profile_id:
+      raise ValueError(f"Invalid profile id {profile_id}")
+
+    session = _Session(profile_id, mode, min(max(float(duration), 0), MAX_DURATION_S),
+                       max(float(interval), MIN_INTERVAL_S), set(scenes or []), output)
+    with self.lock:
+      if self.session is not None:
+        log.warn("Profile already running, ignoring", profile_id)
+        self.publish_status(profile_id, "busy", running=self.session.profile_id)
+        return False
+      self.session = session
+
+    log.info(f"Profiling {mode} for {session.duration}s", profile_id)
+    self.publish_status(profile_id, "started", mode=mode, duration=session.duration)
+    threading.Thread(target=self._run, args=(session,), daemon=True,
+                     name=f"profiler-{profile_id}").start()
+    return True
+
+  def scene_scope(self, scene):
+    """Context manager around the processing of one scene message.
+
+    Marks the thread as working on the scene for stack sampling and enables
+    cProfile, when a profile of that scene is running.
+    """
+    session = self.session
+    if session is None or not session.matches(scene):
+      return _NO_SCOPE
+    return _SceneScope(session, scene)
+
+  def publish_status(self, profile_id, state, **details):
+    status = {'id': profile_id, 'state': state}
+    status.update(details)
+    self.pubsub.publish(PubSub.formatTopic(PubSub.SYS_PROFILE_STATUS), orjson.dumps(status))
+    return
+
+  def _run(self, session):
+    try:
+      if session.mode == MODE_STACK:
+        self._sample_stacks(session)
+      else:
+        time.sleep(session.duration)
+    finally:
+      with self.lock:
+        self.session = None
+      session.wait_for_scopes(SCOPE_EXIT_TIMEOUT_S)
+
+    try:
+      data, extension = session.result()
+      self._deliver(session, data, extension)
+    except Exception as e:
+      log.error("Failed to write profile", session.profile_id, e)
+      self.publish_status(session.profile_id, "failed", error=str(e))
+    return
+
+  def _sample_stacks(self, session):
+    own_thread = threading.get_ident()
+    end = time.monotonic() + session.duration
+    while time.monotonic() < end:
+      names = {thread.ident: thread.name for thread in threading.enumerate()}
+      for thread_id, frame in sys._current_frames().items():
+        if thread_id == own_thread:
+          continue
+        if session.scenes and thread_id not in session.thread_scenes:
+          continue
+        stack = []
+        while frame is not None:
+          code = frame.f_code
+          stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+          frame = frame.f_back
+        stack.append(names.get(thread_id, str(thread_id)))
+        session.samples[";".join(reversed(stack))] += 1
+      time.sleep(session.interval)
+    return
+
+  def _deliver(self, session, data, extension):
+    topic = PubSub.formatTopic(PubSub.SYS_PROFILE, profile_id=session.profile_id)
+    if session.output == OUTPUT_MQTT:
+      if self.pubsub.sendFile(topic, io.BytesIO(data)):
+        self.publish_status(session.profile_id, "done", topic=topic, size=len(data))
+        return
+      log.warn("Profile not received, writing it to disk", session.profile_id)
+
+    os.makedirs(self.output_dir, exist_ok=True)
+    path = os.path.join(self.output_dir, f"profile-{session.profile_id}.{extension}")
+    with open(path, "wb") as f:
+      f.write(data)
+    log.info("Profile written to", path)
+    self.publish_status(session.profile_id, "done", path=path, size=len(data))
+    return
+
+class _Session:
+  """State of one running profile."""
+
+  def __init__(self, profile_id, mode, duration, interval, scenes, output):
+    self.profile_id = profile_id
+    self.mode = mode
+    self.duration = duration
+    self.interval = interval
+    self.scenes = scenes
+    self.output = output
+    self.samples = Counter()
+    # Thread id -> scene being processed, for the stack sampler
+    self.thread_scenes = {}
+    self.profile = cProfile.Profile() if mode == MODE_CPROFILE else None
+    self.active_scopes = 0
+    self.condition = threading.Condition()
+    return
+
+  def matches(self, scene):
+    if not self.scenes:
+      return True
+    return scene.uid in self.scenes or scene.name in self.scenes
+
+  def enter(self, scene):
+    with self.condition:
+      self.active_scopes += 1
+      # Since Python 3.12 cProfile runs on the process wide sys.monitoring, a
+      # second enable() raises and any disable() stops it for all threads. It is
+      # enabled by the first scope and disabled by the last one.
+      if self.profile is not None and self.active_scopes == 1:
+        self._toggle_profile(True)
+    if self.profile is None:
+      self.thread_scenes[threading.get_ident()] = scene.uid
+    return
+
+  def exit(self):
+    if self.profile is None:
+      self.thread_scenes.pop(threading.get_ident(), None)
+    with self.condition:
+      self.active_scopes -= 1
+      if self.profile is not None and self.active_scopes == 0:
+        self._toggle_profile(False)
+      self.condition.notify_all()
+    return
+
+  def _toggle_profile(self, enable):
+    # Profiler errors, like another profiling tool being active, must not
+    # reach the scene processing
+    try:
+      if enable:
+        self.profile.enable()
+      else:
+        self.profile.disable()
+    except Exception as e:
+      log.warn("Failed to", "enable" if enable else "disable", "cProfile", self.profile_id, e)
+    return
+
+  def wait_for_scopes(self, timeout):
+    with self.condition:
+      self.condition.wait_for(lambda: self.active_scopes == 0, timeout)
+    return
+
+  def result(self):
+    """Returns the profile data and its file extension."""
+    if self.profile is not None:
+      # Same format as pstats.Stats.dump_stats(), readable with pstats.Stats(path)
+      self.profile.create_stats()
+      return marshal.dumps(self.profile.stats), "pstats"
+    lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+    return ("\n".join(lines) + "\n").encode(), "collapsed"
+
+class _SceneScope:
+  __slots__ = ("session", "scene")
+
+  def __init__(self, session, scene):
+    self.session = session
+    self.scene = scene
+
+  def __enter__(self):
+    self.session.enter(self.scene)
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.session.exit()
+    return False
@@ -23,6 +23,10 @@ Decorator for functions:
 Context manager for code blocks:
     with tracing.span_context("operation-name"):
         do_something()
+
+Spans from the latency trace of a published message, one parent span from the
+first to the last stage with one child span per stage:
+    tracing.record_latency_trace(latency_trace.readTrace(jdata), {"camera": "cam1"})
 """
 
 from contextlib import contextmanager
@@ -39,10 +43,11 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from scene_common import log
 
 # Export simplified public API functions only
-__all__ = ['init', 'span_decorator', 'span_context']
+__all__ = ['init', 'span_decorator', 'span_context', 'record_latency_trace']
 
 # OpenTelemetry service configuration
 CONTROLLER_SERVICE_NAME = "scene-controller"
+LATENCY_TRACE_SPAN_NAME = "latency-trace"
 DEFAULT_SAMPLING_RATIO = 1.0  # Trace all by default
 
 def init():
@@ -121,6 +126,34 @@ def span_context(span_name):
       span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
       raise
 
+def record_latency_trace(entries, attributes=None):
+  """Create spans for the stages of a latency trace after the fact.
+
+  The parent span covers the first to the last stage, each later stage gets a
+  child span that starts where the previous stage ended.
+
+  Args:
+      entries (list): (stage, epoch_ms) tuples as returned by latency_trace.readTrace().
+      attributes (dict, optional): Attributes for the parent span, e.g. camera and scene.
+  """
+  if _tracing_instance is None or not _tracing_instance._enabled or len(entries) < 2:
+    return
+
+  tracer = _tracing_instance._tracer
+  # Traces have 0.1 ms resolution, scale in integers to keep epoch nanoseconds exact
+  times_ns = [round(when * 10) * 100_000 for _, when in entries]
+  parent = tracer.start_span(LATENCY_TRACE_SPAN_NAME, start_time=times_ns[0],
+                             attributes=attributes)
+  parent.set_attribute("latency.total_ms", entries[-1][1] - entries[0][1])
+  context = trace.set_span_in_context(parent)
+  for idx in range(1, len(entries)):
+    stage = entries[idx][0]
+    span = tracer.start_span(stage, context=context, start_time=times_ns[idx - 1],
+                             attributes={"latency.stage": stage,
+                                         "latency.ms": entries[idx][1] - entries[idx - 1][1]})
+    span.end(end_time=max(times_ns[idx], times_ns[idx - 1]))
+  parent.end(end_time=max(times_ns[-1], times_ns[0]))
+  return
 
 # Internal implementation - do not use directly
 _tracing_instance = None
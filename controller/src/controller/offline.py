@@ -0,0 +1,204 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import time
+
+import orjson
+
+from controller.detections_builder import REID_ENCODING_LIST
+from controller.scene_controller import SceneController
+from scene_common import log
+from scene_common.json_track_data import CamManager
+from scene_common.local_pubsub import LocalPubSub
+from scene_common.mqtt import PubSub
+
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+PARQUET_ROW_GROUP = 10000
+PROGRESS_INTERVAL = 10
+# Offline runs keep the re-id embeddings in process instead of connecting to VDMS
+DEFAULT_REID_DATABASE = "IN_PROCESS"
+
+# Output name, topic filter and the topic fields stored with every message
+OUTPUTS = (
+  ("scene", PubSub.formatTopic(PubSub.DATA_SCENE, scene_id="+", thing_type="+"),
+   ("scene_id", "thing_type")),
+  ("region", PubSub.formatTopic(PubSub.DATA_REGION, scene_id="+", region_id="+", thing_type="+"),
+   ("scene_id", "region_id", "thing_type")),
+  ("event", PubSub.formatTopic(PubSub.EVENT, region_type="+", scene_id="+", region_id="+",
+                               event_type="+"),
+   ("region_type", "scene_id", "region_id", "event_type")),
+)
+
+class JSONLWriter:
+  """! Writes every message as one line with its topic fields and the
+  message as published."""
+
+  def __init__(self, path, fields):
+    self.file = open(path, "wb")
+    self.fields = fields
+    return
+
+  def write(self, topic, payload):
+    values = PubSub.parseTopic(topic)
+    header = orjson.dumps({field: values[field] for field in self.fields})
+    self.file.write(header[:-1] + b',"message":' + payload + b"}\n")
+    return
+
+  def close(self):
+    self.file.close()
+    return
+
+class ParquetWriter:
+  """! Writes one row per message with the topic fields and the message
+  as a JSON string, in row groups of PARQUET_ROW_GROUP messages."""
+
+  def __init__(self, path, fields):
+    import pyarrow
+    import pyarrow.parquet
+
+    self.pyarrow = pyarrow
+    self.fields = fields
+    self.schema = pyarrow.schema([(field, pyarrow.string()) for field in fields]
+                                 + [("timestamp", pyarrow.string()), ("message", pyarrow.string())])
+    self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+    self.rows = []
+    return
+
+  def write(self, topic, payload):
+    values = PubSub.parseTopic(topic)
+    row = {field: values[field] for field in self.fields}
+    row['timestamp'] = orjson.loads(payload).get('timestamp')
+    row['message'] = payload.decode()
+    self.rows.append(row)
+    if len(self.rows) >= PARQUET_ROW_GROUP:
+      self.flush()
+    return
+
+  def flush(self):
+    if self.rows:
+      self.writer.write_table(self.pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+      self.rows = []
+    return
+
+  def close(self):
+    self.flush()
+    self.writer.close()
+    return
+
+WRITERS = {
+  FORMAT_JSONL: JSONLWriter,
+  FORMAT_PARQUET: ParquetWriter,
+}
+
+class OfflineProcessor:
+  """! Runs recorded camera detections through a scene controller without a
+  broker, as fast as they can be processed.
+
+  The per-camera detection files are merged by timestamp with CamManager
+  and every frame is handed to the controller on a LocalPubSub, so
+  validation, tracking, regions, tripwires and event evaluation behave like
+  on a live system. Tracking is synchronous, no frame is skipped while the
+  tracker is busy. Recorded timestamps are kept. Scene, region and event
+  messages are written to scene, region and event files in the output
+  directory instead of being published. Re-id uses the in-process store
+  by default so that no VDMS container is needed.
+  """
+
+  def __init__(self, data_source, output_dir, output_format=FORMAT_JSONL,
+               tracker_config_file=None, schema_file=None, visibility_topic="regulated",
+               reid_encoding=REID_ENCODING_LIST, reid_database=DEFAULT_REID_DATABASE):
+    if output_format not in WRITERS:
+      raise ValueError(f"Unknown output format {output_format}")
+    self.pubsub = LocalPubSub()
+    self.controller = SceneController(False, False, float("inf"), None, None, None, None,
+                                      None, None, None, tracker_config_file, schema_file,
+                                      visibility_topic, data_source, reid_encoding,
+                                      pubsub=self.pubsub, synchronous_tracking=True,
+                                      reid_database=reid_database)
+    self.pubsub.loopStart()
+
+    os.makedirs(output_dir, exist_ok=True)
+    self.writers = {}
+    self.counts = {}
+    for name, topic, fields in OUTPUTS:
+      writer = WRITERS[output_format](os.path.join(output_dir, f"{name}.{output_format}"), fields)
+      self.writers[name] = writer
+      self.counts[name] = 0
+      self.pubsub.addCallback(topic, self._outputCallback(name, writer))
+    self.frames = 0
+    self.skipped = 0
+    return
+
+  def _outputCallback(self, name, writer):
+    def callback(client, userdata, message):
+      writer.write(message.topic, message.payload)
+      self.counts[name] += 1
+      return
+    return callback
+
+  def process(self, inputs):
+    """! Processes recorded detections.
+    @param   inputs  Per-camera JSON detection files, one frame per line.
+    @return  Number of frames processed.
+    """
+    cam_manager = CamManager(inputs, None)
+    start = last_report = time.monotonic()
+    while True:
+      _, jdata, _ = cam_manager.nextFrame(None, loop=False, readFrame=False)
+      if not jdata:
+        break
+      jdata.pop('epochtime', None)
+      if self.controller.cache_manager.sceneWithCameraID(jdata['id']) is None:
+        self.skipped += 1
+        continue
+      self.pubsub.publish(PubSub.formatTopic(PubSub.DATA_CAMERA, camera_id=jdata['id']),
+                          orjson.dumps(jdata))
+      self.frames += 1
+
+      now = time.monotonic()
+      if now - last_report > PROGRESS_INTERVAL:
+        log.info(f"Processed {self.frames} frames, {self.frames / (now - start):.1f} frames/s")
+        last_report = now
+    return self.frames
+
+  def close(self):
+    for scene in self.controller.cache_manager.allScenes():
+      scene.tracker.join()
+    for writer in self.writers.values():
+      writer.close()
+    return
+
+def runOffline(args):
+  """! Entry point of controller-cmd --offline.
+  @param   args  Parsed command line arguments.
+  @return  Exit code.
+  """
+  if not args.data_source or not args.input:
+    log.error("--offline needs --data_source and --input")
+    return 1
+  if args.output_format == FORMAT_PARQUET:
+    try:
+      import pyarrow.parquet
+    except ImportError:
+      log.error("Parquet output needs pyarrow, install it or use --output_format jsonl")
+      return 1
+
+  start = time.monotonic()
+  processor = OfflineProcessor(args.data_source, args.output_dir, args.output_format,
+                               args.tracker_config_file, args.schema_file,
+                               args.visibility_topic, args.reid_encoding,
+                               args.reid_database or DEFAULT_REID_DATABASE)
+  try:
+    processor.process(args.input)
+  finally:
+    processor.close()
+  elapsed = time.monotonic() - start
+  log.info(f"Processed {processor.frames} frames in {elapsed:.1f} s,"
+           f" {processor.frames / elapsed if elapsed > 0 else 0:.1f} frames/s")
+  if processor.skipped:
+    log.warn(f"Skipped {processor.skipped} frames of cameras in no scene")
+  log.info("Wrote", ", ".join(f"{count} {name}" for name, count in processor.counts.items()),
+           "messages to", args.output_dir)
+  return 0
@@ -1,8 +1,148 @@
 # SPDX-FileCopyrightText: (C) 2024 - 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import base64
+import json
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from scene_common import log
+
+DIMENSIONS = 256
+K_NEIGHBORS = 1
+SCHEMA_NAME = "reid_vector"
+SIMILARITY_METRIC = "L2"
+
+DEFAULT_SNAPSHOT_PATH = os.getenv("REID_SNAPSHOT_PATH")
+DEFAULT_SNAPSHOT_INTERVAL = 60
+DEFAULT_IVF_THRESHOLD = 20000
+DEFAULT_NPROBE = 8
+DEFAULT_PQ_SUBQUANTIZERS = 16
+KMEANS_ITERATIONS = 10
+PQ_CENTROIDS = 256
+RERANK_FACTOR = 32
+SNAPSHOT_METADATA = "reid_index.json"
+TRAINING_SAMPLE_SIZE = 16384
+
+FEATURE_DTYPES = ("float32", "float16", "int8")
+DEFAULT_FEATURE_DTYPE = os.getenv("REID_FEATURE_DTYPE", "float16")
+
+def decodeReIDVector(data):
+  """
+  Decode a base64 encoded re-ID vector of native float32 values. The returned array is
+  a read-only view of the decoded buffer, the values are not copied. Raises ValueError
+  if the data is not base64 of DIMENSIONS values.
+
+  @param   data    Base64 encoded vector
+  @return  vector  1xDIMENSIONS float32 array
+  """
+  buffer = base64.b64decode(data)
+  if len(buffer) != DIMENSIONS * np.dtype(np.float32).itemsize:
+    raise ValueError(f"Re-ID vector has {len(buffer)} bytes, expected {DIMENSIONS} float32 values")
+  return np.frombuffer(buffer, dtype=np.float32).reshape(1, -1)
+
+def encodeReIDVector(vector):
+  """
+  Encode a re-ID vector as base64 of its float32 values, the inverse of decodeReIDVector.
+
+  @param   vector  Re-ID vector
+  @return  str     Base64 encoded vector
+  """
+  return base64.b64encode(np.ascontiguousarray(vector, dtype=np.float32)).decode('utf-8')
+
+def weightedMeanEmbedding(reid_vectors, weights):
+  """
+  Combine the re-ID vectors collected for a track into one vector, weighting each
+  vector by the quality of the detection it came from.
+
+  @param   reid_vectors  Re-ID vectors of the track
+  @param   weights       Non-negative quality weight of each vector
+  @return  vector        Weighted mean as a flat float32 array
+  """
+  vectors = np.vstack([np.asarray(vector, dtype=np.float32).reshape(1, -1)
+                       for vector in reid_vectors])
+  weights = np.asarray(weights, dtype=np.float32)
+  if not weights.sum() > 0:
+    weights = np.ones(len(vectors), dtype=np.float32)
+  return (weights @ vectors) / weights.sum()
+
+def medoidEmbeddings(reid_vectors, k, iterations=KMEANS_ITERATIONS):
+  """
+  Pick k of the re-ID vectors collected for a track which represent all of them best,
+  i.e. the medoids of a k-medoids clustering with squared L2 distance.
+
+  @param   reid_vectors  Re-ID vectors of the track
+  @param   k             Number of vectors to pick
+  @return  list          The medoids as flat float32 arrays
+  """
+  vectors = np.vstack([np.asarray(vector, dtype=np.float32).reshape(1, -1)
+                       for vector in reid_vectors])
+  if len(vectors) <= k:
+    return list(vectors)
+  norms = (vectors ** 2).sum(axis=1)
+  distances = np.maximum(norms[:, None] + norms[None, :] - 2 * vectors @ vectors.T, 0)
+
+  # Greedy initialization, then alternate between assigning the vectors to the closest
+  # medoid and moving each medoid to the member with the lowest total distance
+  medoids = [int(np.argmin(distances.sum(axis=1)))]
+  while len(medoids) < k:
+    cost = np.minimum(distances[:, medoids].min(axis=1)[None, :], distances).sum(axis=1)
+    cost[medoids] = np.inf
+    medoids.append(int(np.argmin(cost)))
+  medoids = np.array(medoids)
+  for _ in range(iterations):
+    assignment = np.argmin(distances[:, medoids], axis=1)
+    updated = medoids.copy()
+    for cluster in range(k):
+      members = np.flatnonzero(assignment == cluster)
+      if len(members):
+        updated[cluster] = members[np.argmin(distances[np.ix_(members, members)].sum(axis=1))]
+    if np.array_equal(updated, medoids):
+      break
+    medoids = updated
+  return list(vectors[medoids])
+
+class Int8Embedding:
+  """
+  Re-ID vector quantized to int8 with a single scale factor. Converting it with
+  np.asarray() returns the dequantized float32 vector, so it can be passed to the
+  database backends like any other vector.
+  """
+  __slots__ = ('values', 'scale')
+
+  def __init__(self, vector):
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    self.scale = peak / 127 if peak > 0 else 1.0
+    self.values = np.round(vector / self.scale).astype(np.int8)
+    return
+
+  def __array__(self, dtype=None, copy=None):
+    vector = self.values.astype(np.float32) * np.float32(self.scale)
+    if dtype is not None:
+      vector = vector.astype(dtype, copy=False)
+    return vector
+
+  def __len__(self):
+    return len(self.values)
+
+def compressEmbedding(vector, dtype=DEFAULT_FEATURE_DTYPE):
+  """
+  Convert a re-ID vector to the compact representation used while it is stored
+  with a track.
+
+  @param   vector  Re-ID vector
+  @param   dtype   One of FEATURE_DTYPES
+  @return  Flat float32 or float16 array, or an Int8Embedding
+  """
+  if dtype == "int8":
+    return Int8Embedding(vector)
+  return np.asarray(vector).reshape(-1).astype(dtype)
+
 class ReIDDatabase(ABC):
   @abstractmethod
   def connect(self, hostname):
@@ -63,3 +203,374 @@ class ReIDDatabase(ABC):
     @return  iterable     Entries with the closest similarity scores
     """
     return
+
+  def addEntries(self, entries, set_name=SCHEMA_NAME):
+    """
+    Adds entries for several objects at once. Backends which can send several
+    descriptors in one request should override this, the default adds them one by one.
+
+    @param   entries   Iterable of (uuid, rvid, object_type, reid_vectors) tuples
+    @param   set_name  Name of the set to add the new entries to
+    @return  None
+    """
+    for uuid, rvid, object_type, reid_vectors in entries:
+      self.addEntry(uuid, rvid, object_type, reid_vectors, set_name)
+    return
+
+  def findSimilarityScoresBatch(self, requests, set_name=SCHEMA_NAME, k_neighbors=K_NEIGHBORS):
+    """
+    Search the database for several objects at once. Backends which can send several
+    queries in one request should override this, the default queries them one by one.
+
+    @param   requests     List of (object_type, reid_vectors) tuples
+    @param   set_name     Name of the set to find similarity scores
+    @param   k_neighbors  Number of similar entires to return
+    @return  list         Result of findSimilarityScores() for each request, in order
+    """
+    return [self.findSimilarityScores(object_type, reid_vectors, set_name, k_neighbors)
+            for object_type, reid_vectors in requests]
+
+class InProcessDatabase(ReIDDatabase):
+  """
+  Re-ID database kept in the memory of the controller process. Vectors are partitioned by
+  set name and object type. Small partitions are searched exhaustively, partitions larger
+  than ivf_threshold get an IVF-PQ index whose candidates are re-ranked with the exact
+  distance, so the scores have the same meaning as for brute force search.
+
+  If a snapshot path is given, the entries are saved there periodically and loaded again
+  on connect. The vectors of a snapshot are memory mapped instead of read into memory.
+
+  Training the indexes and saving snapshots is done by a background thread started on
+  connect, queries and new entries only wait for the lock while the results are swapped
+  in. One instance is meant to be shared by all trackers of a process, connect() may be
+  called by each of them.
+  """
+
+  def __init__(self, set_name=SCHEMA_NAME, similarity_metric=SIMILARITY_METRIC,
+               dimensions=DIMENSIONS, snapshot_path=DEFAULT_SNAPSHOT_PATH,
+               ivf_threshold=DEFAULT_IVF_THRESHOLD, nprobe=DEFAULT_NPROBE,
+               snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL):
+    self.set_name = set_name
+    self.similarity_metric = similarity_metric
+    self.dimensions = dimensions
+    self.snapshot_path = snapshot_path
+    self.snapshot_interval = snapshot_interval
+    self.ivf_threshold = ivf_threshold
+    self.nprobe = nprobe
+    self.schemas = {}
+    self.partitions = {}
+    self.pending_training = set()
+    self.changed = False
+    self.last_snapshot = time.monotonic()
+    self.lock = threading.Lock()
+    self.maintenance_lock = threading.Lock()
+    self.wakeup = threading.Event()
+    self.thread = None
+    return
+
+  def connect(self, hostname=None):
+    with self.maintenance_lock:
+      if self.thread is not None:
+        return
+      if self.snapshot_path and os.path.exists(self._metadataPath()):
+        self.loadSnapshot()
+      if not self.findSchema(self.set_name):
+        self.addSchema(self.set_name, self.similarity_metric, self.dimensions)
+      self.thread = threading.Thread(target=self._runMaintenance, daemon=True)
+      self.thread.start()
+    log.info("In-process re-id database ready")
+    return
+
+  def addSchema(self, set_name, similarity_metric, dimensions):
+    if similarity_metric != "L2":
+      log.warn(f"Unsupported similarity metric {similarity_metric} for set {set_name}")
+      return
+    with self.lock:
+      self.schemas[set_name] = dimensions
+    return
+
+  def addEntry(self, uuid, rvid, object_type, reid_vectors, set_name=SCHEMA_NAME):
+    vectors = self._asMatrix(reid_vectors)
+    if set_name not in self.schemas or vectors.shape[1] != self.schemas[set_name]:
+      log.warn(f"Failed to add the descriptors to set {set_name}")
+      return
+    with self.lock:
+      partition = self.partitions.get((set_name, object_type))
+      if partition is None:
+        partition = _Partition(vectors.shape[1])
+        self.partitions[(set_name, object_type)] = partition
+      partition.add(vectors, f"{uuid}", f"{rvid}")
+      self.changed = True
+      train = len(partition) >= self.ivf_threshold and partition.needsTraining() \
+        and (set_name, object_type) not in self.pending_training
+      if train:
+        self.pending_training.add((set_name, object_type))
+    if train:
+      self.wakeup.set()
+    return
+
+  def findSchema(self, set_name):
+    return set_name in self.schemas
+
+  def findSimilarityScores(self, object_type, reid_vectors, set_name=SCHEMA_NAME,
+                           k_neighbors=K_NEIGHBORS):
+    queries = self._asMatrix(reid_vectors)
+    with self.lock:
+      partition = self.partitions.get((set_name, object_type))
+      if partition is None or not len(partition):
+        return []
+      return [partition.search(query, k_neighbors, self.nprobe) for query in queries]
+
+  def maintain(self):
+    """
+    Trains the indexes of the partitions which have grown enough and saves a snapshot
+    when the snapshot interval has passed. Called by the background thread, the
+    lock is only held to take the vectors and to swap in the results.
+    """
+    with self.maintenance_lock:
+      with self.lock:
+        pending = list(self.pending_training)
+      for key in pending:
+        self._trainPartition(key)
+      if self.snapshot_path and self.changed \
+         and time.monotonic() - self.last_snapshot >= self.snapshot_interval:
+        self._saveSnapshot()
+    return
+
+  def saveSnapshot(self):
+    """
+    Saves all partitions to the snapshot path. Each partition is stored as a .npy file
+    and the entry properties in a JSON file, both are replaced atomically.
+    """
+    with self.maintenance_lock:
+      self._saveSnapshot()
+    return
+
+  def _saveSnapshot(self):
+    # Rows which are already stored are never modified, so the vectors can be written
+    # from views taken under the lock while entries are added concurrently
+    with self.lock:
+      schemas = dict(self.schemas)
+      partitions = [(key, partition.vectors[:len(partition)], list(partition.uuids),
+                     list(partition.rvids)) for key, partition in self.partitions.items()]
+      self.changed = False
+
+    os.makedirs(self.snapshot_path, exist_ok=True)
+    metadata = {'schemas': schemas, 'partitions': []}
+    for idx, ((set_name, object_type), vectors, uuids, rvids) in enumerate(partitions):
+      filename = f"partition-{idx}.npy"
+      tmp_path = os.path.join(self.snapshot_path, filename + ".tmp")
+      with open(tmp_path, "wb") as f:
+        np.save(f, vectors)
+      os.replace(tmp_path, os.path.join(self.snapshot_path, filename))
+      metadata['partitions'].append({
+        'set': set_name,
+        'type': object_type,
+        'file': filename,
+        'uuids': uuids,
+        'rvids': rvids,
+      })
+    tmp_path = self._metadataPath() + ".tmp"
+    with open(tmp_path, "w") as f:
+      json.dump(metadata, f)
+    os.replace(tmp_path, self._metadataPath())
+    self.last_snapshot = time.monotonic()
+    return
+
+  def loadSnapshot(self):
+    """
+    Loads the partitions saved by saveSnapshot(). The vectors are memory mapped and only
+    copied into memory when new entries are added to a partition.
+    """
+    with open(self._metadataPath()) as f:
+      metadata = json.load(f)
+    with self.lock:
+      self.schemas.update(metadata['schemas'])
+      for item in metadata['partitions']:
+        vectors = np.load(os.path.join(self.snapshot_path, item['file']), mmap_mode='r')
+        partition = _Partition(vectors.shape[1], vectors, item['uuids'], item['rvids'])
+        self.partitions[(item['set'], item['type'])] = partition
+        if len(partition) >= self.ivf_threshold:
+          self.pending_training.add((item['set'], item['type']))
+    log.info(f"Loaded {len(self.partitions)} re-id partitions from {self.snapshot_path}")
+    return
+
+  def _trainPartition(self, key):
+    # The partition stays in pending_training until its index is swapped in, so it
+    # is not queued again by the entries added meanwhile
+    with self.lock:
+      partition = self.partitions[key]
+      count = len(partition)
+      vectors = partition.vectors[:count]
+    ivf = _IVFPQIndex(vectors)
+    with self.lock:
+      partition.setIndex(ivf, count)
+      self.pending_training.discard(key)
+    return
+
+  def _runMaintenance(self):
+    timeout = self.snapshot_interval if self.snapshot_path else None
+    while True:
+      self.wakeup.wait(timeout)
+      self.wakeup.clear()
+      try:
+        self.maintain()
+      except Exception as e:
+        log.warn(f"Re-id database maintenance failed: {e}")
+    return
+
+  def _metadataPath(self):
+    return os.path.join(self.snapshot_path, SNAPSHOT_METADATA)
+
+  @staticmethod
+  def _asMatrix(reid_vectors):
+    return np.vstack([np.asarray(vector, dtype=np.float32).reshape(1, -1)
+                      for vector in reid_vectors])
+
+class _Partition:
+  """
+  Vectors of one object type with the properties of their entries. The vectors are
+  kept in a buffer that grows geometrically, so adding entries is amortized O(1).
+  """
+
+  def __init__(self, dimensions, vectors=None, uuids=None, rvids=None):
+    self.vectors = vectors if vectors is not None else np.empty((0, dimensions), np.float32)
+    self.uuids = list(uuids) if uuids else []
+    self.rvids = list(rvids) if rvids else []
+    self.ivf = None
+    return
+
+  def __len__(self):
+    return len(self.uuids)
+
+  def add(self, vectors, uuid, rvid):
+    count = len(self)
+    needed = count + len(vectors)
+    if needed > len(self.vectors) or not self.vectors.flags.writeable:
+      capacity = max(needed, 2 * len(self.vectors), 64)
+      grown = np.empty((capacity, self.vectors.shape[1]), np.float32)
+      grown[:count] = self.vectors[:count]
+      self.vectors = grown
+    self.vectors[count:needed] = vectors
+    self.uuids.extend([uuid] * len(vectors))
+    self.rvids.extend([rvid] * len(vectors))
+    if self.ivf is not None:
+      self.ivf.add(vectors, count)
+    return
+
+  def needsTraining(self):
+    # Retrain when the partition has doubled since the index was trained, so the
+    # coarse quantizer keeps up with the data
+    return self.ivf is None or len(self) >= 2 * self.ivf.trained_size
+
+  def setIndex(self, ivf, trained_count):
+    """
+    Replaces the index with one trained on the first trained_count vectors, adding
+    the vectors which arrived while it was trained.
+    """
+    if trained_count < len(self):
+      ivf.add(self.vectors[trained_count:len(self)], trained_count)
+    self.ivf = ivf
+    return
+
+  def search(self, query, k_neighbors, nprobe):
+    count = len(self)
+    if self.ivf is None:
+      candidates = np.arange(count)
+    else:
+      candidates = self.ivf.candidates(query, k_neighbors * RERANK_FACTOR, nprobe)
+    diff = self.vectors[candidates] - query
+    distances = np.einsum('ij,ij->i', diff, diff)
+    k = min(k_neighbors, len(candidates))
+    if k == 0:
+      return []
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.argsort(distances[nearest])]
+    return [{'uuid': self.uuids[candidates[idx]],
+             'rvid': self.rvids[candidates[idx]],
+             '_distance': float(distances[idx])}
+            for idx in nearest]
+
+class _IVFPQIndex:
+  """
+  Inverted file index with product quantized residuals. The coarse quantizer assigns each
+  vector to one of nlist lists, the residual to its centroid is split into subquantizers
+  parts which are each encoded as the index of the nearest of 256 centroids.
+  Search only scans the lists of the nprobe nearest centroids, using precomputed
+  lookup tables of the distances between the query residual and the PQ centroids.
+  """
+
+  def __init__(self, vectors, subquantizers=DEFAULT_PQ_SUBQUANTIZERS):
+    dimensions = vectors.shape[1]
+    while dimensions % subquantizers:
+      subquantizers -= 1
+    self.subquantizers = subquantizers
+    self.trained_size = len(vectors)
+    rng = np.random.default_rng(0)
+    sample = vectors
+    if len(vectors) > TRAINING_SAMPLE_SIZE:
+      sample = vectors[rng.choice(len(vectors), TRAINING_SAMPLE_SIZE, replace=False)]
+    sample = np.asarray(sample, dtype=np.float32)
+
+    nlist = max(1, int(np.sqrt(len(vectors))))
+    self.centroids = _kmeans(sample, nlist, rng)
+    residuals = sample - self.centroids[_nearest(sample, self.centroids)]
+    self.codebooks = [_kmeans(part, PQ_CENTROIDS, rng)
+                      for part in np.split(residuals, subquantizers, axis=1)]
+
+    self.lists = [np.empty(0, np.int64) for _ in range(len(self.centroids))]
+    self.codes = [np.empty((0, subquantizers), np.uint8) for _ in range(len(self.centroids))]
+    self.add(vectors, 0)
+    return
+
+  def add(self, vectors, first_id):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    assignment = _nearest(vectors, self.centroids)
+    residuals = vectors - self.centroids[assignment]
+    codes = np.stack([_nearest(part, codebook) for part, codebook in
+                      zip(np.split(residuals, self.subquantizers, axis=1), self.codebooks)],
+                     axis=1).astype(np.uint8)
+    ids = np.arange(first_id, first_id + len(vectors))
+    for list_id in np.unique(assignment):
+      members = assignment == list_id
+      self.lists[list_id] = np.concatenate([self.lists[list_id], ids[members]])
+      self.codes[list_id] = np.concatenate([self.codes[list_id], codes[members]])
+    return
+
+  def candidates(self, query, count, nprobe):
+    coarse = ((self.centroids - query) ** 2).sum(axis=1)
+    probes = np.argsort(coarse)[:nprobe]
+    ids = []
+    distances = []
+    for list_id in probes:
+      if not len(self.lists[list_id]):
+        continue
+      residual = np.split(query - self.centroids[list_id], self.subquantizers)
+      tables = np.stack([((codebook - part) ** 2).sum(axis=1)
+                         for part, codebook in zip(residual, self.codebooks)])
+      codes = self.codes[list_id]
+      distances.append(tables[np.arange(self.subquantizers), codes].sum(axis=1))
+      ids.append(self.lists[list_id])
+    if not ids:
+      return np.empty(0, np.int64)
+    ids = np.concatenate(ids)
+    distances = np.concatenate(distances)
+    if len(ids) > count:
+      ids = ids[np.argpartition(distances, count - 1)[:count]]
+    return ids
+
+def _nearest(vectors, centroids):
+  distances = (centroids ** 2).sum(axis=1) - 2 * vectors @ centroids.T
+  return np.argmin(distances, axis=1)
+
+def _kmeans(vectors, k, rng, iterations=KMEANS_ITERATIONS):
+  k = min(k, len(vectors))
+  centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+  for _ in range(iterations):
+    assignment = _nearest(vectors, centroids)
+    sums = np.zeros_like(centroids)
+    np.add.at(sums, assignment, vectors)
+    counts = np.bincount(assignment, minlength=k)
+    filled = counts > 0
+    centroids[filled] = sums[filled] / counts[filled, None]
+  return centroids
@@ -0,0 +1,218 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import collections
+import threading
+import time
+
+from scene_common import log
+
+DEFAULT_QUERY_INTERVAL = 0.05
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_FLUSH_SIZE = 512
+DEFAULT_MAX_PENDING_QUERIES = 64
+DEFAULT_MAX_PENDING_VECTORS = 8192
+DEFAULT_MAX_QUERY_TIME = 4
+DEFAULT_LATENCY_WINDOW = 30
+DEFAULT_RECONNECT_INTERVAL = 5.0
+
+class ReIDBatcher:
+  """
+  Batches the traffic to a re-ID database. Similarity queries submitted by all tracks
+  are gathered and sent as one request every query_interval seconds, and new entries
+  are buffered and written in bulk once flush_size vectors are pending or
+  flush_interval seconds have passed.
+
+  Both buffers are bounded. Queries are refused while too many are pending or while
+  the recent query latency is above max_query_time, callers retry on a later frame.
+  When the entry buffer is full the oldest entries are dropped.
+
+  Database errors are logged and do not stop the thread. Failed queries get None as
+  their scores and failed entries are dropped. While the database cannot be
+  connected, queries are answered with None and entries stay buffered, the
+  connection is retried every reconnect_interval seconds.
+  """
+
+  def __init__(self, database, query_interval=DEFAULT_QUERY_INTERVAL,
+               flush_interval=DEFAULT_FLUSH_INTERVAL, flush_size=DEFAULT_FLUSH_SIZE,
+               max_pending_queries=DEFAULT_MAX_PENDING_QUERIES,
+               max_pending_vectors=DEFAULT_MAX_PENDING_VECTORS,
+               max_query_time=DEFAULT_MAX_QUERY_TIME,
+               reconnect_interval=DEFAULT_RECONNECT_INTERVAL):
+    self.database = database
+    self.query_interval = query_interval
+    self.flush_interval = flush_interval
+    self.flush_size = flush_size
+    self.max_pending_queries = max_pending_queries
+    self.max_pending_vectors = max_pending_vectors
+    self.max_query_time = max_query_time
+    self.reconnect_interval = reconnect_interval
+
+    self.pending_queries = []
+    self.pending_entries = collections.deque()
+    self.pending_vectors = 0
+    self.dropped_vectors = 0
+    self.query_times = collections.deque()
+    self.last_flush = time.monotonic()
+    self.connected = False
+    self.next_connect = 0
+    self.condition = threading.Condition()
+    self.running = False
+    self.thread = None
+    return
+
+  def start(self, connect=True):
+    """
+    Starts the background thread. The database is connected from that thread so a slow
+    connection does not hold up the caller.
+
+    @param   connect  Connect the database before processing requests
+    @return  None
+    """
+    self.running = True
+    self.thread = threading.Thread(target=self._run, args=(connect,), daemon=True)
+    self.thread.start()
+    return
+
+  def stop(self):
+    """
+    Stops the background thread after sending the pending queries and entries.
+    """
+    with self.condition:
+      self.running = False
+      self.condition.notify()
+    if self.thread is not None:
+      self.thread.join()
+      self.thread = None
+    return
+
+  def submitQuery(self, object_type, reid_vectors, callback):
+    """
+    Queues a similarity query for the next batch.
+
+    @param   object_type   Class of the object (Person, Vehicle, etc.)
+    @param   reid_vectors  Re-ID embeddings to find similarity scores for
+    @param   callback      Called from the batcher thread with the similarity scores
+    @return  bool          Returns False if the query was refused because of backpressure
+    """
+    with self.condition:
+      if len(self.pending_queries) >= self.max_pending_queries or self.isOverloaded():
+        return False
+      self.pending_queries.append((object_type, list(reid_vectors), callback))
+    return True
+
+  def submitEntry(self, uuid, rvid, object_type, reid_vectors):
+    """
+    Buffers an entry to be added to the database with the next flush.
+
+    @param   uuid          Unique ID for the object
+    @param   rvid          ID of the object from the motion tracker
+    @param   object_type   Class of the object (Person, Vehicle, etc.)
+    @param   reid_vectors  Re-ID embeddings to add
+    @return  None
+    """
+    with self.condition:
+      self.pending_entries.append((uuid, rvid, object_type, reid_vectors))
+      self.pending_vectors += len(reid_vectors)
+      while self.pending_vectors > self.max_pending_vectors and len(self.pending_entries) > 1:
+        dropped = self.pending_entries.popleft()
+        self.pending_vectors -= len(dropped[3])
+        self.dropped_vectors += len(dropped[3])
+        log.warn(f"Re-ID write buffer full, dropped {len(dropped[3])} vectors of {dropped[0]}")
+      if self.pending_vectors >= self.flush_size:
+        self.condition.notify()
+    return
+
+  def isOverloaded(self):
+    """
+    Checks the average latency of the queries sent in the last latency window.
+
+    @return  bool  Returns True if the average is above max_query_time
+    """
+    now = time.monotonic()
+    while self.query_times and now - self.query_times[0][0] > DEFAULT_LATENCY_WINDOW:
+      self.query_times.popleft()
+    if not self.query_times:
+      return False
+    average = sum(duration for _, duration in self.query_times) / len(self.query_times)
+    return average > self.max_query_time
+
+  @property
+  def backlog(self):
+    """Number of queries and entries waiting to be sent to the database"""
+    return len(self.pending_queries) + len(self.pending_entries)
+
+  def _run(self, connect):
+    self.connected = not connect
+    running = True
+    while running:
+      if not self.connected:
+        self._connect()
+      with self.condition:
+        if self.running:
+          self.condition.wait(self.query_interval)
+        running = self.running
+        queries = self.pending_queries
+        self.pending_queries = []
+        entries = []
+        if self.connected and (not running or self.pending_vectors >= self.flush_size
+                               or time.monotonic() - self.last_flush >= self.flush_interval):
+          entries = list(self.pending_entries)
+          self.pending_entries.clear()
+          self.pending_vectors = 0
+          self.last_flush = time.monotonic()
+
+      if queries:
+        self._sendQueries(queries)
+      if entries:
+        self._addEntries(entries)
+    return
+
+  def _connect(self):
+    now = time.monotonic()
+    if now < self.next_connect:
+      return
+    try:
+      self.database.connect()
+      self.connected = True
+    except Exception as e:
+      log.warn(f"Failed to connect the re-id database, retrying in {self.reconnect_interval} s: {e}")
+      self.next_connect = now + self.reconnect_interval
+    return
+
+  def _addEntries(self, entries):
+    log.debug(f"Adding {len(entries)} entries to the re-id database")
+    try:
+      self.database.addEntries(entries)
+    except Exception as e:
+      dropped = sum(len(entry[3]) for entry in entries)
+      with self.condition:
+        self.dropped_vectors += dropped
+      log.warn(f"Failed to add {len(entries)} entries to the re-id database,"
+               f" dropped {dropped} vectors: {e}")
+    return
+
+  def _sendQueries(self, queries):
+    log.debug(f"Sending {len(queries)} similarity queries")
+    start = time.monotonic()
+    if not self.connected:
+      results = [None] * len(queries)
+    else:
+      try:
+        results = self.database.findSimilarityScoresBatch(
+          [(object_type, reid_vectors) for object_type, reid_vectors, _ in queries])
+      except Exception as e:
+        log.warn(f"Similarity query failed: {e}")
+        results = [None] * len(queries)
+    end = time.monotonic()
+    with self.condition:
+      self.query_times.append((end, end - start))
+      if self.isOverloaded():
+        log.warn("Re-id queries are slow, holding back new queries")
+
+    for (_, _, callback), scores in zip(queries, results):
+      try:
+        callback(scores)
+      except Exception as e:
+        log.warn(f"Re-id query callback failed: {e}")
+    return
@@ -4,22 +4,26 @@
 import itertools
 from typing import Optional
 
-import cv2
 import numpy as np
 
 from scene_common import log
 from scene_common.camera import Camera
-from scene_common.earth_lla import convertLLAToECEF, calculateTRSLocal2LLAFromSurfacePoints
+from scene_common.earth_lla import convertLLAToECEFArray, calculateTRSLocal2LLAFromSurfacePoints
 from scene_common.geometry import Line, Point, Region, Tripwire
 from scene_common.scene_model import SceneModel
 from scene_common.timestamp import get_epoch_time, get_iso_time
-from scene_common.transform import CameraPose
+from scene_common.transform import CameraPose, transformPoints
 from scene_common.mesh_util import getMeshAxisAlignedProjectionToXY, createRegionMesh, createObjectMesh
+from scene_common.lazy_import import lazyImport
 
 from controller.ilabs_tracking import IntelLabsTracking
+from controller.observability import metrics
 from controller.tracking import (MAX_UNRELIABLE_TIME,
                                  NON_MEASUREMENT_TIME_DYNAMIC,
                                  NON_MEASUREMENT_TIME_STATIC)
+from controller.uuid_manager import DEFAULT_DATABASE
+
+cv2 = lazyImport("cv2")
 
 DEBOUNCE_DELAY = 0.5
 
@@ -38,7 +42,8 @@ class Scene(SceneModel):
   def __init__(self, name, map_file, scale=None,
                max_unreliable_time = MAX_UNRELIABLE_TIME,
                non_measurement_time_dynamic = NON_MEASUREMENT_TIME_DYNAMIC,
-               non_measurement_time_static = NON_MEASUREMENT_TIME_STATIC):
+               non_measurement_time_static = NON_MEASUREMENT_TIME_STATIC,
+               reid_database = DEFAULT_DATABASE):
     log.info("NEW SCENE", name, map_file, scale, max_unreliable_time,
              non_measurement_time_dynamic, non_measurement_time_static)
     super().__init__(name, map_file, scale)
@@ -46,8 +51,10 @@ class Scene(SceneModel):
     self.max_unreliable_time = max_unreliable_time
     self.non_measurement_time_dynamic = non_measurement_time_dynamic
     self.non_measurement_time_static = non_measurement_time_static
+    self.reid_database = reid_database
     self.tracker = None
     self.trackerType = None
+    self.synchronous_tracking = False
     self.persist_attributes = {}
     self._setTracker(self.DEFAULT_TRACKER)
     self._trs_xyz_to_lla = None
@@ -65,7 +72,19 @@ class Scene(SceneModel):
     self.trackerType = trackerType
     self.tracker = self.available_trackers[self.trackerType](self.max_unreliable_time,
                                            self.non_measurement_time_dynamic,
-                                           self.non_measurement_time_static)
+                                           self.non_measurement_time_static,
+                                           self.reid_database)
+    self.tracker.synchronous = self.synchronous_tracking
+    return
+
+  def setSynchronousTracking(self, enabled):
+    """! Makes processing wait until the tracker has handled each frame, so
+    that no frame is skipped while the tracker is busy and events are
+    computed from the objects of the frame just processed.
+    @param   enabled  True for synchronous tracking.
+    """
+    self.synchronous_tracking = enabled
+    self.tracker.synchronous = enabled
     return
 
   def updateScene(self, scene_data):
@@ -110,12 +129,15 @@ class Scene(SceneModel):
 
   def _createMovingObjectsForDetection(self, detectionType, detections, when, camera):
     objects = []
-    scene_map_triangle_mesh = self.map_triangle_mesh
+    scene_map_triangle_mesh = None
     scene_map_translation = self.mesh_translation
     scene_map_rotation = self.mesh_rotation
 
     for info in detections:
       mobj = self.tracker.createObject(detectionType, info, when, camera, self.persist_attributes.get(detectionType, {}))
+      # The map mesh is loaded on first use, only objects projected to the map need it
+      if mobj.project_to_map and scene_map_triangle_mesh is None:
+        scene_map_triangle_mesh = self.map_triangle_mesh
       mobj.map_triangle_mesh = scene_map_triangle_mesh
       mobj.map_translation = scene_map_translation
       mobj.map_rotation = scene_map_rotation
@@ -153,35 +175,50 @@ class Scene(SceneModel):
       log.info("DISCARDING: camera has no pose")
       return True
     for detection_type, detections in jdata['objects'].items():
-      if "intrinsics" not in jdata:
-        for parent_obj in detections:
-          self._convertPixelBoundingBoxToMeters(parent_obj, camera)
-          for key in parent_obj.get('sub_detections', []):
-            for obj in parent_obj[key]:
-              self._convertPixelBoundingBoxToMeters(obj, camera)
-      objects = self._createMovingObjectsForDetection(detection_type, detections, when, camera)
+      with metrics.time_stage(metrics.STAGE_PROJECTION, self.name, detection_type):
+        if "intrinsics" not in jdata:
+          for parent_obj in detections:
+            self._convertPixelBoundingBoxToMeters(parent_obj, camera)
+            for key in parent_obj.get('sub_detections', []):
+              for obj in parent_obj[key]:
+                self._convertPixelBoundingBoxToMeters(obj, camera)
+        objects = self._createMovingObjectsForDetection(detection_type, detections, when, camera)
       self._finishProcessing(detection_type, when, objects)
     return True
 
   def processSceneData(self, jdata, child, cameraPose,
                        detectionType, when=None):
+    """! Tracks the objects published by a child scene. All object
+    translations of the message are moved to this scene with one matrix
+    product.
+    @param   jdata          Scene data message of the child scene.
+    @param   child          The child scene.
+    @param   cameraPose     Pose of the child scene in this scene.
+    @param   detectionType  Category of the objects.
+    @param   when           Timestamp of the message.
+    @return  True
+    """
     new = jdata['objects']
 
     if 'frame_rate' in jdata:
       self.ref_camera_frame_rate = min(jdata['frame_rate'], self.ref_camera_frame_rate) if self.ref_camera_frame_rate is not None else jdata["frame_rate"]
 
+    if any('lat_long_alt' in info and 'translation' in info for info in new):
+      log.warn("Input data must have only one of 'lat_long_alt' and 'translation'")
+      return True
+
+    lla_infos = [info for info in new if 'lat_long_alt' in info]
+    if lla_infos:
+      ecef_pts = convertLLAToECEFArray([info.pop('lat_long_alt') for info in lla_infos])
+      for info, ecef_pt in zip(lla_infos, ecef_pts):
+        info['translation'] = ecef_pt
+
+    translations = transformPoints(cameraPose.pose_mat, [info['translation'] for info in new])
+
     objects = []
     child_objects = []
-    for info in new:
-      if 'lat_long_alt' in info:
-        if 'translation' in info:
-          log.warn("Input data must have only one of 'lat_long_alt' and 'translation'")
-          return True
-        info['translation'] = convertLLAToECEF(info.pop('lat_long_alt'))
-      translation = Point(info['translation'])
-      translation = np.hstack([translation.asNumpyCartesian, [1]])
-      translation = np.matmul(cameraPose.pose_mat, translation)
-      info['translation'] = translation[:3]
+    for info, translation in zip(new, translations):
+      info['translation'] = translation
 
       # Remove reid vector from the object info as tracker does not support reid from scene hierarchy
       if 'reid' in info:
@@ -200,13 +237,15 @@ class Scene(SceneModel):
 
   def _finishProcessing(self, detectionType, when, objects, already_tracked_objects=[]):
     self._updateVisible(objects)
-    self.tracker.trackObjects(objects, already_tracked_objects, when, [detectionType],
-                              self.ref_camera_frame_rate,
-                              self.max_unreliable_time,
-                              self.non_measurement_time_dynamic,
-                              self.non_measurement_time_static,
-                              self.use_tracker)
-    self._updateEvents(detectionType, when)
+    with metrics.time_stage(metrics.STAGE_TRACKER_ENQUEUE, self.name, detectionType):
+      self.tracker.trackObjects(objects, already_tracked_objects, when, [detectionType],
+                                self.ref_camera_frame_rate,
+                                self.max_unreliable_time,
+                                self.non_measurement_time_dynamic,
+                                self.non_measurement_time_static,
+                                self.use_tracker, scene_name=self.name)
+    with metrics.time_stage(metrics.STAGE_EVENTS, self.name, detectionType):
+      self._updateEvents(detectionType, when)
     return
 
   def _updateSensorObjects(self, name, sensor, objects=None):
@@ -385,7 +424,7 @@ class Scene(SceneModel):
   def deserialize(cls, data):
     tracker_config = data.get('tracker_config', [])
     scene = cls(data['name'], data.get('map', None), data.get('scale', None),
-                *tracker_config)
+                *tracker_config, reid_database=data.get('reid_database', DEFAULT_DATABASE))
     scene.uid = data['uid']
     scene.mesh_translation = data.get('mesh_translation', None)
     scene.mesh_rotation = data.get('mesh_rotation', None)
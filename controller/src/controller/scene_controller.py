@@ -8,18 +8,21 @@ from collections import defaultdict
 import ntplib
 
 from controller.cache_manager import CacheManager
-from controller.child_scene_controller import ChildSceneController
-from controller.detections_builder import (buildDetectionsDict,
+from controller.child_scene_controller import ChildConnectionManager
+from controller.detections_builder import (REID_ENCODING_LIST,
+                                           buildDetectionsDict,
                                            buildDetectionsList,
                                            computeCameraBounds)
 from controller.scene import Scene
-from scene_common import log
+from controller.uuid_manager import DEFAULT_DATABASE
+from scene_common import latency_trace, log
 from scene_common.geometry import Point, Region, Tripwire
 from scene_common.mqtt import PubSub
 from scene_common.schema import SchemaValidation
 from scene_common.timestamp import adjust_time, get_epoch_time, get_iso_time
-from scene_common.transform import applyChildTransform
-from controller.observability import metrics
+from scene_common.transform import applyChildTransform, transformPoints
+from controller.observability import metrics, tracing
+from controller.observability.profiler import Profiler
 
 AVG_FRAMES = 100
 
@@ -27,7 +30,9 @@ class SceneController:
 
   def __init__(self, rewrite_bad_time, rewrite_all_time, max_lag, mqtt_broker,
                mqtt_auth, rest_url, rest_auth, client_cert, root_cert, ntp_server,
-               tracker_config_file, schema_file, visibility_topic, data_source):
+               tracker_config_file, schema_file, visibility_topic, data_source,
+               reid_encoding=REID_ENCODING_LIST, pubsub=None, synchronous_tracking=False,
+               reid_database=DEFAULT_DATABASE):
     self.cert = client_cert
     self.root_cert = root_cert
     self.rewrite_bad_time = rewrite_bad_time
@@ -48,16 +53,57 @@ class SceneController:
 
     self.schema_val = SchemaValidation(schema_file)
 
-    self.pubsub = PubSub(mqtt_auth, client_cert, root_cert, mqtt_broker, keepalive=60)
+    # A LocalPubSub runs the controller without a broker
+    self.pubsub = pubsub
+    if self.pubsub is None:
+      self.pubsub = PubSub(mqtt_auth, client_cert, root_cert, mqtt_broker, keepalive=60)
     self.pubsub.onConnect = self.onConnect
+    self.profiler = Profiler(self.pubsub)
     self.pubsub.connect()
 
-    self.cache_manager = CacheManager(data_source, rest_url, rest_auth, root_cert, self.tracker_config_data)
+    self.cache_manager = CacheManager(data_source, rest_url, rest_auth, root_cert,
+                                      self.tracker_config_data, synchronous_tracking,
+                                      reid_database)
+    self.child_connections = ChildConnectionManager(root_cert, self)
 
     self.visibility_topic = visibility_topic
     log.info(f"Publishing camera visibility info on {self.visibility_topic} topic.")
+    self.reid_encoding = reid_encoding
+
+    # Only read when metrics are collected
+    metrics.add_gauge_source(metrics.METRIC_TRACKER_QUEUE_DEPTH, self.trackerQueueDepths)
+    metrics.add_gauge_source(metrics.METRIC_ACTIVE_TRACKS, self.activeTracks)
+    metrics.add_gauge_source(metrics.METRIC_REID_BACKLOG, self.reidBacklog)
+    metrics.add_gauge_source(metrics.METRIC_PUBLISH_QUEUE_DEPTH, self.publishQueueDepth)
+    return
+
+  def categoryTrackers(self):
+    scenes = self.cache_manager.cached_scenes_by_uid or {}
+    for scene in list(scenes.values()):
+      if scene.tracker is None:
+        continue
+      for category, tracker in list(scene.tracker.trackers.items()):
+        yield scene, category, tracker
     return
 
+  def trackerQueueDepths(self):
+    return [(tracker.queue.qsize(), {"scene": scene.name, "category": category})
+            for scene, category, tracker in self.categoryTrackers()]
+
+  def activeTracks(self):
+    return [(len(tracker.curObjects), {"scene": scene.name, "category": category})
+            for scene, category, tracker in self.categoryTrackers()]
+
+  def reidBacklog(self):
+    return [(tracker.uuid_manager.batcher.backlog, {"scene": scene.name, "category": category})
+            for scene, category, tracker in self.categoryTrackers()]
+
+  def publishQueueDepth(self):
+    depth = self.pubsub.queueDepth()
+    if depth is None:
+      return []
+    return [(depth, {})]
+
   def extractTrackerConfigData(self, tracker_config_file):
     if not os.path.exists(tracker_config_file) and not os.path.isabs(tracker_config_file):
       script = os.path.realpath(__file__)
@@ -99,18 +145,27 @@ class SceneController:
     return last is None or now - last >= max_delay
 
   def publishSceneDetections(self, scene, objects, otype, jdata):
-    jdata['objects'] = buildDetectionsList(objects, scene, self.visibility_topic == 'unregulated')
+    serialize_start = metrics.stage_start()
+    jdata['objects'] = buildDetectionsList(objects, scene, self.visibility_topic == 'unregulated',
+                                           self.reid_encoding)
     olen = len(jdata['objects'])
     cid = scene.name + "/" + otype
     if olen > 0 or cid not in scene.lastPubCount or scene.lastPubCount[cid] > 0:
       if 'debug_hmo_start_time' in jdata:
         jdata['debug_hmo_processing_time'] = get_epoch_time() - jdata['debug_hmo_start_time']
+      latency_trace.stampStage(jdata, latency_trace.STAGE_PUBLISH,
+                               get_epoch_time() + self.time_offset)
+      tracing.record_latency_trace(latency_trace.readTrace(jdata),
+                                   {"camera": jdata.get(latency_trace.TRACE_CAMERA_KEY, "unknown"),
+                                    "scene": scene.name, "category": otype})
       # Convert numpy types to native Python types for JSON serialization
       jstr = orjson.dumps(jdata, option=orjson.OPT_SERIALIZE_NUMPY)
+      metrics.record_stage(metrics.STAGE_SERIALIZE, serialize_start, scene.name, otype)
       new_topic = PubSub.formatTopic(PubSub.DATA_SCENE, scene_id=scene.uid,
                                      thing_type=otype)
-      self.pubsub.publish(new_topic, jstr)
-      self.publishExternalDetections(scene, otype, jstr)
+      with metrics.time_stage(metrics.STAGE_PUBLISH, scene.name, otype):
+        self.pubsub.publish(new_topic, jstr)
+        self.publishExternalDetections(scene, otype, jstr)
       scene.lastPubCount[cid] = olen
     return
 
@@ -178,7 +233,7 @@ class SceneController:
       for obj in objects:
         if rname in obj.chain_data.regions:
           robjects.append(obj)
-      jdata['objects'] = buildDetectionsList(robjects, scene)
+      jdata['objects'] = buildDetectionsList(robjects, scene, reid_encoding=self.reid_encoding)
       olen = len(jdata['objects'])
       rid = scene.name + "/" + rname + "/" + otype
       if olen > 0 or rid not in scene.lastPubCount or scene.lastPubCount[rid] > 0:
@@ -238,7 +293,7 @@ class SceneController:
       num_objects += counts[otype]
       all_objects += objects
     event_data['counts'] = counts
-    detections_dict = buildDetectionsDict(all_objects, scene)
+    detections_dict = buildDetectionsDict(all_objects, scene, self.reid_encoding)
     event_data['objects'] = list(detections_dict.values())
     return detections_dict, num_objects
 
@@ -259,7 +314,7 @@ class SceneController:
       for exited_obj, dwell in exited_list:
         exited_dict[exited_obj.gid] = dwell
         exited_objs.extend([exited_obj])
-      exited_objs = buildDetectionsList(exited_objs, scene)
+      exited_objs = buildDetectionsList(exited_objs, scene, reid_encoding=self.reid_encoding)
       exited_data = [{'object': exited_obj, 'dwell': exited_dict[exited_obj['id']]} for exited_obj in exited_objs]
       event_data['exited'].extend(exited_data)
     return
@@ -308,7 +363,7 @@ class SceneController:
 
     if not scene.processSensorData(jdata, when=ts):
       log.error("Sensor fail", sensor_id)
-      self.cache_manager.invalidate()
+      self.cache_manager.invalidateScene(scene.uid)
       return
 
     jdata['scene_id'] = scene.uid
@@ -319,8 +374,9 @@ class SceneController:
 
   def handleMovingObjectMessage(self, client, userdata, message):
     topic = PubSub.parseTopic(message.topic)
-    jdata = orjson.loads(message.payload.decode('utf-8'))
-
+    decode_timer = metrics.time_stage_deferred(metrics.STAGE_DECODE)
+    with decode_timer:
+      jdata = orjson.loads(message.payload.decode('utf-8'))
 
     metric_attributes = {
         "topic": message.topic,
@@ -328,8 +384,12 @@ class SceneController:
     }
     metrics.inc_messages(metric_attributes)
     with metrics.time_mqtt_handler(metric_attributes):
-      if 'camera_id' in topic and not self.schema_val.validateMessage("detector", jdata):
-        return
+      validate_timer = metrics.time_stage_deferred(metrics.STAGE_VALIDATE)
+      if 'camera_id' in topic:
+        with validate_timer:
+          valid = self.schema_val.validateMessage("detector", jdata)
+        if not valid:
+          return
 
       now = get_epoch_time()
       self.time_offset, self.last_time_sync = adjust_time(now, self.ntp_server, self.ntp_client,
@@ -340,7 +400,10 @@ class SceneController:
         return
 
       jdata['debug_hmo_start_time'] = now
-      self.cache_manager.refreshScenesForCamParams(jdata)
+      latency_trace.stampStage(jdata, latency_trace.STAGE_CONTROLLER_RECEIVE, now)
+      refresh_timer = metrics.time_stage_deferred(metrics.STAGE_CAMERA_REFRESH)
+      with refresh_timer:
+        self.cache_manager.refreshScenesForCamParams(jdata)
 
       if self.rewrite_all_time:
         msg_when = now
@@ -365,25 +428,35 @@ class SceneController:
       else:
         detection_types = jdata['objects'].keys()
         camera_id = sender_id = topic['camera_id']
+        jdata[latency_trace.TRACE_CAMERA_KEY] = camera_id
         sender = self.cache_manager.sceneWithCameraID(sender_id)
         if sender is None:
           log.error("UNKNOWN SENDER", sender_id)
           return
         scene = sender
-        success = scene.processCameraData(jdata, when=msg_when)
+        with self.profiler.scene_scope(scene):
+          success = scene.processCameraData(jdata, when=msg_when)
+
+      # Recorded once the scene is known, the category if the message has only one
+      category = next(iter(detection_types)) if len(detection_types) == 1 else None
+      for timer in (decode_timer, validate_timer, refresh_timer):
+        timer.record(scene.name, category)
 
       if not success:
         log.error("Camera fail", sender_id, scene.name)
-        self.cache_manager.invalidate()
+        self.cache_manager.invalidateScene(scene.uid)
         return
+      latency_trace.stampStage(jdata, latency_trace.STAGE_TRACKER_QUEUED,
+                               get_epoch_time() + self.time_offset)
 
       jdata['id'] = scene.uid
       jdata['name'] = scene.name
-      for detection_type in detection_types:
-        jdata['unique_detection_count'] = scene.tracker.getUniqueIDCount(detection_type)
-        self.publishDetections(scene, scene.tracker.currentObjects(detection_type),
-                              msg_when, detection_type, jdata, camera_id)
-        self.publishEvents(scene, jdata['timestamp'])
+      with self.profiler.scene_scope(scene):
+        for detection_type in detection_types:
+          jdata['unique_detection_count'] = scene.tracker.getUniqueIDCount(detection_type)
+          self.publishDetections(scene, scene.tracker.currentObjects(detection_type),
+                                msg_when, detection_type, jdata, camera_id)
+          self.publishEvents(scene, jdata['timestamp'])
       return
 
   def _handleChildSceneObject(self, sender_id, jdata, detection_type, msg_when):
@@ -401,8 +474,9 @@ class SceneController:
       return False, sender
 
     scene = self.cache_manager.sceneWithID(sender.parent)
-    success = scene.processSceneData(jdata, sender, sender.cameraPose,
-                                     detection_type, when=msg_when)
+    with self.profiler.scene_scope(scene):
+      success = scene.processSceneData(jdata, sender, sender.cameraPose,
+                                       detection_type, when=msg_when)
     return success, scene
 
   def updateCameras(self):
@@ -424,10 +498,16 @@ class SceneController:
     return
 
   def handleDatabaseMessage(self, client, userdata, message):
-    command = str(message.payload.decode("utf-8"))
+    command, *scene_ids = str(message.payload.decode("utf-8")).split()
     if command == "update":
       try:
-        self.updateSubscriptions()
+        if scene_ids:
+          # Only these scenes changed, keep the rest of the cached scenes
+          for scene_id in scene_ids:
+            self.cache_manager.refreshScene(scene_id)
+          self.updateSubscriptions(refresh=False)
+        else:
+          self.updateSubscriptions()
         self.updateObjectClasses()
         self.updateCameras()
         self.updateRegulateCache()
@@ -460,6 +540,9 @@ class SceneController:
     topic = PubSub.formatTopic(PubSub.CMD_DATABASE)
     self.pubsub.addCallback(topic, self.handleDatabaseMessage)
     log.info("Subscribed to", topic)
+    topic = PubSub.formatTopic(PubSub.CMD_PROFILE)
+    self.pubsub.addCallback(topic, self.profiler.handle_command)
+    log.info("Subscribed to", topic)
     # FIXME - update subscriptions when scenes/sensors/children added/deleted/renamed
     return
 
@@ -520,28 +603,35 @@ class SceneController:
     return
 
   def transformObjectsinEvent(self, event, sender):
-    keys = ['objects', 'entered', 'exited']
-    for k in keys:
-      if k == 'exited':
-        for i, obj in enumerate(event[k]):
-          event[k][i]['object']['translation'] = sender.cameraPose.cameraPointToWorldPoint(
-                                                            Point(obj['object']['translation'])).asNumpyCartesian.tolist()
-      else:
-        for i, obj in enumerate(event[k]):
-          event[k][i]['translation'] = sender.cameraPose.cameraPointToWorldPoint(
-                                                            Point(obj['translation'])).asNumpyCartesian.tolist()
+    """! Moves the objects, entered and exited objects of a child scene
+    event to the parent scene. Objects with 3D translations are moved
+    with one matrix product.
+    """
+    objs = event.get('objects', []) + event.get('entered', []) \
+      + [obj['object'] for obj in event.get('exited', [])]
+    objs_3d = [obj for obj in objs if len(obj['translation']) == 3]
+    if objs_3d:
+      translations = transformPoints(sender.cameraPose.pose_mat,
+                                     [obj['translation'] for obj in objs_3d])
+      for obj, translation in zip(objs_3d, translations.tolist()):
+        obj['translation'] = translation
+    for obj in objs:
+      if len(obj['translation']) != 3:
+        obj['translation'] = sender.cameraPose.cameraPointToWorldPoint(
+                                  Point(obj['translation'])).asNumpyCartesian.tolist()
     return
 
-  def updateSubscriptions(self):
+  def updateSubscriptions(self, refresh=True):
     log.debug("UPDATE SUBSCRIPTIONS")
-    self.cache_manager.invalidate()
+    if refresh:
+      self.cache_manager.invalidate()
     if not hasattr(self, 'subscribed'):
       self.subscribed = set()
     need_subscribe = set()
 
     if not hasattr(self, 'subscribed_children'):
       self.subscribed_children = dict()
-    need_subscribe_child = dict()
+    remote_children = []
 
     self.scenes = self.cache_manager.allScenes()
     for scene in self.scenes:
@@ -568,21 +658,17 @@ class SceneController:
                                                    region_id="+"),
                                 self.republishEvents))
           else:
-            child_obj = ChildSceneController(self.root_cert, info, self)
             self.cache_manager.cached_child_transforms_by_uid[info['remote_child_id']] = Scene.deserialize(info)
-            need_subscribe_child[info['remote_child_id']] = child_obj
-            need_subscribe.add((PubSub.formatTopic(PubSub.SYS_CHILDSCENE_STATUS, scene_id=info['remote_child_id']), child_obj.publishStatus))
-
-    # disconnect old children clients
-    for old_child, cobj in self.subscribed_children.items():
+            remote_children.append(info)
+
+    # only connects and disconnects the remote children that changed
+    need_subscribe_child = self.child_connections.update(remote_children)
+    for child_id, cobj in need_subscribe_child.items():
+      need_subscribe.add((PubSub.formatTopic(PubSub.SYS_CHILDSCENE_STATUS, scene_id=child_id),
+                          cobj.publishStatus))
+    for old_child in self.subscribed_children:
       if old_child not in need_subscribe_child:
         self.cache_manager.cached_child_transforms_by_uid.pop(old_child, 'None')
-      cobj.loopStop()
-
-    # connect to all children
-    for new_child, cobj in need_subscribe_child.items():
-      log.info(f"Connecting to remote child {new_child}")
-      cobj.loopStart()
 
     self.subscribed_children = need_subscribe_child
 
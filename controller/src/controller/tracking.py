@@ -6,8 +6,9 @@ from threading import Thread
 
 from controller.moving_object import (DEFAULT_EDGE_LENGTH,
                                       DEFAULT_TRACKING_RADIUS, ATagObject,
-                                      MovingObject)
-from controller.uuid_manager import UUIDManager
+                                      MovingObject, object_pool)
+from controller.object_snapshot import EMPTY_SNAPSHOT, ObjectSnapshot
+from controller.uuid_manager import DEFAULT_DATABASE, UUIDManager
 from scene_common import log
 from scene_common.options import TYPE_1
 import uuid
@@ -23,13 +24,17 @@ NON_MEASUREMENT_TIME_DYNAMIC = 0.2666
 NON_MEASUREMENT_TIME_STATIC = 0.5333
 
 class Tracking(Thread):
-  def __init__(self):
+  def __init__(self, reid_database=DEFAULT_DATABASE):
     super().__init__()
     self.trackers = {}
-    self.all_tracker_objects = self.curObjects = []
+    self.all_tracker_objects = []
+    self.curObjects = EMPTY_SNAPSHOT
     self.already_tracked_objects = []
     self.queue = Queue()
-    self.uuid_manager = UUIDManager()
+    self.reid_database = reid_database
+    self.uuid_manager = UUIDManager(reid_database)
+    # Wait for every frame to be tracked instead of skipping frames while busy
+    self.synchronous = False
     return
 
   def getUniqueIDCount(self, category):
@@ -44,7 +49,7 @@ class Tracking(Thread):
                    max_unreliable_time, \
                    non_measurement_time_dynamic, \
                    non_measurement_time_static, \
-                   use_tracker=True):
+                   use_tracker=True, scene_name=None):
 
     self._createTrackers(categories, max_unreliable_time, non_measurement_time_dynamic, non_measurement_time_static)
 
@@ -57,8 +62,8 @@ class Tracking(Thread):
         for obj in new_objects:
           obj.oid = str(uuid.uuid4())
           obj.setGID(obj.oid)
-        # No threading when tracker is not used. Thus creating a copy is not required.
-        self.trackers[category].all_tracker_objects = self.trackers[category].curObjects = new_objects
+        self.trackers[category].all_tracker_objects = new_objects
+        self.trackers[category].curObjects = ObjectSnapshot(new_objects)
       else:
         queue = self.trackers[category].queue
         if not queue.empty():
@@ -70,7 +75,10 @@ class Tracking(Thread):
           }
           metrics.inc_dropped(metrics_attributes)
           continue
-        queue.put((new_objects, when, already_tracked_objects))
+        queue.put((new_objects, when, already_tracked_objects,
+                   metrics.stage_start(), scene_name))
+        if self.synchronous:
+          self.trackers[category].waitForComplete()
     return
 
   def _updateRefCameraFrameRate(self, ref_camera_frame_rate, category):
@@ -84,7 +92,8 @@ class Tracking(Thread):
     """Create a tracker object for each category"""
     for category in categories:
       if category not in self.trackers:
-        tracker = self.__class__(max_unreliable_time, non_measurement_time_dynamic, non_measurement_time_static)
+        tracker = self.__class__(max_unreliable_time, non_measurement_time_dynamic, non_measurement_time_static,
+                                 self.reid_database)
         self.trackers[category] = tracker
         tracker.start()
     return
@@ -132,21 +141,34 @@ class Tracking(Thread):
       cur_objects = self.groupObjects(cur_objects)
     return cur_objects
 
+  def currentSnapshot(self, category):
+    """! Returns the columnar snapshot of the current objects of a category.
+    @param   category   Object category.
+    @return  ObjectSnapshot, empty if there is no tracker for the category.
+    """
+    tracker = self.trackers.get(category, None)
+    if tracker is None:
+      return EMPTY_SNAPSHOT
+    return tracker.curObjects
+
   def run(self):
     self.uuid_manager.connectDatabase()
     while True:
-      objects, when, already_tracked_objects = self.queue.get()
+      objects, when, already_tracked_objects, queued, scene_name = self.queue.get()
       if objects is None:
+        self.uuid_manager.disconnectDatabase()
         self.queue.task_done()
         break
       metrics_attributes = {
         "category": objects[0].category if len(objects) > 0 else "unknown",
       }
+      metrics.record_stage(metrics.STAGE_TRACKER_WAIT, queued, scene_name,
+                           metrics_attributes["category"])
       with metrics.time_tracking(metrics_attributes):
         self.trackCategory(objects, when, already_tracked_objects)
         # curObjects are the results while all_tracker_objects
         # is used as a working collection inside the thread
-        self.curObjects = (self.all_tracker_objects).copy()
+        self.curObjects = ObjectSnapshot(self.all_tracker_objects)
         self.queue.task_done()
     return
 
@@ -158,7 +180,7 @@ class Tracking(Thread):
   def join(self):
     for category in self.trackers:
       tracker = self.trackers[category]
-      tracker.queue.put((None, None, None))
+      tracker.queue.put((None, None, None, None, None))
       tracker.waitForComplete()
       tracker.join()
     return
@@ -174,7 +196,7 @@ class Tracking(Thread):
 
     if sensorType in object_classes:
       oclass = object_classes[sensorType]
-      mobj = oclass['class'](info, when, sensor)
+      mobj = object_pool.acquire(oclass['class'], info, when, sensor)
       if 'model_3d' in oclass:
         mobj.asset_scale = oclass['scale']
       mobj.size = [oclass.get('x_size', DEFAULT_EDGE_LENGTH),
@@ -189,7 +211,7 @@ class Tracking(Thread):
       rotation_from_velocity = oclass.get('rotation_from_velocity', rotation_from_velocity)
       mobj.setPersistentAttributes(info, persist_attributes)
     else:
-      mobj = MovingObject(info, when, sensor)
+      mobj = object_pool.acquire(MovingObject, info, when, sensor)
 
     mobj.project_to_map = project_to_map
     mobj.rotation_from_velocity = rotation_from_velocity
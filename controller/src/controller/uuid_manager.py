@@ -2,43 +2,82 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import collections
-import concurrent.futures
+import os
 import threading
 
+from controller.reid import (DEFAULT_FEATURE_DTYPE, InProcessDatabase,
+                            compressEmbedding, medoidEmbeddings,
+                            weightedMeanEmbedding)
+from controller.reid_batcher import ReIDBatcher
 from controller.vdms_adapter import VDMSDatabase
 from scene_common import log
-from scene_common.timestamp import get_epoch_time
 
-DEFAULT_DATABASE = "VDMS"
+DEFAULT_DATABASE = os.getenv("REID_DATABASE", "VDMS")
 DEFAULT_SIMILARITY_THRESHOLD = 60
 DEFAULT_MINIMUM_BBOX_AREA = 5000
 DEFAULT_MINIMUM_FEATURE_COUNT = 12
 DEFAULT_FEATURE_SLICE_SIZE = 10
-DEFAULT_MAX_QUERY_TIME = 4
-DEFAULT_MAX_SIMILARITY_QUERIES_TRACKED = 10
+DEFAULT_MAXIMUM_FEATURE_COUNT = 120
+DEFAULT_QUERY_AGGREGATION = os.getenv("REID_QUERY_AGGREGATION", "all")
+DEFAULT_QUERY_MEDOIDS = 3
+
+QUERY_AGGREGATION_ALL = "all"
+QUERY_AGGREGATION_MEAN = "mean"
+QUERY_AGGREGATION_MEDOIDS = "medoids"
 
 available_databases = {
   "VDMS": VDMSDatabase,
+  "IN_PROCESS": InProcessDatabase,
 }
+# Backends whose store lives in the controller process. One instance is shared by the
+# trackers of all scenes, so entries match across them and there is a single snapshot.
+shared_databases = {"IN_PROCESS"}
+_shared_instances = {}
+_shared_instances_lock = threading.Lock()
+
+def createDatabase(database):
+  """
+  Creates the re-id database client of a tracker, or returns the instance shared by
+  the process for backends in shared_databases.
+
+  @param   database  Name of the backend in available_databases
+  @return  ReIDDatabase
+  """
+  if database not in shared_databases:
+    return available_databases[database]()
+  with _shared_instances_lock:
+    if database not in _shared_instances:
+      _shared_instances[database] = available_databases[database]()
+    return _shared_instances[database]
 
 class UUIDManager:
-  def __init__(self, database=DEFAULT_DATABASE):
+  def __init__(self, database=DEFAULT_DATABASE, feature_dtype=DEFAULT_FEATURE_DTYPE,
+               query_aggregation=DEFAULT_QUERY_AGGREGATION,
+               query_medoids=DEFAULT_QUERY_MEDOIDS):
     self.active_ids = {}
+    # Reverse index of active_ids, database ID -> tracker ID
+    self.database_ids = {}
     self.active_ids_lock = threading.Lock()
     self.active_query = {}
     self.features_for_database = {}
     self.quality_features = {}
+    self.quality_weights = {}
     self.unique_id_count = 0
-    self.reid_database = available_databases[database]()
-    self.pool = concurrent.futures.ThreadPoolExecutor()
-    self.similarity_query_times = collections.deque(
-      maxlen=DEFAULT_MAX_SIMILARITY_QUERIES_TRACKED)
-    self.similarity_query_times_lock = threading.Lock()
-    self.reid_enabled = True
+    self.reid_database = createDatabase(database)
+    self.batcher = ReIDBatcher(self.reid_database)
+    # Features are kept per track until it leaves the scene, store them compactly
+    self.feature_dtype = feature_dtype
+    # How the quality features of a track are combined into the vectors of its query
+    self.query_aggregation = query_aggregation
+    self.query_medoids = query_medoids
     return
 
   def connectDatabase(self):
-    self.pool.submit(self.reid_database.connect)
+    self.batcher.start()
+
+  def disconnectDatabase(self):
+    # Sends the queries and entries which are still buffered
+    self.batcher.stop()
 
   def pruneInactiveTracks(self, tracked_objects):
     """
@@ -46,20 +85,19 @@ class UUIDManager:
 
     @param  tracked_objects  The objects currently tracked by the tracker
     """
-    active_tracks = [tracked_object.id for tracked_object in tracked_objects]
+    active_tracks = set(tracked_object.id for tracked_object in tracked_objects)
     inactive_tracks = []
-    new_active_ids = {}
     with self.active_ids_lock:
-      for k, v in self.active_ids.items():
-        if k in active_tracks:
-          new_active_ids[k] = v
-        else:
-          inactive_tracks.append((k, v))
-      self.active_ids = new_active_ids
+      for track_id in self.active_ids.keys() - active_tracks:
+        data = self.active_ids.pop(track_id)
+        if data[0] is not None and self.database_ids.get(data[0]) == track_id:
+          del self.database_ids[data[0]]
+        inactive_tracks.append((track_id, data))
 
     for track_id, data in inactive_tracks:
       self.active_query.pop(track_id, None)
       self.quality_features.pop(track_id, None)
+      self.quality_weights.pop(track_id, None)
       # Increment the unique id counter for tracks where no match was found (similiarity=None)
       if data[1] is None:
         self.unique_id_count += 1
@@ -83,8 +121,8 @@ class UUIDManager:
       features['reid_vectors'] = features['reid_vectors'][::slice_size]
       log.debug(
         f"Adding {len(features['reid_vectors'])} features for track {track_id} to database")
-      self.pool.submit(self.reid_database.addEntry, features['gid'], track_id,
-                       features['category'], features['reid_vectors'])
+      self.batcher.submitEntry(features['gid'], track_id, features['category'],
+                               features['reid_vectors'])
 
   def isNewTrackerID(self, sscape_object):
     """
@@ -107,12 +145,23 @@ class UUIDManager:
     @param  sscape_object        The Scenescape object to gather features from
     @param  minimum_bbox_area    The minimum size of the bbox for the detected object (px)
     """
-    if sscape_object.reidVector is not None and self.reid_enabled:
+    if sscape_object.reidVector is not None:
       if sscape_object.boundingBoxPixels.area > minimum_bbox_area:
+        feature = compressEmbedding(sscape_object.reidVector, self.feature_dtype)
+        confidence = sscape_object.confidence
+        weight = sscape_object.boundingBoxPixels.area * (confidence if confidence else 1.0)
         if sscape_object.rv_id in self.quality_features:
-          self.quality_features[sscape_object.rv_id].append(sscape_object.reidVector)
+          features = self.quality_features[sscape_object.rv_id]
+          weights = self.quality_weights[sscape_object.rv_id]
+          features.append(feature)
+          weights.append(weight)
+          # Queries may be held back by the batcher, keep only the most recent features
+          if len(features) > DEFAULT_MAXIMUM_FEATURE_COUNT:
+            del features[0]
+            del weights[0]
         else:
-          self.quality_features[sscape_object.rv_id] = [sscape_object.reidVector]
+          self.quality_features[sscape_object.rv_id] = [feature]
+          self.quality_weights[sscape_object.rv_id] = [weight]
     return
 
   def pickBestID(self, sscape_object):
@@ -133,7 +182,7 @@ class UUIDManager:
       if sscape_object.reidVector is not None:
         if sscape_object.rv_id in self.features_for_database:
           self.features_for_database[sscape_object.rv_id]['reid_vectors'].append(
-            sscape_object.reidVector)
+            compressEmbedding(sscape_object.reidVector, self.feature_dtype))
     # DATABASE ID IS NULL
     else:
       sscape_object.similarity = None
@@ -155,12 +204,42 @@ class UUIDManager:
 
   def querySimilarity(self, sscape_object):
     """
-    Query the database for a match and update the active_ids dictionary. This function is
-    mainly used as a wrapper to run the query in its own thread.
+    Queue a query for a match with the next batch sent to the database. The active_ids
+    dictionary is updated once the results come back.
 
-    @param  sscape_object  The current Scenescape object
+    @param   sscape_object  The current Scenescape object
+    @return  bool           Returns False if the batcher refused the query because of
+                            backpressure; the query should be retried later
+    """
+    reid_vectors = self.queryVectors(sscape_object.rv_id)
+    log.debug(f"Finding similarity scores for track {sscape_object.rv_id}")
+    return self.batcher.submitQuery(
+      sscape_object.category, reid_vectors,
+      lambda similarity_scores: self.updateSimilarity(sscape_object, similarity_scores))
+
+  def queryVectors(self, track_id):
+    """
+    Returns the vectors to query the database with for a track, according to the query
+    aggregation setting: all quality features, their quality-weighted mean, or the
+    k medoids of the quality features.
+
+    @param   track_id      The ID of the track
+    @return  reid_vectors  The vectors to send with the similarity query
+    """
+    reid_vectors = self.quality_features.get(track_id)
+    if self.query_aggregation == QUERY_AGGREGATION_MEAN:
+      return [weightedMeanEmbedding(reid_vectors, self.quality_weights[track_id])]
+    if self.query_aggregation == QUERY_AGGREGATION_MEDOIDS:
+      return medoidEmbeddings(reid_vectors, self.query_medoids)
+    return reid_vectors
+
+  def updateSimilarity(self, sscape_object, similarity_scores):
+    """
+    Update the active_ids dictionary with the result of a similarity query.
+
+    @param  sscape_object      The Scenescape object the query was sent for
+    @param  similarity_scores  The similarity scores returned by the database
     """
-    similarity_scores = self.sendSimilarityQuery(sscape_object)
     database_id, similarity = self.parseQueryResults(similarity_scores)
     with self.active_ids_lock:
       # Make sure object is still in active_ids before updating since there is a chance
@@ -172,31 +251,6 @@ class UUIDManager:
           f"Track {sscape_object.rv_id} left scene before ID query finished")
     return
 
-  def sendSimilarityQuery(self, sscape_object, max_query_time=DEFAULT_MAX_QUERY_TIME):
-    """
-    Sends a query to find similarity scores for a given sscape_object and stores the time it
-    takes for query completion. If the time is over a threshold, disables re-id queries.
-
-    @param   sscape_object  The sscape_object for which similarity scores are to be found
-    @return  scores         The similarity scores for the given sscape_object
-    """
-    reid_vectors = self.quality_features.get(sscape_object.rv_id)
-    log.debug(f"Finding similarity scores for track {sscape_object.rv_id}")
-    start_time = get_epoch_time()
-    scores = self.reid_database.findSimilarityScores(sscape_object.category, reid_vectors)
-    query_time = get_epoch_time() - start_time
-    log.debug(
-      f"Similarity scores for track {sscape_object.rv_id} found in {query_time} seconds")
-
-    with self.similarity_query_times_lock:
-      self.similarity_query_times.append(query_time)
-      average_query_time = sum(self.similarity_query_times) / len(self.similarity_query_times)
-    if average_query_time > max_query_time:
-      self.reid_enabled = False
-      log.error("Disabling reid due to average query time exceeding the maximum threshold")
-
-    return scores
-
   def parseQueryResults(self, similarity_scores, threshold=DEFAULT_SIMILARITY_THRESHOLD):
     """
     Check database for any similar objects and return an ID and similarity score.
@@ -256,6 +310,7 @@ class UUIDManager:
     else:
       self.active_ids[sscape_object.rv_id] = [sscape_object.gid, None]
       database_id = sscape_object.gid
+    self.database_ids[database_id] = sscape_object.rv_id
 
     self.features_for_database[sscape_object.rv_id] = {
       'gid': database_id,
@@ -271,8 +326,7 @@ class UUIDManager:
     @param   database_id  An ID retrieved from the database
     @return  bool         Returns True if the ID is not found; otherwise, returns False
     """
-    database_ids = [v[0] for v in self.active_ids.values()]
-    return database_id not in database_ids
+    return database_id not in self.database_ids
 
   def assignID(self, sscape_object):
     """
@@ -285,11 +339,11 @@ class UUIDManager:
         self.active_ids.setdefault(sscape_object.rv_id, [None, None])
       self.gatherQualityVisualFeatures(sscape_object)
       self.pickBestID(sscape_object)
-      if self.haveSufficientVisualFeatures(sscape_object) and self.reid_enabled:
+      if self.haveSufficientVisualFeatures(sscape_object):
         # Only do the query for similarity if it hasn't been run before
-        if sscape_object.rv_id not in self.active_query:
+        if sscape_object.rv_id not in self.active_query \
+           and self.querySimilarity(sscape_object):
           self.active_query[sscape_object.rv_id] = True
-          self.pool.submit(self.querySimilarity, sscape_object)
     else:
       self.pickBestID(sscape_object)
     return
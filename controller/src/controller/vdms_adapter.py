@@ -6,16 +6,15 @@ import socket
 import threading
 
 import numpy as np
-import vdms
 
-from controller.reid import ReIDDatabase
+from controller.reid import (DIMENSIONS, K_NEIGHBORS, SCHEMA_NAME,
+                            SIMILARITY_METRIC, ReIDDatabase)
 from scene_common import log
+from scene_common.lazy_import import lazyImport
+
+vdms = lazyImport("vdms")
 
 DEFAULT_HOSTNAME = os.getenv("VDMS_HOSTNAME", "vdms.scenescape.intel.com")
-DIMENSIONS = 256
-K_NEIGHBORS = 1
-SCHEMA_NAME = "reid_vector"
-SIMILARITY_METRIC = "L2"
 
 class VDMSDatabase(ReIDDatabase):
   def __init__(self, set_name=SCHEMA_NAME,
@@ -86,18 +85,28 @@ class VDMSDatabase(ReIDDatabase):
     return
 
   def addEntry(self, uuid, rvid, object_type, reid_vectors, set_name=SCHEMA_NAME):
-    query = {
-      "AddDescriptor": {
-        "set": f"{set_name}",
-        "properties": {
-          "uuid": f"{uuid}",
-          "rvid": f"{rvid}",
-          "type": f"{object_type}"
+    self.addEntries([(uuid, rvid, object_type, reid_vectors)], set_name)
+    return
+
+  def addEntries(self, entries, set_name=SCHEMA_NAME):
+    add_query = []
+    blob = []
+    for uuid, rvid, object_type, reid_vectors in entries:
+      query = {
+        "AddDescriptor": {
+          "set": f"{set_name}",
+          "properties": {
+            "uuid": f"{uuid}",
+            "rvid": f"{rvid}",
+            "type": f"{object_type}"
+          }
         }
       }
-    }
-    blob = [[np.array(reid_vector, dtype="float32").tobytes()] for reid_vector in reid_vectors]
-    add_query = [query] * len(reid_vectors)
+      add_query.extend([query] * len(reid_vectors))
+      blob.extend([np.array(reid_vector, dtype="float32").tobytes()]
+                  for reid_vector in reid_vectors)
+    if not add_query:
+      return
     response, _ = self.sendQuery(add_query, blob)
     if response:
       for item in response:
@@ -119,31 +128,49 @@ class VDMSDatabase(ReIDDatabase):
 
   def findSimilarityScores(self, object_type, reid_vectors, set_name=SCHEMA_NAME,
                            k_neighbors=K_NEIGHBORS):
-    find_query = {
-      "FindDescriptor": {
-        "set": f"{set_name}",
-        "constraints": {
-          "type": ["==", f"{object_type}"],
-        },
-        "k_neighbors": k_neighbors,
-        "results": {
-          "list": [
-            "uuid",
-            "rvid",
-            "_distance",
-          ],
-          "blob": False
+    return self.findSimilarityScoresBatch([(object_type, reid_vectors)], set_name,
+                                          k_neighbors)[0]
+
+  def findSimilarityScoresBatch(self, requests, set_name=SCHEMA_NAME, k_neighbors=K_NEIGHBORS):
+    """
+    Sends the FindDescriptor queries for all requests in a single round trip and splits
+    the responses, which come back in query order, per request.
+    """
+    query = []
+    blob = []
+    for object_type, reid_vectors in requests:
+      find_query = {
+        "FindDescriptor": {
+          "set": f"{set_name}",
+          "constraints": {
+            "type": ["==", f"{object_type}"],
+          },
+          "k_neighbors": k_neighbors,
+          "results": {
+            "list": [
+              "uuid",
+              "rvid",
+              "_distance",
+            ],
+            "blob": False
+          }
         }
       }
-    }
-    blob = [[np.array(reid_vector, dtype="float32").tobytes()] for reid_vector in reid_vectors]
-    query = [find_query] * len(reid_vectors)
+      query.extend([find_query] * len(reid_vectors))
+      blob.extend([np.array(reid_vector, dtype="float32").tobytes()]
+                  for reid_vector in reid_vectors)
     response, _ = self.sendQuery(query, blob)
-    if response:
-      result = [
+    if not response:
+      return [None] * len(requests)
+
+    results = []
+    start = 0
+    for _, reid_vectors in requests:
+      items = response[start:start + len(reid_vectors)]
+      start += len(reid_vectors)
+      results.append([
         item.get('entities')
-        for item in response
+        for item in items
         if (item.get('status') == 0 and item.get('returned') > 0)
-      ]
-      return result
-    return None
+      ])
+    return results
@@ -29,6 +29,8 @@ from sscape_3d_detector import Object3DChainedDataProcessor
 ROOT_CA = os.environ.get("ROOT_CA", "/run/secrets/certs/scenescape-ca.pem")
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
 TIMEZONE = "UTC"
+# Latency trace header, same format as scene_common/latency_trace.py
+LATENCY_TRACE_KEY = "lt"
 
 metadatapolicies = {
   "detectionPolicy": detectionPolicy,
@@ -83,7 +85,8 @@ class PostDecodeTimestampCapture:
     frame.add_message(json.dumps({
       'postdecode_timestamp': f"{datetime.fromtimestamp(now, tz=timezone(TIMEZONE)).strftime(DATETIME_FORMAT)[:-3]}Z",
       'timestamp_for_next_block': now,
-      'fps': self.fps
+      'fps': self.fps,
+      LATENCY_TRACE_KEY: [["dec", round(now * 1000.0, 1)]]
     }))
     return True
 
@@ -203,6 +206,9 @@ class PostInferenceDataPublish:
       'debug_processing_time': now - float(gvadata['timestamp_for_next_block']),
       'rate': float(gvadata['fps'])
     })
+    trace = gvadata.get(LATENCY_TRACE_KEY)
+    self.frame_level_data[LATENCY_TRACE_KEY] = (list(trace) if isinstance(trace, list) else []) \
+      + [["inf", round(now * 1000.0, 1)]]
     if 'initial_intrinsics' in gvadata:
       self.frame_level_data['initial_intrinsics'] = gvadata['initial_intrinsics']
     objects = defaultdict(list)
@@ -260,6 +266,7 @@ class PostInferenceDataPublish:
           unannotated_img['intrinsics'] = self.cam_auto_calibrate_intrinsics
         self.client.publish(f"scenescape/image/calibration/camera/{self.cameraid}", json.dumps(unannotated_img))
 
+      self.frame_level_data[LATENCY_TRACE_KEY].append(["apub", round(time.time() * 1000.0, 1)])
       self.client.publish(f"scenescape/data/camera/{self.cameraid}", json.dumps(self.frame_level_data))
       frame.add_message(json.dumps(self.frame_level_data))
     return True
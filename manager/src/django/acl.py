@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from manager.models import PubSubACL
+from scene_common.mqtt import PubSub
+from scene_common.options import READ_ONLY, WRITE_ONLY, READ_AND_WRITE, CAN_SUBSCRIBE
+from scene_common import log
+
+# Access granted for (ACL access, requested access) pairs that are not equal
+GRANTED_ACCESS = {
+  (READ_AND_WRITE, CAN_SUBSCRIBE): CAN_SUBSCRIBE,
+  (READ_AND_WRITE, WRITE_ONLY): WRITE_ONLY,
+  (READ_AND_WRITE, READ_ONLY): CAN_SUBSCRIBE,
+  (CAN_SUBSCRIBE, READ_ONLY): CAN_SUBSCRIBE,
+  (READ_ONLY, CAN_SUBSCRIBE): CAN_SUBSCRIBE,
+}
+
+def grantedAccess(acl_access, requested):
+  """! Returns the broker access granted by an ACL for a requested access.
+  @param   acl_access  Access stored in the matching PubSubACL.
+  @param   requested   Access requested by the broker.
+  @return  The access to grant, or None to deny.
+  """
+  if acl_access == requested:
+    return requested
+  return GRANTED_ACCESS.get((acl_access, requested))
+
+class UserMatcher:
+  def __init__(self, user, acls):
+    """! Compiles the ACLs of a user into topic patterns.
+    @param   user  User the ACLs belong to.
+    @param   acls  Iterable of the user's PubSubACL objects.
+    """
+    self.user_id = user.id
+    self.is_superuser = user.is_superuser
+    self.rules = []
+    for acl in acls:
+      template = PubSub.getTopicByTemplateName(acl.topic).template
+      self.rules.append((template, PubSub.topicPattern(template), acl.access))
+    self.created = time.monotonic()
+    return
+
+  def match(self, topic):
+    """! Finds the access of the last ACL matching a topic.
+    @param   topic  Topic the broker is asking about.
+    @return  Access of the matching ACL, or None when no ACL matches.
+    """
+    access = None
+    for template, pattern, acl_access in self.rules:
+      if template == topic or pattern.fullmatch(topic):
+        access = acl_access
+    return access
+
+  def decide(self, topic, requested):
+    """! Decides the access granted to the user on a topic.
+    @param   topic      Topic the broker is asking about.
+    @param   requested  Access requested by the broker.
+    @return  The access to grant, or None to deny.
+    """
+    if self.is_superuser:
+      return READ_AND_WRITE
+
+    if not self.rules:
+      log.warn("Access denied based on ACL restrictions.")
+      return None
+
+    access = self.match(topic)
+    if access is None:
+      return None
+    return grantedAccess(access, requested)
+
+class ACLDecisionCache:
+  """! Caches compiled ACL matchers per user and the decisions made with them.
+  Entries are dropped when a user or its ACLs change. Every manager process
+  keeps its own cache, so entries also expire after a short time to pick up
+  changes saved by other processes."""
+
+  def __init__(self, ttl=10.0, max_decisions=4096):
+    self.ttl = ttl
+    self.max_decisions = max_decisions
+    self.lock = threading.Lock()
+    self.matchers = {}
+    self.decisions = OrderedDict()
+    return
+
+  def check(self, username, topic, requested):
+    """! Decides the access granted to a user on a topic.
+    @param   username   Name of the user connected to the broker.
+    @param   topic      Topic the broker is asking about.
+    @param   requested  Access requested by the broker.
+    @return  The access to grant, or None to deny.
+    """
+    key = (username, topic, requested)
+    now = time.monotonic()
+    with self.lock:
+      decision = self.decisions.get(key)
+      if decision is not None and now - decision[1] < self.ttl:
+        self.decisions.move_to_end(key)
+        return decision[0]
+
+    matcher = self.getMatcher(username, now)
+    access = matcher.decide(topic, requested)
+    with self.lock:
+      if self.matchers.get(username) is matcher:
+        self.decisions[key] = (access, matcher.created)
+        self.decisions.move_to_end(key)
+        while len(self.decisions) > self.max_decisions:
+          self.decisions.popitem(last=False)
+    return access
+
+  def getMatcher(self, username, now):
+    with self.lock:
+      matcher = self.matchers.get(username)
+      if matcher is not None and now - matcher.created < self.ttl:
+        return matcher
+
+    user = User.objects.get(username=username)
+    matcher = UserMatcher(user, PubSubACL.objects.filter(user=user))
+    with self.lock:
+      self.matchers[username] = matcher
+      self.decisions = OrderedDict((key, value) for key, value in self.decisions.items()
+                                   if key[0] != username)
+    return matcher
+
+  def invalidate(self, user_id=None, username=None):
+    """! Drops the cached matcher and decisions of a user.
+    @param   user_id   Id of the user whose ACLs changed.
+    @param   username  Name of the user, when known.
+    """
+    with self.lock:
+      names = {name for name, matcher in self.matchers.items()
+               if name == username or matcher.user_id == user_id}
+      if username is not None:
+        names.add(username)
+      for name in names:
+        self.matchers.pop(name, None)
+      if names:
+        self.decisions = OrderedDict((key, value) for key, value in self.decisions.items()
+                                     if key[0] not in names)
+    return
+
+  def clear(self):
+    with self.lock:
+      self.matchers.clear()
+      self.decisions.clear()
+    return
+
+acl_cache = ACLDecisionCache(ttl=getattr(settings, 'ACL_CACHE_TTL', 10.0))
+
+@receiver([post_save, post_delete], sender=PubSubACL)
+def aclChanged(sender, instance, **kwargs):
+  acl_cache.invalidate(user_id=instance.user_id)
+  return
+
+@receiver([post_save, post_delete], sender=User)
+def userChanged(sender, instance, **kwargs):
+  acl_cache.invalidate(user_id=instance.id, username=instance.username)
+  return
@@ -3,14 +3,14 @@
 
 import json
 import os
-import socket
+import tempfile
 import threading
 import uuid
 import asyncio
 
 from django.contrib.auth.models import User
 from django.db import IntegrityError, OperationalError, connection
-from django.http import HttpResponse
+from django.http import FileResponse
 from rest_framework.views import APIView
 from rest_framework import authentication, permissions
 from rest_framework.response import Response
@@ -19,11 +19,14 @@ from rest_framework import status
 from rest_framework import generics
 from rest_framework.authtoken.views import ObtainAuthToken
 
-from manager.models import Scene, Cam, SingletonSensor, Region, Tripwire, Asset3D, ChildScene, CalibrationMarker, DatabaseStatus, PubSubACL
+from manager.models import Scene, Cam, SingletonSensor, Region, Tripwire, Asset3D, ChildScene, CalibrationMarker, DatabaseStatus, PubSubACL, ConfigVersion, SceneConfigVersion
 from manager.serializers import *
+from manager.acl import acl_cache
+from manager.publisher import getPublisher
+from manager.frame_cache import FRAME_WAIT, getFrameCache
 from manager.scene_import import ImportScene
 from scene_common.timestamp import get_epoch_time, get_iso_time
-from scene_common.mqtt import PubSub
+from scene_common.mqtt import CHUNK_ACK_TIMEOUT, PubSub
 from scene_common.options import *
 from scene_common import log
 
@@ -80,12 +83,64 @@ class ListThings(generics.ListCreateAPIView):
         filter_params['parent__pk'] = uid
         filter_params.pop('parent')
       queryset = queryset.filter(**filter_params)
+    thing_serializer = self.get_serializer_class()
+    if hasattr(thing_serializer, 'setup_eager_loading'):
+      queryset = thing_serializer.setup_eager_loading(queryset)
     return queryset
 
   def get_serializer_class(self):
     _, thing_serializer, _ = get_class_and_serializer(self.args[0])
     return thing_serializer
 
+class SceneConfig(APIView):
+  """! Serves the configuration of all scenes, including their child scene links,
+  as one bundle tagged with the configuration version. Clients pass the version
+  they hold in `since` to only get the scenes changed after it, and the ETag in
+  If-None-Match to get a 304 when nothing changed."""
+  authentication_classes = [authentication.TokenAuthentication]
+  permission_classes = [permissions.IsAuthenticated]
+
+  def get(self, request):
+    # Read the version first, changes made while serializing are fetched again later
+    version = ConfigVersion.current()
+    etag = f'"{version}"'
+    since = request.query_params.get('since')
+    if since is not None:
+      try:
+        since = int(since)
+      except ValueError:
+        raise ValidationError({'since': "must be an integer"})
+
+    if_none_match = request.headers.get('If-None-Match', '')
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if etag in tags:
+      return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    # A version newer than ours means the database was reset, send everything
+    full = since is None or since > version
+    deleted = []
+    scenes = SceneSerializer.setup_eager_loading(Scene.objects.all())
+    if not full:
+      changed = SceneConfigVersion.objects.filter(version__gt=since)
+      deleted = [str(uid) for uid in changed.filter(deleted=True)
+                 .values_list('scene_id', flat=True)]
+      scenes = scenes.filter(pk__in=changed.filter(deleted=False).values('scene_id'))
+
+    results = []
+    child_scenes = {}
+    for scene in scenes:
+      results.append(SceneSerializer(scene).data)
+      child_scenes[str(scene.pk)] = ChildSceneSerializer(scene.children.all(), many=True).data
+
+    data = {
+      'version': version,
+      'full': full,
+      'results': results,
+      'child_scenes': child_scenes,
+      'deleted': deleted,
+    }
+    return Response(data, headers={'ETag': etag})
+
 class SceneImportAPIView(APIView):
   def post(self, request, *args, **kwargs):
     if "zipFile" not in request.FILES:
@@ -129,8 +184,11 @@ class ManageThing(APIView):
       raise ValidationError(thing_serializer.errors)
     elif not self.isValidQueryParameter(uid, thing_type):
       return Response(status=status.HTTP_404_NOT_FOUND)
+    queryset = thing_class.objects.all()
+    if hasattr(thing_serializer, 'setup_eager_loading'):
+      queryset = thing_serializer.setup_eager_loading(queryset)
     try:
-      thing = thing_class.objects.get(**{uid_field: uid})
+      thing = queryset.get(**{uid_field: uid})
     except thing_class.DoesNotExist:
       return Response(status=status.HTTP_404_NOT_FOUND)
     serializer = thing_serializer(thing)
@@ -216,29 +274,16 @@ class CameraManager(APIView):
   permission_classes = [permissions.IsAuthenticated]
 
   def openPubSub(self):
-    broker = os.environ.get("BROKER")
-    if broker is None:
+    publisher = getPublisher()
+    if publisher is None:
       log.error("WHY IS THERE NO BROKER?")
-      return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-    auth = os.environ.get("BROKERAUTH")
-    rootcert = os.environ.get("BROKERROOTCERT")
-    if rootcert is None:
-      rootcert = "/run/secrets/certs/scenescape-ca.pem"
-    cert = os.environ.get("BROKERCERT")
-
-    pubsub = PubSub(auth, cert, rootcert, broker)
-    try:
-      pubsub.connect()
-    except socket.gaierror as e:
-      log.error("Unable to connect", e)
-      return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-    pubsub.loopStart()
-    return pubsub
+      return None
+    return publisher.getPubSub()
 
   def get(self, request, thing_type):
     pubsub = self.openPubSub()
+    if pubsub is None:
+      return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
     query = request.data
     if not query:
       query = request.query_params
@@ -256,6 +301,9 @@ class CameraManager(APIView):
     return Response(status=status.HTTP_404_NOT_FOUND)
 
   def getFrame(self, camera, params, pubsub):
+    if 'timestamp' not in params and 'type' not in params:
+      return self.getLatestFrame(camera, params)
+
     timestamp = params.get('timestamp', None)
     try:
       ts_epoch = get_epoch_time(timestamp)
@@ -281,12 +329,23 @@ class CameraManager(APIView):
     self.imageCondition.acquire()
     found = self.imageCondition.wait(timeout=3)
     self.imageCondition.release()
-    pubsub.removeCallback(topic)
+    pubsub.removeCallback(channelTopic)
 
     if found and self.received:
       return Response(self.received, status=status.HTTP_200_OK)
     return Response(status=status.HTTP_404_NOT_FOUND)
 
+  def getLatestFrame(self, camera, params):
+    try:
+      wait = min(max(float(params.get('wait', FRAME_WAIT)), 0), FRAME_WAIT)
+    except ValueError:
+      raise ValidationError({'wait': "Must provide wait time in seconds"})
+
+    frame = getFrameCache().getFrame(camera, wait)
+    if frame:
+      return Response(frame, status=status.HTTP_200_OK)
+    return Response(status=status.HTTP_404_NOT_FOUND)
+
   def imageReceived(self, pubsub, userdata, message):
     self.imageCondition.acquire()
     self.received = json.loads(str(message.payload.decode("utf-8")))
@@ -302,14 +361,16 @@ class CameraManager(APIView):
     jdata = f"getvideo: {json.dumps(query)}"
     msg = pubsub.publish(topic, jdata, qos=2)
 
+    # Chunks sent before the subscription is in place are sent again when
+    # they are not acknowledged, wait long enough for that to happen
     topic = PubSub.formatTopic(PubSub.CHANNEL, channel=query['channel'])
-    data = pubsub.receiveFile(topic)
-    if data is not None:
-      response = HttpResponse(bytes(data))
-      response['Content-Disposition'] = f"attachment; filename={camera}.mp4"
-      response['Content-Type'] = "application/octet-stream"
-      return response
+    video = tempfile.TemporaryFile()
+    if pubsub.receiveFile(topic, timeout=CHUNK_ACK_TIMEOUT + 1, output=video) is not None:
+      video.seek(0)
+      return FileResponse(video, as_attachment=True, filename=f"{camera}.mp4",
+                          content_type="application/octet-stream")
 
+    video.close()
     return Response(status=status.HTTP_404_NOT_FOUND)
 
 
@@ -325,39 +386,8 @@ class ACLCheck(APIView):
         status=status.HTTP_400_BAD_REQUEST
       )
 
-    user = User.objects.get(username=username)
-    user_acls = PubSubACL.objects.filter(user=user)
-    requestedAccess = request.data['acc']
-    requestedAccess = int(requestedAccess)
-
-    # Admin users have full read/write access to the broker.
-    if user.is_superuser:
-      return Response({'result': 'allow', 'acc': READ_AND_WRITE}, status=status.HTTP_200_OK)
-
-    if not user_acls.exists():
-      log.warn("Access denied based on ACL restrictions.")
-      return Response({'result': 'deny'}, status=status.HTTP_403_FORBIDDEN)
-
-    matchedACL = None
-    for acl in user_acls:
-      templateTopic = PubSub.getTopicByTemplateName(acl.topic).template
-      if PubSub.match_topic(templateTopic, currentTopic):
-        matchedACL = acl
-
-    if matchedACL:
-      if matchedACL.access == requestedAccess:
-        return Response({'result': 'allow', 'acc': requestedAccess}, status=status.HTTP_200_OK)
-      elif matchedACL.access == READ_AND_WRITE and requestedAccess == CAN_SUBSCRIBE:
-        return Response({'result': 'allow', 'acc': CAN_SUBSCRIBE}, status=status.HTTP_200_OK)
-      elif matchedACL.access == READ_AND_WRITE and requestedAccess == WRITE_ONLY:
-        return Response({'result': 'allow', 'acc': WRITE_ONLY}, status=status.HTTP_200_OK)
-      elif matchedACL.access == READ_AND_WRITE and requestedAccess == READ_ONLY:
-        return Response({'result': 'allow', 'acc': CAN_SUBSCRIBE}, status=status.HTTP_200_OK)
-      elif matchedACL.access == CAN_SUBSCRIBE and requestedAccess == READ_ONLY:
-        return Response({'result': 'allow', 'acc': CAN_SUBSCRIBE}, status=status.HTTP_200_OK)
-      elif matchedACL.access == READ_ONLY and requestedAccess == CAN_SUBSCRIBE:
-        return Response({'result': 'allow', 'acc': CAN_SUBSCRIBE}, status=status.HTTP_200_OK)
-      else:
-        return Response({'result': 'deny'}, status=status.HTTP_403_FORBIDDEN)
-    else:
+    requestedAccess = int(request.data['acc'])
+    grantedAccess = acl_cache.check(username, currentTopic, requestedAccess)
+    if grantedAccess is None:
       return Response({'result': 'deny'}, status=status.HTTP_403_FORBIDDEN)
+    return Response({'result': 'allow', 'acc': grantedAccess}, status=status.HTTP_200_OK)
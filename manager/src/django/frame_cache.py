@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import threading
+import time
+
+from scene_common.mqtt import PubSub
+from scene_common import log
+
+from manager.publisher import getPublisher
+
+FRAME_TTL = 1.0
+FRAME_EXPIRE = 30.0
+FRAME_WAIT = 3.0
+
+class FrameCache:
+  """! Keeps the latest frame published by every camera on the shared broker
+  connection. Frames newer than the TTL are served as they are. Older frames
+  are still served while a new one is requested from the camera, so
+  requests only wait when nothing recent is known about a camera. Frames
+  are kept as received and only decoded when they are requested."""
+
+  def __init__(self, publisher, ttl=FRAME_TTL, expire=FRAME_EXPIRE):
+    self.publisher = publisher
+    self.ttl = ttl
+    self.expire = expire
+    self.condition = threading.Condition()
+    self.frames = {}
+    self.requested = {}
+    self.subscribed = False
+    return
+
+  def subscribe(self):
+    if not self.subscribed:
+      topic = PubSub.formatTopic(PubSub.IMAGE_CAMERA, camera_id="+")
+      self.subscribed = self.publisher.subscribe(topic, self.frameReceived)
+    return self.subscribed
+
+  def frameReceived(self, pubsub, userdata, message):
+    camera = message.topic.rsplit('/', 1)[-1]
+    now = time.monotonic()
+    with self.condition:
+      self.frames[camera] = (message.payload, now)
+      self.requested.pop(camera, None)
+      for name in [name for name, (_, received) in self.frames.items()
+                   if now - received > self.expire]:
+        del self.frames[name]
+      self.condition.notify_all()
+    return
+
+  def requestFrame(self, camera, now):
+    requested = self.requested.get(camera)
+    if requested is None or now - requested > self.ttl:
+      self.requested[camera] = now
+      self.publisher.publish(PubSub.formatTopic(PubSub.CMD_CAMERA, camera_id=camera), "getimage")
+    return
+
+  def getFrame(self, camera, wait=0):
+    """! Returns the latest frame of a camera.
+    @param   camera  Id of the camera.
+    @param   wait    Maximum time in seconds to wait when no recent frame is cached.
+    @return  The frame as published by the camera, or None.
+    """
+    payload = self._latestPayload(camera, wait)
+    if payload is None:
+      return None
+    try:
+      return json.loads(payload)
+    except ValueError as e:
+      log.warn("Invalid frame from camera", camera, e)
+      return None
+
+  def _latestPayload(self, camera, wait):
+    if not self.subscribe():
+      return None
+
+    now = time.monotonic()
+    end = now + wait
+    with self.condition:
+      entry = self.frames.get(camera)
+      if entry is not None and now - entry[1] < self.ttl:
+        return entry[0]
+
+      self.requestFrame(camera, now)
+      if entry is not None and now - entry[1] < self.expire:
+        return entry[0]
+
+      while True:
+        entry = self.frames.get(camera)
+        if entry is not None and entry[1] >= now:
+          return entry[0]
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+          return None
+        self.condition.wait(remaining)
+
+_frame_cache = None
+_frame_cache_lock = threading.Lock()
+
+def getFrameCache():
+  """! Returns the frame cache of this process.
+  @return  The FrameCache, or None when no broker is configured.
+  """
+  global _frame_cache
+  publisher = getPublisher()
+  if publisher is None:
+    return None
+
+  with _frame_cache_lock:
+    if _frame_cache is None:
+      _frame_cache = FrameCache(publisher)
+  return _frame_cache
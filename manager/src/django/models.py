@@ -3,7 +3,6 @@
 
 import json
 import os
-import socket
 import sys
 import traceback
 import urllib
@@ -12,7 +11,6 @@ import zipfile
 from functools import partial
 
 import numpy as np
-import paho.mqtt.client as mqtt
 from PIL import Image
 
 from django.contrib.postgres.fields import ArrayField
@@ -35,34 +33,29 @@ from scene_common.scenescape import SceneLoader
 from scene_common.timestamp import get_epoch_time
 from manager.validators import validate_map_file, validate_glb, validate_map_corners_lla
 from manager.fields import ListField
+from manager.publisher import formatUpdateCommand, getPublisher
 
 from scene_common import log
 
 # FIXME - when entire app has transitioned to using APIs
 # move this definition to views.py
-def sendUpdateCommand(scene_id=None, camera_data=None):
-  broker = os.environ.get("BROKER")
-  auth = os.environ.get("BROKERAUTH")
-  rootcert = os.environ.get("BROKERROOTCERT")
-  if rootcert is None:
-    rootcert = "/run/secrets/certs/scenescape-ca.pem"
-  cert = os.environ.get("BROKERCERT")
-  if broker is not None:
-    client = PubSub(auth, cert, rootcert, broker)
-    try:
-      client.connect()
-    except socket.gaierror as e:
-      log.error("Unable to connect", e)
-    else:
-      if scene_id:
-        client.publish(PubSub.formatTopic(PubSub.CMD_SCENE_UPDATE, scene_id = scene_id), "update")
-      if camera_data:
-        client.publish(PubSub.formatTopic(PubSub.CMD_KUBECLIENT), json.dumps(camera_data), qos=2)
-      msg = client.publish(PubSub.formatTopic(PubSub.CMD_DATABASE), "update", qos=1)
-      if not msg.is_published() and msg.rc == mqtt.MQTT_ERR_SUCCESS:
-        client.loopStart()
-        msg.wait_for_publish()
-        client.loopStop()
+def sendUpdateCommand(scene_id=None, camera_data=None, scoped_to=None):
+  """! Notifies the other services of a configuration change.
+  @param   scene_id     Scene which was saved, announced on CMD_SCENE_UPDATE.
+  @param   camera_data  Camera change for the kubeclient.
+  @param   scoped_to    Scene of a changed region, tripwire or sensor.
+  """
+  publisher = getPublisher()
+  if publisher is not None:
+    if scene_id:
+      publisher.publish(PubSub.formatTopic(PubSub.CMD_SCENE_UPDATE, scene_id = scene_id), "update")
+    if camera_data:
+      publisher.publish(PubSub.formatTopic(PubSub.CMD_KUBECLIENT), json.dumps(camera_data), qos=2)
+    # Scoped to the scene when only one scene changed, coalesced updates of
+    # other edits are unscoped and refresh everything
+    scope = scene_id or scoped_to
+    publisher.publish(PubSub.formatTopic(PubSub.CMD_DATABASE),
+                      formatUpdateCommand([scope] if scope else None), qos=1)
   return
 
 def sanitizeZipPath(instance, filename):
@@ -298,11 +291,18 @@ class Scene(models.Model):
         super().save(*args, **kwargs)
     except FileNotFoundError as e:
       log.error(f"Failed to save scene , {str(e)}")
+    bumpConfigVersion([updated_scene])
     transaction.on_commit(partial(sendUpdateCommand, scene_id = updated_scene))
     return
 
   def delete(self, *args, **kwargs):
+    scene_id = self.id
+    # Parents and children embed this scene, so they change with it
+    related = list(ChildScene.objects.filter(child=self).values_list('parent_id', flat=True))
+    related += list(ChildScene.objects.filter(parent=self).exclude(child=None)
+                    .values_list('child_id', flat=True))
     super(Scene, self).delete(*args, **kwargs)
+    bumpConfigVersion(related, deleted_ids=[scene_id])
     transaction.on_commit(sendUpdateCommand)
     if self.map:
       storage, path = self.map.storage, self.map.path
@@ -311,14 +311,15 @@ class Scene(models.Model):
 
   def roiJSON(self):
     jdata = []
-    for region in self.regions.all():
+    regions = self.regions.select_related('roi_occupancy_threshold').prefetch_related('points')
+    for region in regions:
       rdict = {'title': region.name, 'points': [], 'uuid':str(region.uuid),
                'volumetric': region.volumetric, 'height': region.height, 'buffer_size': region.buffer_size}
       thresholds, range_max = region.get_sectors()
       rdict['sectors'] = {'thresholds':thresholds, 'range_max':range_max}
 
       # provide points in the right order, so ROI polygon is formed properly
-      for point in region.points.all().order_by('sequence'):
+      for point in BoundingBoxPoints.inSequence(region.points.all()):
         # FIXME - UI should be handling scaling
         rdict['points'].append([point.x, point.y])
       jdata.append(rdict)
@@ -326,7 +327,7 @@ class Scene(models.Model):
 
   def tripwireJSON(self):
     jdata = []
-    for tripwire in self.tripwires.all():
+    for tripwire in self.tripwires.prefetch_related('points'):
       rdict = {'title': tripwire.name, 'points': [], 'uuid':str(tripwire.uuid)}
       for point in tripwire.points.all():
         # FIXME - UI should be handling scaling
@@ -445,8 +446,7 @@ class Scene(models.Model):
       if sensor.type != "generic":
         continue
 
-      sensor = SingletonSensor.objects.get(pk=sensor.id)
-      self.createSceneScapeRegion(mScene.sensors, sensor)
+      self.createSceneScapeRegion(mScene.sensors, sensor.singletonsensor)
 
     newSensors = list(mScene.sensors.keys())
     delSensors = list(set(oldSensors) - set(newSensors))
@@ -521,11 +521,14 @@ class ChildScene(models.Model):
 
   def save(self, *args, **kwargs):
     super().save(*args, **kwargs)
+    bumpConfigVersion([self.parent_id, self.child_id])
     transaction.on_commit(sendUpdateCommand)
     return
 
   def delete(self, *args, **kwargs):
+    scene_ids = [self.parent_id, self.child_id]
     super().delete(*args, **kwargs)
+    bumpConfigVersion(scene_ids)
     transaction.on_commit(sendUpdateCommand)
     return
 
@@ -571,6 +574,7 @@ class Sensor(models.Model):
     super().__init__(*args, **kwargs)
     self._original_sensor_id = self.sensor_id
     self._original_name = self.name
+    self._original_scene_id = self.scene_id
 
   def calibrateString(self):
     return "calibrate-" + self.type
@@ -592,6 +596,8 @@ class Sensor(models.Model):
 
   def save(self, *args, **kwargs):
     super().save(*args, **kwargs)
+    bumpConfigVersion([self.scene_id, self._original_scene_id])
+    self._original_scene_id = self.scene_id
     transaction.on_commit(sendUpdateCommand)
     return
 
@@ -601,6 +607,7 @@ class Sensor(models.Model):
     return
 
   def delete(self, *args, **kwargs):
+    scene_id = self.scene_id
     # Check if an icon file also needs to be deleted
     if self.icon:
       storage, path = self.icon.storage, self.icon.path
@@ -608,6 +615,7 @@ class Sensor(models.Model):
       storage.delete(path)
     else:
       super().delete(*args, **kwargs)
+    bumpConfigVersion([scene_id])
     return
 
 class Cam(Sensor):
@@ -787,7 +795,9 @@ class SingletonSensor(Sensor):
                                     default='environmental')
 
   def notifydbupdate(self):
-    transaction.on_commit(sendUpdateCommand)
+    scene_id = getattr(self, 'scene_id', None)
+    bumpConfigVersion([scene_id])
+    transaction.on_commit(partial(sendUpdateCommand, scoped_to = scene_id))
     return
 
   def get_sectors(self):
@@ -868,7 +878,9 @@ class BoundingBox(models.Model):
     return ((tx, ty), (bx, by))
 
   def notifydbupdate(self):
-    transaction.on_commit(sendUpdateCommand)
+    scene_id = getattr(self, 'scene_id', None)
+    bumpConfigVersion([scene_id])
+    transaction.on_commit(partial(sendUpdateCommand, scoped_to = scene_id))
     return
 
   def delete(self, *args, **kwargs):
@@ -881,6 +893,12 @@ class BoundingBoxPoints(models.Model):
   x = models.FloatField(default=None, null=True, blank=True)
   y = models.FloatField(default=None, null=True, blank=True)
 
+  @staticmethod
+  def inSequence(points):
+    """! Orders points like order_by('sequence') does, but in Python so that
+    prefetched points are used instead of querying again."""
+    return sorted(points, key=lambda point: (point.sequence is None, point.sequence or 0))
+
 class Region(BoundingBox):
   uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
   scene = models.ForeignKey(Scene, on_delete=models.CASCADE, related_name="regions")
@@ -973,6 +991,55 @@ class DatabaseStatus(models.Model):
     self.pk = 1
     super(DatabaseStatus, self).save(*args, **kwargs)
 
+class ConfigVersion(models.Model):
+  """! Version of the scene configuration, incremented on every change."""
+  version = models.BigIntegerField(default=0)
+
+  @classmethod
+  def current(cls):
+    version = cls.objects.filter(pk=1).values_list('version', flat=True).first()
+    return version or 0
+
+  def save(self, *args, **kwargs):
+    # Ensure that there is only one instance of this model
+    self.pk = 1
+    super(ConfigVersion, self).save(*args, **kwargs)
+
+class SceneConfigVersion(models.Model):
+  """! Configuration version at which a scene last changed. Rows of deleted
+  scenes are kept so that controllers fetching a delta learn about the deletion."""
+  scene_id = models.UUIDField(primary_key=True)
+  version = models.BigIntegerField(default=0, db_index=True)
+  deleted = models.BooleanField(default=False)
+
+def bumpConfigVersion(scene_ids, deleted_ids=()):
+  """! Increments the scene configuration version and records it for the
+  changed scenes and every scene containing them as a child.
+  @param   scene_ids    uids of the changed scenes, None entries are ignored.
+  @param   deleted_ids  uids of deleted scenes.
+  @return  The new version.
+  """
+  deleted_ids = set(deleted_ids)
+  changed = {scene_id for scene_id in scene_ids if scene_id is not None} - deleted_ids
+  with transaction.atomic():
+    counter, _ = ConfigVersion.objects.select_for_update().get_or_create(pk=1)
+    counter.version += 1
+    counter.save()
+
+    pending = changed | deleted_ids
+    while pending:
+      pending = set(ChildScene.objects.filter(child_id__in=pending)
+                    .values_list('parent_id', flat=True)) - changed
+      changed |= pending
+    rows = [SceneConfigVersion(scene_id=scene_id, version=counter.version)
+            for scene_id in changed - deleted_ids]
+    rows += [SceneConfigVersion(scene_id=scene_id, version=counter.version, deleted=True)
+             for scene_id in deleted_ids]
+    SceneConfigVersion.objects.bulk_create(rows, update_conflicts=True,
+                                           unique_fields=['scene_id'],
+                                           update_fields=['version', 'deleted'])
+  return counter.version
+
 class RegionOccupancyThreshold(models.Model):
   region = models.OneToOneField(Region, on_delete=models.CASCADE, related_name='roi_occupancy_threshold')
   sectors = models.JSONField(default=list)
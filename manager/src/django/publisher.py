@@ -0,0 +1,243 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import paho.mqtt.client as mqtt
+
+from scene_common.mqtt import PubSub
+from scene_common import log
+
+UPDATE_COMMAND = "update"
+DEBOUNCE_WINDOW = 0.25
+MAX_QUEUE = 256
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 30
+
+class ManagerPublisher:
+  """! Process wide MQTT connection used by the manager to notify the other
+  services. The connection is opened on first use and kept open, messages
+  are sent from a background thread through a small outbound queue.
+  Repeated "update" commands on the same topic within the debounce window
+  are sent once, so bulk edits and scene imports cause a single refresh.
+  An update can be scoped to scene ids ("update <id> ..."); merged updates
+  keep the union of the ids, or no scope when one of them had none."""
+
+  def __init__(self, broker, auth=None, cert=None, rootcert=None,
+               debounce=DEBOUNCE_WINDOW, max_queue=MAX_QUEUE):
+    self.broker = broker
+    self.auth = auth
+    self.cert = cert
+    self.rootcert = rootcert
+    self.debounce = debounce
+    self.max_queue = max_queue
+
+    self.pubsub = None
+    self.connect_lock = threading.Lock()
+    self.retry_at = 0
+    self.retry_delay = RECONNECT_MIN
+
+    self.condition = threading.Condition()
+    self.pending = OrderedDict()
+    self.sequence = itertools.count()
+    self.sending = 0
+    self.thread = None
+    self.subscriptions = {}
+    return
+
+  def getPubSub(self):
+    """! Returns the shared connection, connecting on first use.
+    @return  The connected PubSub, or None when the broker is unreachable.
+    """
+    with self.connect_lock:
+      if self.pubsub is not None:
+        return self.pubsub
+
+      now = time.monotonic()
+      if now < self.retry_at:
+        return None
+
+      try:
+        pubsub = PubSub(self.auth, self.cert, self.rootcert, self.broker)
+        pubsub.connect()
+      except (OSError, ValueError) as e:
+        log.error("Unable to connect", e)
+        self.retry_at = now + self.retry_delay
+        self.retry_delay = min(self.retry_delay * 2, RECONNECT_MAX)
+        return None
+
+      # The network loop reconnects on its own after a disconnect
+      pubsub.client.reconnect_delay_set(RECONNECT_MIN, RECONNECT_MAX)
+      pubsub.onConnect = self.onConnect
+      pubsub.loopStart()
+      self.pubsub = pubsub
+      self.retry_delay = RECONNECT_MIN
+    return self.pubsub
+
+  def onConnect(self, pubsub, userdata, flags, rc):
+    # Subscriptions do not survive a reconnect with a clean session
+    with self.connect_lock:
+      subscriptions = list(self.subscriptions.items())
+    for topic, (callback, qos) in subscriptions:
+      pubsub.subscribe(topic, qos)
+    return
+
+  def subscribe(self, topic, callback, qos=0):
+    """! Adds a callback for a topic on the shared connection. The
+    subscription is renewed whenever the connection is reestablished.
+    @param   topic     Topic to subscribe to, wildcards allowed.
+    @param   callback  Function called with (pubsub, userdata, message).
+    @param   qos       MQTT quality of service.
+    @return  True if the broker connection is available.
+    """
+    pubsub = self.getPubSub()
+    if pubsub is None:
+      return False
+    with self.connect_lock:
+      self.subscriptions[topic] = (callback, qos)
+    pubsub.addCallback(topic, callback, qos)
+    return True
+
+  def publish(self, topic, payload, qos=0):
+    """! Queues a message to be published.
+    @param   topic    Topic to publish on.
+    @param   payload  Message payload. An "update" payload is coalesced with
+                      the update already waiting on the same topic.
+    @param   qos      MQTT quality of service.
+    """
+    now = time.monotonic()
+    with self.condition:
+      if isUpdateCommand(payload):
+        key = (topic, UPDATE_COMMAND)
+        if key in self.pending:
+          _, pending_payload, pending_qos, due = self.pending[key]
+          self.pending[key] = (topic, mergeUpdateCommands(pending_payload, payload),
+                               max(qos, pending_qos), due)
+          return
+        due = now + self.debounce
+      else:
+        key = next(self.sequence)
+        due = now
+
+      if len(self.pending) >= self.max_queue:
+        dropped, _ = self.pending.popitem(last=False)
+        log.warn("Outbound queue full, dropping message", dropped)
+      self.pending[key] = (topic, payload, qos, due)
+      self.startThread()
+      self.condition.notify()
+    return
+
+  def startThread(self):
+    if self.thread is None or not self.thread.is_alive():
+      self.thread = threading.Thread(target=self.sendLoop, daemon=True)
+      self.thread.start()
+    return
+
+  def sendLoop(self):
+    while True:
+      with self.condition:
+        messages = self.waitForDue()
+
+      pubsub = self.getPubSub()
+      if pubsub is None or not pubsub.isConnected():
+        self.requeue(messages)
+        time.sleep(self.retry_delay)
+        continue
+
+      unsent = []
+      for key, message in messages:
+        topic, payload, qos, _ = message
+        info = pubsub.publish(topic, payload, qos=qos)
+        # The client keeps QoS 1 and 2 messages and resends them on reconnect
+        if info.rc == mqtt.MQTT_ERR_NO_CONN and qos == 0:
+          unsent.append((key, message))
+      self.requeue(unsent)
+    return
+
+  def waitForDue(self):
+    while True:
+      if not self.pending:
+        self.condition.wait()
+        continue
+
+      now = time.monotonic()
+      due = [(key, message) for key, message in self.pending.items() if message[3] <= now]
+      if due:
+        for key, _ in due:
+          del self.pending[key]
+        self.sending = len(due)
+        return due
+      self.condition.wait(min(message[3] for message in self.pending.values()) - now)
+
+  def requeue(self, messages):
+    with self.condition:
+      self.sending = 0
+      for key, message in reversed(messages):
+        if key not in self.pending:
+          self.pending[key] = message
+          self.pending.move_to_end(key, last=False)
+      while len(self.pending) > self.max_queue:
+        self.pending.popitem(last=True)
+    return
+
+  def flush(self, timeout=None):
+    """! Waits until the queued messages have been handed to the client.
+    @param   timeout  Maximum time to wait in seconds.
+    @return  True if the queue is empty.
+    """
+    end = None if timeout is None else time.monotonic() + timeout
+    while True:
+      with self.condition:
+        if not self.pending and not self.sending:
+          return True
+        self.condition.notify()
+      if end is not None and time.monotonic() >= end:
+        return False
+      time.sleep(0.01)
+
+def formatUpdateCommand(scene_ids=None):
+  """! Builds an update command, scoped to scene ids when given.
+  @param   scene_ids  Ids of the only scenes affected, None for all.
+  @return  The command payload.
+  """
+  if not scene_ids:
+    return UPDATE_COMMAND
+  return " ".join([UPDATE_COMMAND] + [str(scene_id) for scene_id in scene_ids])
+
+def isUpdateCommand(payload):
+  return isinstance(payload, str) and payload.split(" ", 1)[0] == UPDATE_COMMAND
+
+def mergeUpdateCommands(first, second):
+  """! Merges two update commands into one that covers both.
+  @return  Update scoped to the scene ids of both, unscoped if either is.
+  """
+  first_ids = first.split()[1:]
+  second_ids = second.split()[1:]
+  if not first_ids or not second_ids:
+    return UPDATE_COMMAND
+  return formatUpdateCommand(dict.fromkeys(first_ids + second_ids))
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+def getPublisher():
+  """! Returns the publisher of this process, configured from the environment.
+  @return  The ManagerPublisher, or None when no broker is configured.
+  """
+  global _publisher
+  broker = os.environ.get("BROKER")
+  if broker is None:
+    return None
+
+  with _publisher_lock:
+    if _publisher is None:
+      rootcert = os.environ.get("BROKERROOTCERT")
+      if rootcert is None:
+        rootcert = "/run/secrets/certs/scenescape-ca.pem"
+      _publisher = ManagerPublisher(broker, os.environ.get("BROKERAUTH"),
+                                    os.environ.get("BROKERCERT"), rootcert)
+  return _publisher
@@ -7,12 +7,13 @@ import os
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from scipy.spatial.transform import Rotation
 
-from manager.models import Asset3D, Cam, ChildScene, Region, RegionPoint, Scene, \
-  SingletonAreaPoint, SingletonSensor, Tripwire, TripwirePoint, PubSubACL, \
+from manager.models import Asset3D, BoundingBoxPoints, Cam, ChildScene, Region, RegionPoint, \
+  Scene, Sensor, SingletonAreaPoint, SingletonSensor, Tripwire, TripwirePoint, PubSubACL, \
   RegionOccupancyThreshold, SingletonScalarThreshold, CalibrationMarker, SceneImport
 from scene_common.options import *
 from scene_common.timestamp import DATETIME_FORMAT
@@ -60,7 +61,7 @@ class CenterSerializerField(serializers.DictField):
 class PointsSerializerField(serializers.DictField):
   def to_representation(self, obj):
     points = []
-    for point in obj.all().order_by('sequence'):
+    for point in BoundingBoxPoints.inSequence(obj.all()):
       points.append((point.x, point.y))
     return points
 
@@ -171,6 +172,10 @@ class SingletonSerializer(NonNullSerializer):
   def get_translation(self, obj):
     return [obj.map_x, obj.map_y, 0.0]
 
+  @staticmethod
+  def setup_eager_loading(queryset):
+    return queryset.select_related('scene', 'singleton_scalar_threshold').prefetch_related('points')
+
   def validate(self, data):
     area = data.get('area')
     name = data.get('name')
@@ -276,6 +281,18 @@ class CamSerializer(NonNullSerializer):
           raise serializers.ValidationError(f"orphaned camera with the name '{value}' already exists.")
     return value
 
+  @staticmethod
+  def setup_eager_loading(queryset):
+    # Camera poses are resolved through the scene model, which reads all sensors of the scene
+    return queryset.select_related('scene').prefetch_related(
+      Prefetch('scene__sensor_set', queryset=Sensor.objects.select_related('cam')))
+
+  def to_representation(self, instance):
+    if isinstance(instance, Cam):
+      # A Cam is its own 'cam', spare the query through the parent link
+      Sensor.cam.related.set_cached_value(instance, instance)
+    return super().to_representation(instance)
+
   def create_update(self, validated_data, instance=None):
     is_update = instance is not None
     scene_uid = validated_data.pop('scene', None)
@@ -510,11 +527,19 @@ class RegionSerializer(NonNullSerializer):
   def get_uuid(self, obj):
     return str(obj.uuid)
 
+  @staticmethod
+  def setup_eager_loading(queryset):
+    return queryset.select_related('scene', 'roi_occupancy_threshold').prefetch_related('points')
+
   class Meta:
     model = Region
     fields = ['uid', 'name', 'points', 'scene', 'buffer_size', 'height', 'volumetric', 'color_ranges']
 
 class TripwireSerializer(RegionSerializer):
+  @staticmethod
+  def setup_eager_loading(queryset):
+    return queryset.select_related('scene').prefetch_related('points')
+
   class Meta:
     model = Tripwire
     fields = ['uid', 'name', 'points', 'height', 'scene']
@@ -571,8 +596,7 @@ class SceneSerializer(NonNullSerializer):
     return CamSerializer(queryset, many=True).data
 
   def get_sensors(self, obj):
-    queryset = [SingletonSensor.objects.get(pk=x.id) for x in obj.sensor_set.all()
-                if x.type == "generic"]
+    queryset = [x.singletonsensor for x in obj.sensor_set.all() if x.type == "generic"]
     return SingletonSerializer(queryset, many=True).data
 
   def get_rotation(self, obj):
@@ -591,7 +615,18 @@ class SceneSerializer(NonNullSerializer):
     need_to_serialize = []
     child_links = []
 
-    for link in obj.children.all():
+    links = list(obj.children.all())
+    # Child scenes nested deeper than setup_eager_loading() reaches are loaded per level
+    child_ids = [link.child_id for link in links
+                 if link.child_id is not None and not ChildScene.child.is_cached(link)]
+    if child_ids:
+      queryset = SceneSerializer.setup_eager_loading(Scene.objects.filter(pk__in=child_ids))
+      child_scenes = {scene.pk: scene for scene in queryset}
+      for link in links:
+        if link.child_id in child_scenes:
+          link.child = child_scenes[link.child_id]
+
+    for link in links:
       if link.child is None:
         children.append({'name': link.child_name})
       else:
@@ -615,6 +650,28 @@ class SceneSerializer(NonNullSerializer):
 
     return children + serialized_scenes
 
+  @staticmethod
+  def setup_eager_loading(queryset, depth=2):
+    """! Loads everything the scene representation reads in a fixed number of
+    queries, instead of several queries per camera, sensor, region and tripwire.
+    @param   queryset  Scenes to serialize.
+    @param   depth     Levels of child scenes to load along.
+    @return  The queryset with the related objects prefetched.
+    """
+    sensors = Sensor.objects.select_related(
+      'cam', 'singletonsensor', 'singletonsensor__singleton_scalar_threshold') \
+      .prefetch_related('singletonsensor__points')
+    children = ChildScene.objects.all()
+    if depth > 0:
+      child_scenes = SceneSerializer.setup_eager_loading(Scene.objects.all(), depth - 1)
+      children = children.prefetch_related(Prefetch('child', queryset=child_scenes))
+    return queryset.select_related('parent__parent').prefetch_related(
+      Prefetch('sensor_set', queryset=sensors),
+      Prefetch('regions', queryset=Region.objects.select_related('roi_occupancy_threshold')
+               .prefetch_related('points')),
+      Prefetch('tripwires', queryset=Tripwire.objects.prefetch_related('points')),
+      Prefetch('children', queryset=children))
+
   @staticmethod
   def check_circular_dependency(parent_scene, child_scene):
     # Check if any of the descendants of the child scene are the parent before linking
@@ -835,6 +892,10 @@ class ChildSceneSerializer(NonNullSerializer):
   def getChildName(self, obj):
     return obj.child.name if obj.child else obj.child_name
 
+  @staticmethod
+  def setup_eager_loading(queryset):
+    return queryset.select_related('child')
+
   def validate(self, data):
     child_type = data.get('child_type')
     parent = data.get('parent')
@@ -81,6 +81,7 @@ if settings.KUBERNETES_SERVICE_HOST:
 # REST API
 
 urlpatterns += [
+  path('api/v1/scenes/config', api.SceneConfig.as_view()),
   re_path(r'api/v1/(scenes)$', api.ListThings.as_view()),
   re_path(r'api/v1/(scene)$', api.ManageThing.as_view()),
   re_path(r'api/v1/(scene)/([0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12})$', api.ManageThing.as_view()),
@@ -12,10 +12,12 @@
 #   TRS  - Translation, Rotation, Scale
 
 import numpy as np
-import cv2
 import math
 
 from scene_common.geometry import Point
+from scene_common.lazy_import import lazyImport
+
+cv2 = lazyImport("cv2")
 
 EQUATORIAL_RADIUS = 6378137.0
 POLAR_RADIUS = 6356752.314245
@@ -93,6 +95,69 @@ def convertECEFToLLA(ecef_pt):
 
   return np.array([np.rad2deg(lat), np.rad2deg(long), altitude])
 
+def convertLLAToECEFArray(lla_pts):
+  """! Array version of convertLLAToECEF which converts all points at once.
+  @param      lla_pts          Array of N coordinates in LLA format, shape (N, 3)
+  @returns    numpy.ndarray    Array of N points in ECEF format, shape (N, 3)
+  """
+  lla_pts = np.asarray(lla_pts, dtype=np.float64).reshape(-1, 3)
+  lat = np.deg2rad(lla_pts[:, 0])
+  long = np.deg2rad(lla_pts[:, 1])
+  altitude = lla_pts[:, 2]
+  e_squared = 1 - POLAR_RADIUS**2/EQUATORIAL_RADIUS**2
+  sin_lat = np.sin(lat)
+  cos_lat = np.cos(lat)
+  N = EQUATORIAL_RADIUS/np.sqrt(1 - e_squared*sin_lat**2)
+
+  return np.column_stack([
+    (N + altitude)*cos_lat*np.cos(long),
+    (N + altitude)*cos_lat*np.sin(long),
+    ((1-e_squared)*N + altitude)*sin_lat
+  ])
+
+def convertECEFToLLAArray(ecef_pts):
+  """! Array version of convertECEFToLLA which converts all points at once. Points
+  where Heikkinen's technique breaks down fall back to the spherical approximation,
+  the same as in the single point version.
+  @param      ecef_pts         Array of N points in ECEF format, shape (N, 3)
+  @returns    numpy.ndarray    Array of N coordinates in LLA format, shape (N, 3)
+  """
+  ecef_pts = np.asarray(ecef_pts, dtype=np.float64).reshape(-1, 3)
+  X, Y, Z = ecef_pts[:, 0], ecef_pts[:, 1], ecef_pts[:, 2]
+
+  with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+    # Heikkinen's technique, see convertECEFToLLA
+    Z_sq = Z**2
+    a_sq = EQUATORIAL_RADIUS**2
+    b_sq = POLAR_RADIUS**2
+    e_sq = 1 - b_sq/a_sq
+    e_p_sq = a_sq/b_sq - 1
+    p = np.sqrt(X**2 + Y**2)
+    p_sq = p**2
+    F = 54*(b_sq)*Z_sq
+    G = p_sq + (1-e_sq)*Z_sq - e_sq*(a_sq-b_sq)
+    c = (e_sq**2)*F*p_sq/(G**3)
+    s = np.power(1 + c + np.sqrt(c**2 + 2*c), 1/3)
+    k = s + 1 + 1/s
+    P = F/(3*(k**2)*(G**2))
+    Q = np.sqrt(1 + 2*(e_sq**2)*P)
+    r0 = -P*e_sq*p/(1+Q) + np.sqrt(0.5*a_sq*(1+1/Q)-P*(1-e_sq)*Z_sq/(Q+Q**2)-0.5*P*p_sq)
+    U = np.sqrt((p-e_sq*r0)**2+Z_sq)
+    V = np.sqrt((p-e_sq*r0)**2+(1-e_sq)*Z_sq)
+    z0 = b_sq*Z/(EQUATORIAL_RADIUS*V)
+    altitude = U * (1 - b_sq/(EQUATORIAL_RADIUS*V))
+    lat = np.arctan((Z+e_p_sq*z0)/p)
+  long = np.arctan2(Y, X)
+
+  failed = ~(np.isfinite(lat) & np.isfinite(altitude))
+  if np.any(failed):
+    # Earth as sphere for the points inside the earth
+    R = np.sqrt(X[failed]**2 + Y[failed]**2 + Z[failed]**2)
+    lat[failed] = np.arcsin(Z[failed]/R)
+    altitude[failed] = R - SPHERICAL_RADIUS
+
+  return np.column_stack([np.rad2deg(lat), np.rad2deg(long), altitude])
+
 def convertToCartesianTRS(from_pts, to_pts):
   # Needs 3 point pairs, reliable with 4+
   (tr_mat, scale) = cv2.estimateAffine3D(from_pts, to_pts, force_rotation=False)
@@ -104,7 +169,7 @@ def convertToCartesianTRS(from_pts, to_pts):
   return trs_mat
 
 def convertLLAToCartesianTRS(map_pts, lla_pts):
-  ecef_pts = np.array([convertLLAToECEF(pt) for pt in lla_pts])
+  ecef_pts = convertLLAToECEFArray(lla_pts)
   trs_mat = convertToCartesianTRS(map_pts, ecef_pts)
   return trs_mat
 
@@ -126,6 +191,39 @@ def calculateHeading(trs_mat, map_pt, velocity):
   bearing = math.atan2(x, y)
   return np.rad2deg(bearing) % 360
 
+def convertXYZToLLAArray(trs_mat, map_pts):
+  """! Array version of convertXYZToLLA which converts all points at once.
+  @param      trs_mat          Transformation matrix from scene coordinates to ECEF
+  @param      map_pts          Array of N points in scene coordinates, shape (N, 3)
+  @returns    numpy.ndarray    Array of N coordinates in LLA format, shape (N, 3)
+  """
+  map_pts = np.asarray(map_pts, dtype=np.float64).reshape(-1, 3)
+  ecef_pts = map_pts @ trs_mat[:3, :3].T + trs_mat[:3, 3]
+  return convertECEFToLLAArray(ecef_pts)
+
+def calculateHeadingArray(trs_mat, map_pts, velocities, lla_pts=None):
+  """! Array version of calculateHeading which computes the heading of all
+  points at once.
+  @param      trs_mat          Transformation matrix from scene coordinates to ECEF
+  @param      map_pts          Array of N points in scene coordinates, shape (N, 3)
+  @param      velocities       Array of N velocities in scene coordinates, shape (N, 3)
+  @param      lla_pts          LLA coordinates of map_pts when already computed
+  @returns    numpy.ndarray    Array of N headings in degrees
+  """
+  map_pts = np.asarray(map_pts, dtype=np.float64).reshape(-1, 3)
+  velocities = np.asarray(velocities, dtype=np.float64).reshape(-1, 3)
+  if lla_pts is None:
+    lla_pts = convertXYZToLLAArray(trs_mat, map_pts)
+  lat_a, long_a = np.deg2rad(lla_pts[:, 0]), np.deg2rad(lla_pts[:, 1])
+  lla_b = convertXYZToLLAArray(trs_mat, map_pts + velocities)
+  lat_b, long_b = np.deg2rad(lla_b[:, 0]), np.deg2rad(lla_b[:, 1])
+  long_diff = long_b - long_a
+
+  x = np.cos(lat_b) * np.sin(long_diff)
+  y = np.cos(lat_a) * np.sin(lat_b) - np.sin(lat_a) * np.cos(lat_b) * np.cos(long_diff)
+  bearing = np.arctan2(x, y)
+  return np.rad2deg(bearing) % 360
+
 def calculateTRSLocal2LLAFromSurfacePoints(map_xyz_pts, lla_pts, z_shift: float = DEFAULT_Z_SHIFT_METERS) -> np.ndarray:
   """! Calculates a transformation matrix from local Cartesian coordinates
   to Latitude, Longitude, Altitude (LLA) coordinates based on the map surface points
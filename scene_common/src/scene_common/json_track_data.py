@@ -4,11 +4,13 @@
 import os
 import json
 import glob
-import cv2
 import numpy as np
 
 from scene_common.timestamp import get_iso_time, get_epoch_time
 from scene_common import log
+from scene_common.lazy_import import lazyImport
+
+cv2 = lazyImport("cv2")
 
 AVG_FRAMES = 15
 
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""! Compact latency trace carried in detection messages.
+
+Every stage that handles a frame appends one [stage, epoch_ms] pair to the
+list under TRACE_KEY, so a published scene message records when the frame
+was decoded, inferred, published by the adapter, received by the controller,
+handed to the tracker and published by the controller:
+
+    "lt": [["dec", 1760000000000.1], ["inf", 1760000000031.4], ...]
+
+Stages are listed in pipeline order in STAGES. The time between two
+consecutive entries is the latency of the later stage. Timestamps are
+wall-clock milliseconds, so stages on different hosts are only comparable
+when their clocks are synchronized (NTP).
+
+The controller stores the camera the trace started at under TRACE_CAMERA_KEY,
+since the scene messages it publishes are identified by the scene.
+
+The DL Streamer adapter does not ship scene_common and writes the same
+format itself, keep both in sync.
+"""
+
+import time
+
+TRACE_KEY = "lt"
+TRACE_CAMERA_KEY = "lt_cam"
+
+STAGE_DECODE = "dec"
+STAGE_INFERENCE = "inf"
+STAGE_ADAPTER_PUBLISH = "apub"
+STAGE_CONTROLLER_RECEIVE = "recv"
+# Tracking runs in the tracker threads. The frame is only tracked by the time of
+# this stage when tracking is synchronous (offline mode), otherwise it was queued.
+STAGE_TRACKER_QUEUED = "trkq"
+STAGE_PUBLISH = "pub"
+
+STAGES = (STAGE_DECODE, STAGE_INFERENCE, STAGE_ADAPTER_PUBLISH,
+          STAGE_CONTROLLER_RECEIVE, STAGE_TRACKER_QUEUED, STAGE_PUBLISH)
+
+def stampStage(jdata, stage, when=None):
+  """! Appends a stage to the latency trace of a message. Stamping the same
+  stage again right after itself, as happens when one camera message is
+  published once per category, replaces the previous time.
+  @param   jdata  Message dictionary.
+  @param   stage  One of STAGES.
+  @param   when   Epoch time of the stage in seconds, now when None.
+  @return  None
+  """
+  if when is None:
+    when = time.time()
+  entry = [stage, round(when * 1000.0, 1)]
+  trace = jdata.get(TRACE_KEY)
+  if not isinstance(trace, list):
+    jdata[TRACE_KEY] = [entry]
+  elif trace and isinstance(trace[-1], list) and trace[-1][0] == stage:
+    trace[-1] = entry
+  else:
+    trace.append(entry)
+  return
+
+def readTrace(jdata):
+  """! Returns the valid entries of the latency trace of a message.
+  @param   jdata  Message dictionary.
+  @return  List of (stage, epoch_ms) tuples in the order they were stamped.
+  """
+  trace = jdata.get(TRACE_KEY)
+  if not isinstance(trace, list):
+    return []
+  entries = []
+  for entry in trace:
+    if (isinstance(entry, (list, tuple)) and len(entry) == 2
+        and isinstance(entry[0], str) and isinstance(entry[1], (int, float))):
+      entries.append((entry[0], float(entry[1])))
+  return entries
+
+def stageLatencies(jdata):
+  """! Computes the latency of every stage but the first of the trace.
+  @param   jdata  Message dictionary.
+  @return  List of (stage, milliseconds since the previous stage) tuples.
+  """
+  entries = readTrace(jdata)
+  return [(stage, when - entries[idx][1])
+          for idx, (stage, when) in enumerate(entries[1:])]
+
+def totalLatency(jdata):
+  """! Computes the time from the first to the last stage of the trace.
+  @param   jdata  Message dictionary.
+  @return  Milliseconds, or None when the trace has fewer than two stages.
+  """
+  entries = readTrace(jdata)
+  if len(entries) < 2:
+    return None
+  return entries[-1][1] - entries[0][1]
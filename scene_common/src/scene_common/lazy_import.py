@@ -0,0 +1,29 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import importlib
+import importlib.util
+import sys
+
+def lazyImport(name):
+  """! Imports a top level module without executing it. The module is loaded
+  the first time one of its attributes is used, so heavy dependencies only
+  slow down the features that need them.
+  @param   name  Name of the module.
+  @return  The module.
+  """
+  module = sys.modules.get(name)
+  if module is not None:
+    return module
+
+  spec = importlib.util.find_spec(name)
+  if spec is None:
+    raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+  # Namespace packages have nothing to defer
+  if not hasattr(spec.loader, 'exec_module'):
+    return importlib.import_module(name)
+  spec.loader = importlib.util.LazyLoader(spec.loader)
+  module = importlib.util.module_from_spec(spec)
+  sys.modules[name] = module
+  spec.loader.exec_module(module)
+  return module
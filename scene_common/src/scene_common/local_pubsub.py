@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import paho.mqtt.client as mqtt
+
+from scene_common.mqtt import PubSub
+
+class LocalMessage:
+  __slots__ = ("topic", "payload", "qos", "retain")
+
+  def __init__(self, topic, payload, qos=0, retain=False):
+    self.topic = topic
+    self.payload = payload
+    self.qos = qos
+    self.retain = retain
+    return
+
+class LocalPubSub(PubSub):
+  """! In-process stand-in for PubSub without a broker. Messages are
+  delivered synchronously on the publishing thread to the callbacks whose
+  topic filter matches, so benchmarks and offline runs exercise the same
+  handlers as a live system. The onConnect callback runs from loopStart or
+  loopForever after connect, like it would from the network loop."""
+
+  def __init__(self, *args, **kwargs):
+    self.callbacks = {}
+    self.subscriptions = set()
+    self.published = 0
+    self.connected = False
+    self._connect_pending = False
+    self._on_connect = None
+    self._on_disconnect = None
+    self._on_message = None
+    return
+
+  def connect(self):
+    self._connect_pending = True
+    return mqtt.MQTT_ERR_SUCCESS
+
+  def connectAsync(self):
+    return self.connect()
+
+  def subscribe(self, topic, qos=0):
+    self.subscriptions.add(topic)
+    return (mqtt.MQTT_ERR_SUCCESS, None)
+
+  def unsubscribe(self, topic):
+    self.subscriptions.discard(topic)
+    return (mqtt.MQTT_ERR_SUCCESS, None)
+
+  def addCallback(self, topic, callback, qos=0):
+    self.callbacks[topic] = callback
+    return self.subscribe(topic, qos)
+
+  def removeCallback(self, topic):
+    self.callbacks.pop(topic, None)
+    return self.unsubscribe(topic)
+
+  def publish(self, topic, payload, qos=0, retain=False):
+    """! Delivers a message to the matching callbacks before returning.
+    Like the broker, a message goes to onMessage when no callback matches
+    but another subscription does."""
+    if isinstance(payload, str):
+      payload = payload.encode()
+    self.published += 1
+    message = LocalMessage(topic, payload, qos, retain)
+    handled = False
+    for sub, callback in list(self.callbacks.items()):
+      if mqtt.topic_matches_sub(sub, topic):
+        callback(self, None, message)
+        handled = True
+    if not handled and self._on_message is not None \
+       and any(mqtt.topic_matches_sub(sub, topic) for sub in self.subscriptions):
+      self._on_message(self, None, message)
+    return mqtt.MQTTMessageInfo(self.published)
+
+  def disconnect(self):
+    if self.connected:
+      self.connected = False
+      if self._on_disconnect is not None:
+        self._on_disconnect(self, None, 0)
+    return mqtt.MQTT_ERR_SUCCESS
+
+  def loopForever(self):
+    self.loopStart()
+    return mqtt.MQTT_ERR_SUCCESS
+
+  def loopStart(self):
+    if self._connect_pending:
+      self._connect_pending = False
+      self.connected = True
+      if self._on_connect is not None:
+        self._on_connect(self, None, None, 0)
+    return mqtt.MQTT_ERR_SUCCESS
+
+  def loopStop(self):
+    return mqtt.MQTT_ERR_SUCCESS
+
+  def isConnected(self):
+    return self.connected
+
+  def queueDepth(self):
+    return 0
+
+  @property
+  def onConnect(self):
+    return self._on_connect
+
+  @onConnect.setter
+  def onConnect(self, value):
+    self._on_connect = value
+    return
+
+  @property
+  def onDisconnect(self):
+    return self._on_disconnect
+
+  @onDisconnect.setter
+  def onDisconnect(self, value):
+    self._on_disconnect = value
+    return
+
+  @property
+  def onMessage(self):
+    return self._on_message
+
+  @onMessage.setter
+  def onMessage(self, value):
+    self._on_message = value
+    return
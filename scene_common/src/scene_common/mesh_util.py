@@ -1,14 +1,22 @@
 # SPDX-FileCopyrightText: (C) 2023 - 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import hashlib
 import os
 import math
+import tempfile
 
 import numpy as np
-import open3d as o3d
-import trimesh
+
+from scene_common import log
+from scene_common.lazy_import import lazyImport
+
+o3d = lazyImport("open3d")
+trimesh = lazyImport("trimesh")
 
 MESH_FLATTEN_Z_SCALE = 1000 # This is a calibrated value, used to make mesh look like a flat map.
+MESH_CACHE_DIR = os.environ.get("SCENESCAPE_MESH_CACHE",
+                                os.path.join(os.path.expanduser("~"), ".cache", "scenescape", "meshes"))
 VECTOR_PROPERTIES = ['base_color', 'emissive_color']
 SCALAR_PROPERTIES = ['metallic', 'roughness', 'reflectance']
 
@@ -175,6 +183,78 @@ def extractTriangleMesh(map_info, rotation=None):
     return extractMeshFromGLB(map_info[0], rotation)
   return extractMeshFromImage(map_info), None
 
+def meshCacheKey(map_info):
+  """! Builds the cache key of a map from the hash of its file and its scale.
+  @param  map_info  List holding the map file path and, for images, the scale.
+  @return The key as a string.
+  """
+  digest = hashlib.sha256()
+  with open(map_info[0], 'rb') as f:
+    for block in iter(lambda: f.read(1024 * 1024), b''):
+      digest.update(block)
+  scale = map_info[1] if len(map_info) > 1 else None
+  return f"{digest.hexdigest()}-{scale}"
+
+def saveMeshGeometry(mesh, path):
+  """! Saves the vertex and triangle attributes of a tensor mesh to an .npz file.
+  The file is written next to its destination and moved in place, so other
+  processes never see a partial file.
+  """
+  arrays = {f"vertex_{key}": value.numpy() for key, value in mesh.vertex.items()}
+  arrays.update({f"triangle_{key}": value.numpy() for key, value in mesh.triangle.items()})
+  arrays['material_name'] = np.array(mesh.material.material_name if mesh.material.is_valid() else "")
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz")
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+  except BaseException:
+    os.unlink(tmp_path)
+    raise
+  return
+
+def loadMeshGeometry(path):
+  """! Loads a tensor mesh saved with saveMeshGeometry. """
+  mesh = o3d.t.geometry.TriangleMesh()
+  with np.load(path) as arrays:
+    for name in arrays.files:
+      if name.startswith("vertex_"):
+        mesh.vertex[name[len("vertex_"):]] = o3d.core.Tensor(arrays[name])
+      elif name.startswith("triangle_"):
+        mesh.triangle[name[len("triangle_"):]] = o3d.core.Tensor(arrays[name])
+    material_name = str(arrays['material_name'])
+  if material_name:
+    mesh.material.material_name = material_name
+  return mesh
+
+def extractCachedTriangleMesh(map_info, cache_dir=None):
+  """! Generate a triangular mesh like extractTriangleMesh, reusing the
+  geometry processed earlier for the same file and scale. Only the geometry
+  is cached, materials and textures of the map are not restored.
+  @param  map_info   List holding the map file path and, for images, the scale.
+  @param  cache_dir  Directory of the cache, MESH_CACHE_DIR by default.
+  @return The triangle mesh.
+  """
+  if cache_dir is None:
+    cache_dir = MESH_CACHE_DIR
+
+  try:
+    path = os.path.join(cache_dir, meshCacheKey(map_info) + ".npz")
+    if os.path.exists(path):
+      return loadMeshGeometry(path)
+  except (OSError, ValueError, KeyError) as e:
+    log.warn("Unable to read cached mesh", map_info[0], e)
+    path = None
+
+  triangle_mesh, _ = extractTriangleMesh(map_info)
+  if path is not None:
+    try:
+      saveMeshGeometry(triangle_mesh, path)
+    except OSError as e:
+      log.warn("Unable to cache mesh", map_info[0], e)
+  return triangle_mesh
+
 def getMeshAxisAlignedProjectionToXY(mesh):
   """! Extract the projection of a mesh to Z=0 plane.
   @param mesh: Open3D triangle mesh
@@ -1,12 +1,15 @@
 # SPDX-FileCopyrightText: (C) 2021 - 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import functools
 import json
 import os
 import paho.mqtt.client as mqtt
 import re
 import struct
 import threading
+import time
+from collections import deque
 from enum import Enum, auto
 from string import Template
 
@@ -17,6 +20,11 @@ from scene_common import log
 TOPIC_BASE = "scenescape"
 CHUNK_HEADER = "> LLHH"
 CHUNK_SIZE = 1024 * 1024
+CHUNK_WINDOW = 4
+CHUNK_ACK_TIMEOUT = 2
+CHUNK_TIMEOUT = 10
+CHUNK_RETRIES = 3
+ACK_SUFFIX = "-ack"
 
 class _Topic(Enum):
   CHANNEL = auto()
@@ -24,6 +32,7 @@ class _Topic(Enum):
   CMD_CAMERA = auto()
   CMD_DATABASE = auto()
   CMD_KUBECLIENT = auto()
+  CMD_PROFILE = auto()
   CMD_SCENE_UPDATE = auto()
   DATA_AUTOCALIB_CAM_POSE = auto()
   DATA_CAMERA = auto()
@@ -37,6 +46,8 @@ class _Topic(Enum):
   IMAGE_CAMERA = auto()
   SYS_AUTOCALIB_STATUS = auto()
   SYS_CHILDSCENE_STATUS = auto()
+  SYS_PROFILE = auto()
+  SYS_PROFILE_STATUS = auto()
 
 # Really gross way to put above constants directly into PubSub class
 class _PubSubTopicBase:
@@ -52,6 +63,7 @@ class PubSub(_PubSubTopicBase):
     _Topic.CMD_CAMERA: Template(TOPIC_BASE + "/cmd/camera/${camera_id}"),
     _Topic.CMD_DATABASE: Template(TOPIC_BASE + "/cmd/database"),
     _Topic.CMD_KUBECLIENT: Template(TOPIC_BASE + "/cmd/kubeclient"),
+    _Topic.CMD_PROFILE: Template(TOPIC_BASE + "/cmd/profile"),
     _Topic.CMD_SCENE_UPDATE: Template(TOPIC_BASE + "/cmd/scene/update/${scene_id}"),
     _Topic.DATA_AUTOCALIB_CAM_POSE: Template(TOPIC_BASE + "/autocalibration/camera/pose/${camera_id}"),
     _Topic.DATA_CAMERA: Template(TOPIC_BASE + "/data/camera/${camera_id}"),
@@ -65,6 +77,8 @@ class PubSub(_PubSubTopicBase):
     _Topic.IMAGE_CAMERA: Template(TOPIC_BASE + "/image/camera/${camera_id}"),
     _Topic.SYS_AUTOCALIB_STATUS: Template(TOPIC_BASE + "/sys/autocalibration/status"),
     _Topic.SYS_CHILDSCENE_STATUS: Template(TOPIC_BASE + "/sys/child/status/${scene_id}"),
+    _Topic.SYS_PROFILE: Template(TOPIC_BASE + "/sys/profile/result/${profile_id}"),
+    _Topic.SYS_PROFILE_STATUS: Template(TOPIC_BASE + "/sys/profile/status"),
   }
 
   def __init__(self, auth, cert, rootca, broker, port=None, keepalive=60,
@@ -128,6 +142,19 @@ class PubSub(_PubSubTopicBase):
     if template == topic:
       return topic
 
+    match = cls.topicPattern(template).fullmatch(topic)
+    if match:
+      return match.groups()
+    return None
+
+  @staticmethod
+  @functools.lru_cache(maxsize=256)
+  def topicPattern(template):
+    """! Compiles a topic template into a regex matching the topics it describes.
+    Patterns are cached since the same few templates are matched over and over.
+    @param   template  Topic template string with ${...} placeholders.
+    @return  The compiled pattern, with a group for every placeholder.
+    """
     regex = re.escape(template)
     regex = regex.replace(r'\$\{thing_type\}', r'([^/]+)')
     regex = regex.replace(r'\$\{camera_id\}', r'([^/]+)')
@@ -138,12 +165,7 @@ class PubSub(_PubSubTopicBase):
     regex = regex.replace(r'\$\{sensor_id\}', r'([^/]+)')
     regex = regex.replace(r'\$\{region_type\}', r'([^/]+)')
     regex = regex.replace(r'\$\{event_type\}', r'([^/]+)')
-    pattern = re.compile(f'^{regex}$', re.IGNORECASE)
-
-    match = pattern.fullmatch(topic)
-    if match:
-      return match.groups()
-    return None
+    return re.compile(f'^{regex}$', re.IGNORECASE)
 
   def onTlsConnect(self, client, userdata, flags, rc):
     if rc == mqtt.CONNACK_ACCEPTED:
@@ -166,6 +188,11 @@ class PubSub(_PubSubTopicBase):
   def connect(self):
     return self.client.connect(self.broker, self.port, self.keepalive)
 
+  def connectAsync(self):
+    """! Connects from the network loop started with loopStart, which keeps
+    retrying when the broker is unreachable."""
+    return self.client.connect_async(self.broker, self.port, self.keepalive)
+
   def subscribe(self, topic, qos=0):
     return self.client.subscribe(topic, qos)
 
@@ -198,6 +225,16 @@ class PubSub(_PubSubTopicBase):
   def isConnected(self):
     return self.client.is_connected()
 
+  def queueDepth(self):
+    """! Number of messages waiting to be sent to the broker.
+    @return  The number of messages, None if the client does not expose its queue.
+    """
+    # paho-mqtt has no public API for its outgoing queue
+    out_packet = getattr(self.client, '_out_packet', None)
+    if out_packet is None:
+      return None
+    return len(out_packet)
+
   @property
   def onConnect(self):
     return self.client.on_connect
@@ -347,67 +384,185 @@ class PubSub(_PubSubTopicBase):
   def on_log(self):
     raise NotImplementedError
 
-  def sendFile(self, topic, file):
+  def sendFile(self, topic, file, window=CHUNK_WINDOW, timeout=CHUNK_TIMEOUT):
+    """! Sends a file in chunks. With a window, at most that many chunks are
+    in flight until the receiver acknowledges them, chunks that are not
+    acknowledged in time or reported missing are sent again. The network
+    loop must be running to receive the acknowledgements.
+    @param   topic    Topic to send the chunks on.
+    @param   file     Path or binary file object to send.
+    @param   window   Maximum number of unacknowledged chunks, 0 to send
+                      all chunks without waiting for acknowledgements.
+    @param   timeout  Seconds without any acknowledgement before giving up.
+    @return  True if every chunk was sent, and acknowledged when windowed.
+    """
     if isinstance(file, str):
       with open(file, mode="rb") as f:
-        self.sendFile(topic, f)
-      return
+        return self.sendFile(topic, f, window, timeout)
+
+    transfer = _FileSender(self, topic, file)
+    if not window:
+      for idx in range(transfer.chunkCount):
+        self.publish(topic, transfer.readChunk(idx), qos=2)
+      return True
+
+    ackTopic = topic + ACK_SUFFIX
+    self.addCallback(ackTopic, transfer.ackReceived, qos=1)
+    try:
+      complete = transfer.send(window, timeout)
+    finally:
+      self.removeCallback(ackTopic)
+    return complete
+
+  def receiveFile(self, topic, timeout=1, output=None, retries=CHUNK_RETRIES):
+    """! Receives a file sent with sendFile. Every chunk is acknowledged,
+    when chunks stop arriving the missing ones are requested again.
+    @param   topic    Topic the chunks are sent on.
+    @param   timeout  Seconds to wait for the next chunk.
+    @param   output   Where to put the chunks: None for a new bytearray,
+                      a path or binary file object to write to, or a
+                      writable buffer large enough for the file.
+    @param   retries  Number of times to request missing chunks.
+    @return  The bytearray, file or buffer holding the file, or None if
+             the transfer did not complete.
+    """
+    if isinstance(output, str):
+      with open(output, mode="w+b") as f:
+        if self.receiveFile(topic, timeout, f, retries) is None:
+          return None
+      return output
+
+    transfer = _FileReceiver(self, topic, output)
+    self.addCallback(topic, transfer.chunkReceived, qos=1)
+    try:
+      complete = transfer.wait(timeout, retries)
+    finally:
+      self.removeCallback(topic)
+
+    if not complete:
+      return None
+    return transfer.output
+
+class _FileSender:
+  def __init__(self, pubsub, topic, file):
+    self.pubsub = pubsub
+    self.topic = topic
+    self.file = file
 
     file.seek(0, os.SEEK_END)
-    totalSize = file.tell()
-    chunkCount = (totalSize + CHUNK_SIZE - 1) // CHUNK_SIZE
+    self.totalSize = file.tell()
+    self.chunkCount = (self.totalSize + CHUNK_SIZE - 1) // CHUNK_SIZE
+    self.unacked = set(range(self.chunkCount))
+    self.queue = deque(range(self.chunkCount))
+    self.inflight = {}
+    self.lastAck = time.monotonic()
+    self.condition = threading.Condition()
+    return
+
+  def readChunk(self, idx):
+    header = struct.pack(CHUNK_HEADER, self.totalSize, CHUNK_SIZE, self.chunkCount, idx)
+    self.file.seek(idx * CHUNK_SIZE)
+    return header + self.file.read(CHUNK_SIZE)
+
+  def send(self, window, timeout):
+    with self.condition:
+      while self.unacked:
+        now = time.monotonic()
+        if now - self.lastAck > timeout:
+          log.warn("File transfer timed out", self.topic, len(self.unacked), "chunks left")
+          return False
+
+        # Chunks that were not acknowledged in time are sent again
+        for idx, sent in list(self.inflight.items()):
+          if now - sent > CHUNK_ACK_TIMEOUT:
+            del self.inflight[idx]
+            self.queue.append(idx)
+
+        while self.queue and len(self.inflight) < window:
+          idx = self.queue.popleft()
+          if idx in self.unacked and idx not in self.inflight:
+            self.inflight[idx] = now
+            self.pubsub.publish(self.topic, self.readChunk(idx), qos=1)
+
+        self.condition.wait(CHUNK_ACK_TIMEOUT)
+    return True
+
+  def ackReceived(self, client, userdata, message):
+    try:
+      reply = json.loads(message.payload)
+    except ValueError:
+      return
 
-    file.seek(0)
-    for idx in range(chunkCount):
-      header = struct.pack(CHUNK_HEADER, totalSize, CHUNK_SIZE, chunkCount, idx)
-      data = file.read(CHUNK_SIZE)
-      print("Publishing chunk:", idx, chunkCount, len(data), topic)
-      self.publish(topic, header + data, qos=2)
+    with self.condition:
+      for idx in reply.get('ack', []):
+        self.unacked.discard(idx)
+        self.inflight.pop(idx, None)
+      for idx in reply.get('missing', []):
+        if idx in self.unacked and idx not in self.inflight:
+          self.queue.append(idx)
+      self.lastAck = time.monotonic()
+      self.condition.notify()
+    return
 
+class _FileReceiver:
+  def __init__(self, pubsub, topic, output):
+    self.pubsub = pubsub
+    self.topic = topic
+    self.output = output
+    self.remaining = None
+    self.received = 0
+    self.condition = threading.Condition()
     return
 
-  def receiveFile(self, topic, timeout=1):
-    self.received = None
-    self.complete = False
-    self.receivedCondition = threading.Condition()
-    self.addCallback(topic, self.chunkReceived)
-    self.receivedCondition.acquire()
-    while True:
-      found = self.receivedCondition.wait(timeout=timeout)
-      if not found or self.complete:
-        break
-    self.receivedCondition.release()
-    self.removeCallback(topic)
-
-    if not self.complete:
-      self.received = None
-    return self.received
+  @property
+  def complete(self):
+    return self.remaining is not None and not self.remaining
+
+  def wait(self, timeout, retries):
+    with self.condition:
+      while not self.complete:
+        received = self.received
+        self.condition.wait(timeout=timeout)
+        if self.complete or self.received != received:
+          continue
+
+        # No progress, ask the sender for the chunks that are still missing
+        if self.remaining is None or retries <= 0:
+          break
+        retries -= 1
+        self.reply({'missing': sorted(self.remaining)})
+    return self.complete
+
+  def reply(self, message):
+    self.pubsub.publish(self.topic + ACK_SUFFIX, json.dumps(message), qos=1)
+    return
 
   def chunkReceived(self, client, userdata, message):
-    # self and client are the same
-    self.receivedCondition.acquire()
-
+    payload = memoryview(message.payload)
     headerLen = struct.calcsize(CHUNK_HEADER)
-    header = struct.unpack(CHUNK_HEADER, message.payload[:headerLen])
-    data = message.payload[headerLen:]
-
-    totalSize = header[0]
-    chunkSize = header[1]
-    chunkCount = header[2]
-    idx = header[3]
-
-    if not hasattr(self, 'remaining') or self.remaining is None:
-      self.remaining = list(range(chunkCount))
-      self.received = bytearray(totalSize)
-
-    if idx in self.remaining:
-      offset = idx * chunkSize
-      self.received[offset:offset + len(data)] = data
-      self.remaining.remove(idx)
-      self.complete = len(self.remaining) == 0
-
-    self.receivedCondition.notify()
-    self.receivedCondition.release()
+    totalSize, chunkSize, chunkCount, idx = struct.unpack(CHUNK_HEADER, payload[:headerLen])
+    data = payload[headerLen:]
+
+    with self.condition:
+      if self.remaining is None:
+        self.remaining = set(range(chunkCount))
+        if self.output is None:
+          self.output = bytearray(totalSize)
+        elif hasattr(self.output, 'truncate'):
+          self.output.truncate(totalSize)
+
+      if idx in self.remaining:
+        offset = idx * chunkSize
+        if hasattr(self.output, 'seek'):
+          self.output.seek(offset)
+          self.output.write(data)
+        else:
+          memoryview(self.output)[offset:offset + len(data)] = data
+        self.remaining.discard(idx)
+        self.received += 1
+        self.condition.notify()
+
+    self.reply({'ack': [idx]})
     return
 
 def initializeMqttClient(**kwargs):
@@ -10,10 +10,11 @@ from http import HTTPStatus
 from urllib.parse import urljoin
 
 class RESTResult(dict):
-  def __init__(self, statusCode, errors=None):
+  def __init__(self, statusCode, errors=None, etag=None):
     super().__init__()
     self.statusCode = statusCode
     self.errors = errors
+    self.etag = etag
     return
 
 class RESTClient:
@@ -140,20 +141,30 @@ class RESTClient:
                               headers=headers, verify=self.rootcert)
     return self.decodeReply(reply, HTTPStatus.CREATED)
 
-  def _get(self, endpoint, parameters):
+  def _get(self, endpoint, parameters, etag=None):
     """Private method to get an object, used by public object specific calls.
 
     @param      endpoint        object specific endpoint on REST server
     @param      parameters      dictionary of key/value pairs appended to GET request,
                                 used by server to filter out objects
+    @param      etag            ETag of the copy held by the caller, sent as
+                                If-None-Match to make the request conditional
     @return                     RESTResult with decoded object(s) on success,
-                                empty with `errors` set on failure
+                                empty with statusCode NOT_MODIFIED if `etag` is
+                                still current, empty with `errors` set on failure
     """
     full_path = urljoin(self.url, endpoint)
     headers = {'Authorization': f"Token {self.token}"}
+    if etag:
+      headers['If-None-Match'] = etag
     reply = self.session.get(full_path, params=parameters, headers=headers,
                              verify=self.rootcert)
-    return self.decodeReply(reply, HTTPStatus.OK)
+    if reply.status_code == HTTPStatus.NOT_MODIFIED:
+      result = RESTResult(statusCode=reply.status_code)
+    else:
+      result = self.decodeReply(reply, HTTPStatus.OK)
+    result.etag = reply.headers.get('ETag')
+    return result
 
   def _update(self, endpoint, data, files=None):
     """Private method to update an object, used by public object specific calls.
@@ -204,6 +215,21 @@ class RESTClient:
     """
     return self._get("scenes", filter)
 
+  def getSceneConfig(self, since=None, etag=None):
+    """Gets the configuration bundle of all scenes and their child scene links
+
+    @param      since           configuration version held by the caller, only
+                                scenes changed after it are returned
+    @param      etag            ETag of the bundle held by the caller
+    @return                     RESTResult with the decoded bundle on success,
+                                empty with statusCode NOT_MODIFIED if nothing
+                                changed, empty with `errors` set on failure
+    """
+    parameters = None
+    if since is not None:
+      parameters = {'since': since}
+    return self._get("scenes/config", parameters, etag=etag)
+
   def createScene(self, data):
     """Creates a new scene
 
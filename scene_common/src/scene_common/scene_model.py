@@ -1,26 +1,30 @@
 # SPDX-FileCopyrightText: (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
-import cv2
 import os
 
 from scene_common import log
-from scene_common.mesh_util import extractTriangleMesh
+from scene_common.lazy_import import lazyImport
+from scene_common.mesh_util import extractCachedTriangleMesh
+
+cv2 = lazyImport("cv2")
 
 
 class SceneModel:
   def __init__(self, name, map_file, scale=None):
     self.name = name
-    self.background = None
-    self.map_triangle_mesh = None
     self.map_file = map_file
+    self.map_path = None
+    self._background = None
+    self._map_triangle_mesh = None
+    self._background_loaded = False
+    self._mesh_loaded = False
     if map_file:
       # FIXME: get the image binary data using url rather than this hack
       if 'http' in map_file:
         map_file = map_file.replace('https://web.scenescape.intel.com', '/home/scenescape/SceneScape')
       if os.path.exists(map_file):
-        self.background = cv2.imread(map_file)
-        self.extractMapTriangleMesh(map_file, scale)
+        self.map_path = map_file
     self.children = []
     self.cameras = {}
     self.regions = {}
@@ -36,6 +40,39 @@ class SceneModel:
     self.scale = scale
     return
 
+  @property
+  def background(self):
+    """! Map image of the scene, read from the map file on first use. """
+    if not self._background_loaded:
+      self._background_loaded = True
+      if self.map_path is not None:
+        self._background = cv2.imread(self.map_path)
+    return self._background
+
+  @background.setter
+  def background(self, value):
+    self._background = value
+    self._background_loaded = True
+    return
+
+  @property
+  def map_triangle_mesh(self):
+    """! Triangle mesh of the map, extracted from the map file on first use. """
+    if not self._mesh_loaded:
+      self._mesh_loaded = True
+      if self.map_path is not None:
+        try:
+          self.extractMapTriangleMesh(self.map_path, self.scale)
+        except (FileNotFoundError, ValueError) as e:
+          log.error("Unable to load map mesh", self.map_path, e)
+    return self._map_triangle_mesh
+
+  @map_triangle_mesh.setter
+  def map_triangle_mesh(self, value):
+    self._map_triangle_mesh = value
+    self._mesh_loaded = True
+    return
+
   def extractMapTriangleMesh(self, mapFile, scale):
     map_info = []
     supported_types = ["png", "jpg", "jpeg"]
@@ -48,7 +85,7 @@ class SceneModel:
     else:
       map_info.append(mapFile)
 
-    self.map_triangle_mesh, _ = extractTriangleMesh(map_info)
+    self.map_triangle_mesh = extractCachedTriangleMesh(map_info)
 
     return
 
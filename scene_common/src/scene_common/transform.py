@@ -3,13 +3,14 @@
 
 import math
 
-import cv2
 import numpy as np
-import open3d as o3d
 
 from scene_common import log
-from scipy.spatial.transform import Rotation
 from scene_common.geometry import isarray, Point, Line, Rectangle, Region
+from scene_common.lazy_import import lazyImport
+
+cv2 = lazyImport("cv2")
+o3d = lazyImport("open3d")
 
 MAX_COPLANAR_DETERMINANT = 0.1
 FALLBACK_HORIZON_DISTANCE = 1000
@@ -357,6 +358,7 @@ class CameraPose:
 
     @return   obj_T, obj_R translation and rotation of object projected to map
     """
+    from scipy.spatial.transform import Rotation
 
     cam_T = self.translation.asNumpyCartesian
     cam_R = Rotation.from_quat(np.radians(self.quaternion_rotation)).as_matrix()
@@ -471,6 +473,7 @@ class CameraPose:
 
   @staticmethod
   def _poseMatToPose(mat):
+    from scipy.spatial.transform import Rotation
     rmat = mat[0:3, 0:3]
     cam_pos = mat[0:3, 3:4] #also T_mat
     rot = Rotation.from_matrix(rmat).as_euler('XYZ', degrees=True)
@@ -490,6 +493,7 @@ class CameraPose:
 
   @staticmethod
   def _poseToPoseMat(translation, rotation, scale):
+    from scipy.spatial.transform import Rotation
     if len(rotation) == 4:
       rmat = Rotation.from_quat(rotation).as_matrix()
     else:
@@ -627,6 +631,18 @@ def getPoseMatrix(sceneobj, rot_adjust=None):
 
   return pose_mat
 
+def transformPoints(pose_mat, points):
+  """! Applies a 4x4 transform to many 3D points with one matrix product.
+
+  @param    pose_mat     4x4 transformation matrix
+  @param    points       N 3D points, shape (N, 3)
+
+  @return numpy array of the N transformed points, shape (N, 3)
+  """
+  points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+  points = np.hstack((points, np.ones((points.shape[0], 1))))
+  return np.matmul(points, pose_mat.T)[:, :3]
+
 def applyChildTransform(region, cameraPose):
   """ Transforms the points in given region with the camera pose.
       of specified camera pose.
@@ -662,6 +678,7 @@ def convertToTransformMatrix(scene_pose_mat, rotation, translation):
 
   @return updated matrix in accordance with scenescape convention.
   """
+  from scipy.spatial.transform import Rotation
   e_rot_0 = Rotation.from_quat(rotation).as_matrix()
   e_tr_0 = np.vstack([np.hstack([e_rot_0, np.zeros((3, 1))]),
                       np.array([0, 0, 0, 1])])
@@ -686,6 +703,7 @@ def normalize(vector):
 
 def rotationToTarget(v1, v2):
   """Compute rotation (in quaternion) from vector v1 to v2"""
+  from scipy.spatial.transform import Rotation
   quat = np.hstack([
            np.cross(v1, v2),
            np.array([
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from tests.functional import FunctionalTest
+from http import HTTPStatus
+from scene_common.rest_client import RESTClient
+
+TEST_NAME = "NEX-T10394-CONFIG-API"
+
+class SceneConfigAPITest(FunctionalTest):
+  def __init__(self, testName, request, recordXMLAttribute):
+    super().__init__(testName, request, recordXMLAttribute)
+    self.rest = RESTClient(self.params["resturl"], rootcert=self.params["rootcert"])
+    assert self.rest.authenticate(self.params["user"], self.params["password"])
+
+  def runTest(self):
+    scene_name = "Scene-Config"
+
+    # Full bundle
+    res = self.rest.getSceneConfig()
+    assert res.statusCode == HTTPStatus.OK, f"Failed to fetch scene config: {res.errors}"
+    assert res['full'], "Expected a full bundle"
+    assert res.etag == f'"{res["version"]}"', f"Unexpected ETag {res.etag}"
+    version = res['version']
+    etag = res.etag
+
+    # Nothing changed
+    res = self.rest.getSceneConfig(since=version, etag=etag)
+    assert res.statusCode == HTTPStatus.NOT_MODIFIED, f"Expected 304, got {res.statusCode}"
+
+    # A new scene is returned alone in the delta
+    res = self.rest.createScene({"name": scene_name, "scale": 1000,
+                                 "map_image": "SampleJpegMap.jpeg"})
+    assert res.statusCode in (HTTPStatus.OK, HTTPStatus.CREATED), f"Scene creation failed: {res.errors}"
+    scene_uid = res["uid"]
+
+    res = self.rest.getSceneConfig(since=version, etag=etag)
+    assert res.statusCode == HTTPStatus.OK, f"Failed to fetch scene config: {res.errors}"
+    assert not res['full'], "Expected a delta"
+    assert res['version'] > version, "Version did not increase"
+    assert [scene['uid'] for scene in res['results']] == [scene_uid]
+    assert res['child_scenes'] == {scene_uid: []}
+    version = res['version']
+    etag = res.etag
+
+    # A deleted scene is reported in the delta
+    res = self.rest.deleteScene(scene_uid)
+    assert res.statusCode == HTTPStatus.OK, f"Failed to delete scene: {res.errors}"
+
+    res = self.rest.getSceneConfig(since=version, etag=etag)
+    assert res.statusCode == HTTPStatus.OK, f"Failed to fetch scene config: {res.errors}"
+    assert res['results'] == []
+    assert res['deleted'] == [scene_uid]
+    print("Scene config bundle, delta and conditional requests work as expected.")
+
+    return True
+
+def test_scene_config_api(request, record_xml_attribute):
+  test = SceneConfigAPITest(TEST_NAME, request, record_xml_attribute)
+  assert test.runTest()
+  return
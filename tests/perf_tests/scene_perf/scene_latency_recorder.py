@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""! Latency percentiles from the latency trace of scene messages.
+
+Reads the trace that the adapter and the controller append to every message
+(see scene_common/latency_trace.py) either live from the broker or from a
+file written by scene_mqtt_recorder.py --output, and reports p50/p95/p99 of
+every stage and of the whole trace, per camera and over all cameras.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from scene_common import latency_trace
+from scene_common.mqtt import PubSub
+
+ALL_CAMERAS = "all"
+TOTAL = "total"
+PERCENTILES = (50, 95, 99)
+
+class LatencyStats:
+  """! Collects stage latencies of traced messages per camera."""
+
+  def __init__(self):
+    self.samples = defaultdict(list)
+    self.untraced = 0
+    return
+
+  def add(self, jdata):
+    """! Adds the latencies of one message.
+    @param   jdata  Message dictionary.
+    @return  True when the message had a usable trace.
+    """
+    latencies = latency_trace.stageLatencies(jdata)
+    if not latencies:
+      self.untraced += 1
+      return False
+    camera = str(jdata.get(latency_trace.TRACE_CAMERA_KEY, "unknown"))
+    latencies.append((TOTAL, latency_trace.totalLatency(jdata)))
+    for stage, ms in latencies:
+      self.samples[(camera, stage)].append(ms)
+      self.samples[(ALL_CAMERAS, stage)].append(ms)
+    return True
+
+  def summary(self):
+    """! Computes the percentiles of every camera and stage.
+    @return  Dictionary of camera to dictionary of stage to
+             (count, p50, p95, p99) in milliseconds, stages in pipeline order.
+    """
+    order = {stage: idx for idx, stage in enumerate(latency_trace.STAGES + (TOTAL,))}
+    result = {}
+    for (camera, stage) in sorted(self.samples, key=lambda key: (key[0] == ALL_CAMERAS, key[0],
+                                                                 order.get(key[1], len(order)))):
+      values = self.samples[(camera, stage)]
+      percentiles = np.percentile(values, PERCENTILES)
+      result.setdefault(camera, {})[stage] = (len(values), *(float(value) for value in percentiles))
+    return result
+
+  def report(self, out=sys.stdout):
+    for camera, stages in self.summary().items():
+      print(f"Camera {camera}", file=out)
+      print(f"  {'stage':8} {'count':>8} " + " ".join(f"{'p' + str(p):>10}" for p in PERCENTILES),
+            file=out)
+      for stage, (count, *values) in stages.items():
+        print(f"  {stage:8} {count:8d} " + " ".join(f"{value:8.1f}ms" for value in values),
+              file=out)
+    if self.untraced:
+      print(f"{self.untraced} messages without latency trace", file=out)
+    return
+
+def build_argparser():
+  parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--input", help="JSON lines file from scene_mqtt_recorder.py --output,"
+                      " instead of subscribing to the broker")
+  parser.add_argument("--broker", default="broker.scenescape.intel.com", help="MQTT broker")
+  parser.add_argument("--rootcert", default="/run/secrets/certs/scenescape-ca.pem",
+                      help="Path to the broker CA certificate")
+  parser.add_argument("--auth", help="user:password or path to a JSON file with credentials,"
+                      " admin with $SUPASS when not set")
+  parser.add_argument("--duration", type=float, default=60, help="Seconds to record")
+  parser.add_argument("--scene", default="+", help="Scene uid to record")
+  return parser
+
+def readFile(path, stats):
+  with open(path) as f:
+    for line in f:
+      if line.strip():
+        stats.add(json.loads(line))
+  return
+
+def recordLive(args, stats):
+  auth = args.auth or f"admin:{os.getenv('SUPASS')}"
+  client = PubSub(auth, None, args.rootcert, args.broker)
+  topic = PubSub.formatTopic(PubSub.DATA_SCENE, scene_id=args.scene, thing_type="+")
+
+  def onConnect(mqttc, obj, flags, rc):
+    mqttc.subscribe(topic, 0)
+    return
+
+  def onMessage(mqttc, obj, msg):
+    stats.add(json.loads(msg.payload))
+    return
+
+  client.onConnect = onConnect
+  client.onMessage = onMessage
+  client.connect()
+  client.loopStart()
+  time.sleep(args.duration)
+  client.loopStop()
+  return
+
+def main():
+  args = build_argparser().parse_args()
+  stats = LatencyStats()
+  if args.input:
+    readFile(args.input, stats)
+  else:
+    recordLive(args, stats)
+
+  if not stats.samples:
+    print("No traced messages")
+    return 1
+  stats.report()
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
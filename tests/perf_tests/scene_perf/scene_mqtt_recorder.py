@@ -10,6 +10,7 @@ import os
 from scene_common.mqtt import PubSub
 from scene_common.timestamp import get_epoch_time
 from tests.mqtt_helper import TEST_MQTT_DEFAULT_ROOTCA, TEST_MQTT_DEFAULT_AUTH
+from tests.perf_tests.scene_perf.scene_latency_recorder import LatencyStats
 from argparse import ArgumentParser
 
 objects_detected = 0
@@ -18,6 +19,7 @@ number_sensors = 0
 sensors_seen = []
 proc_time_avg = 0
 proc_time_count = 0
+latency_stats = LatencyStats()
 
 def build_argparser():
   parser = ArgumentParser()
@@ -50,6 +52,7 @@ def test_on_message(mqttc, obj, msg):
 
   proc_time_avg = ((proc_time_avg*proc_time_count) + time_proc_est)/(proc_time_count+1)
   proc_time_count += 1
+  latency_stats.add(jdata)
 
   if log_file is not None:
     json.dump( jdata, log_file )
@@ -158,6 +161,7 @@ def test_mqtt_recorder():
   if proc_time_count > 0:
     print( "Final rate incoming {:.3f} messages/ss".format(total_rate) )
     print( "Final proc time {:.3f} ms, proc {:.3f} mps".format(proc_time_avg*1000.0, 1.0/proc_time_avg) )
+    latency_stats.report()
     result = 0
   else:
     print( "Unknown processing time" )
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""! Record camera and sensor traffic from a broker and replay it into a
+scene controller without a broker, for reproducible benchmarks.
+
+Record from a running system:
+    scene_replay.py record --output traffic.ssrec --duration 60
+
+Replay into a controller running in this process at 1x, Nx or max speed:
+    scene_replay.py replay --input traffic.ssrec --data_source scenes.json --speed max
+
+The recording is a sequence of length-prefixed records, each holding the
+receive time, the topic and the payload as received. When the recorder is
+stopped cleanly an index of record offsets is appended, so readers know the
+number of records and can seek to any of them. A recording cut short still
+replays up to the last complete record.
+
+Replay publishes every record on a LocalPubSub, so the messages go through
+the same topic routing, validation and handlers as on a live controller. The
+recorded timestamps are kept (no lag check by default), so tracking results
+do not depend on the replay speed.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from scene_common.local_pubsub import LocalPubSub
+from scene_common.mqtt import PubSub
+
+FILE_MAGIC = b"SSMQTTR1"
+INDEX_MAGIC = b"SSMQTTIX"
+RECORD_HEADER = struct.Struct("<dHI")
+INDEX_TRAILER = struct.Struct("<QQ8s")
+PERCENTILES = (50, 95, 99)
+
+class RecordingWriter:
+  """! Writes MQTT messages to a recording file."""
+
+  def __init__(self, path):
+    self.file = open(path, "wb")
+    self.file.write(FILE_MAGIC)
+    self.offsets = []
+    return
+
+  def write(self, topic, payload, when=None):
+    """! Appends one message.
+    @param   topic    Topic the message was received on.
+    @param   payload  Payload as bytes or str.
+    @param   when     Epoch time the message was received, now when None.
+    @return  None
+    """
+    if isinstance(payload, str):
+      payload = payload.encode()
+    topic = topic.encode()
+    self.offsets.append(self.file.tell())
+    self.file.write(RECORD_HEADER.pack(time.time() if when is None else when,
+                                       len(topic), len(payload)))
+    self.file.write(topic)
+    self.file.write(payload)
+    return
+
+  def close(self):
+    index_offset = self.file.tell()
+    self.file.write(struct.pack(f"<{len(self.offsets)}Q", *self.offsets))
+    self.file.write(INDEX_TRAILER.pack(index_offset, len(self.offsets), INDEX_MAGIC))
+    self.file.close()
+    return
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+class RecordingReader:
+  """! Reads a recording file written by RecordingWriter."""
+
+  def __init__(self, path):
+    self.file = open(path, "rb")
+    if self.file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+      self.file.close()
+      raise ValueError(f"{path} is not a recording")
+    self.offsets = self._readIndex()
+    return
+
+  def _readIndex(self):
+    """! Reads the index, or builds it by scanning a recording without one."""
+    size = self.file.seek(0, os.SEEK_END)
+    if size >= len(FILE_MAGIC) + INDEX_TRAILER.size:
+      self.file.seek(size - INDEX_TRAILER.size)
+      index_offset, count, magic = INDEX_TRAILER.unpack(self.file.read(INDEX_TRAILER.size))
+      if magic == INDEX_MAGIC and index_offset + count * 8 + INDEX_TRAILER.size == size:
+        self.file.seek(index_offset)
+        return list(struct.unpack(f"<{count}Q", self.file.read(count * 8)))
+
+    offsets = []
+    offset = len(FILE_MAGIC)
+    while offset + RECORD_HEADER.size <= size:
+      self.file.seek(offset)
+      _, topic_len, payload_len = RECORD_HEADER.unpack(self.file.read(RECORD_HEADER.size))
+      end = offset + RECORD_HEADER.size + topic_len + payload_len
+      if end > size:
+        break
+      offsets.append(offset)
+      offset = end
+    return offsets
+
+  def __len__(self):
+    return len(self.offsets)
+
+  def __getitem__(self, idx):
+    """! Returns record idx as (receive time, topic, payload)."""
+    self.file.seek(self.offsets[idx])
+    when, topic_len, payload_len = RECORD_HEADER.unpack(self.file.read(RECORD_HEADER.size))
+    topic = self.file.read(topic_len).decode()
+    return when, topic, self.file.read(payload_len)
+
+  def __iter__(self):
+    for idx in range(len(self.offsets)):
+      yield self[idx]
+
+  def close(self):
+    self.file.close()
+    return
+
+class ReplayResult:
+  def __init__(self):
+    self.messages = 0
+    self.outputs = 0
+    self.late = 0
+    self.started = None
+    self.elapsed = 0.0
+    self.latencies = []
+    return
+
+  def report(self, out=sys.stdout):
+    rate = self.messages / self.elapsed if self.elapsed > 0 else 0
+    print(f"Replayed {self.messages} messages in {self.elapsed:.3f} s, {rate:.1f} messages/s,"
+          f" {self.outputs} scene messages published", file=out)
+    if self.late:
+      print(f"{self.late} messages replayed behind schedule", file=out)
+    if self.latencies:
+      values = np.percentile(np.array(self.latencies) * 1000.0, PERCENTILES)
+      print("Handler latency " + ", ".join(f"p{p} {value:.2f} ms"
+                                           for p, value in zip(PERCENTILES, values)), file=out)
+    return
+
+def parseSpeed(value):
+  """! Parses a replay speed, "max" or 0 replays without pauses.
+  @param   value  "max", "1", "1x", "10x", ...
+  @return  Speed factor, 0 for max.
+  """
+  value = value.lower()
+  if value == "max":
+    return 0.0
+  speed = float(value.rstrip("x"))
+  if speed < 0:
+    raise argparse.ArgumentTypeError("Speed must not be negative")
+  return speed
+
+def replay(pubsub, records, speed=1.0):
+  """! Publishes recorded messages on a LocalPubSub.
+  @param   pubsub   LocalPubSub with the handlers to drive.
+  @param   records  Iterable of (receive time, topic, payload).
+  @param   speed    Replay speed factor relative to the recording, 0 for max.
+  @return  ReplayResult.
+  """
+  result = ReplayResult()
+
+  def countOutput(client, userdata, message):
+    result.outputs += 1
+    return
+
+  output_topic = PubSub.formatTopic(PubSub.DATA_SCENE, scene_id="+", thing_type="+")
+  pubsub.addCallback(output_topic, countOutput)
+
+  first = None
+  start = result.started = time.perf_counter()
+  for when, topic, payload in records:
+    if first is None:
+      first = when
+    if speed > 0:
+      delay = start + (when - first) / speed - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+      elif delay < -0.1:
+        result.late += 1
+    sent = time.perf_counter()
+    pubsub.publish(topic, payload)
+    result.latencies.append(time.perf_counter() - sent)
+    result.messages += 1
+  result.elapsed = time.perf_counter() - start
+
+  pubsub.removeCallback(output_topic)
+  return result
+
+def record(args):
+  topics = [PubSub.formatTopic(PubSub.DATA_CAMERA, camera_id="+"),
+            PubSub.formatTopic(PubSub.DATA_SENSOR, sensor_id="+")]
+  auth = args.auth or f"admin:{os.getenv('SUPASS')}"
+  client = PubSub(auth, None, args.rootcert, args.broker)
+  count = 0
+
+  with RecordingWriter(args.output) as writer:
+    def onConnect(mqttc, obj, flags, rc):
+      for topic in topics:
+        mqttc.subscribe(topic, 0)
+      return
+
+    def onMessage(mqttc, obj, msg):
+      nonlocal count
+      writer.write(msg.topic, msg.payload)
+      count += 1
+      return
+
+    client.onConnect = onConnect
+    client.onMessage = onMessage
+    client.connect()
+    client.loopStart()
+    try:
+      time.sleep(args.duration)
+    except KeyboardInterrupt:
+      pass
+    finally:
+      client.loopStop()
+  print(f"Recorded {count} messages to {args.output}")
+  return 0
+
+def replayCommand(args):
+  from controller.scene_controller import SceneController
+
+  reader = RecordingReader(args.input)
+  pubsub = LocalPubSub()
+  controller = SceneController(args.rewriteBadTime, False, args.maxlag, None, None, None, None,
+                               None, None, None, args.tracker_config_file, args.schema_file,
+                               args.visibility_topic, args.data_source, pubsub=pubsub)
+  pubsub.loopStart()
+  print(f"Replaying {len(reader)} messages at",
+        "max speed" if args.speed == 0 else f"{args.speed}x")
+  result = replay(pubsub, reader, args.speed)
+  # Include the work still queued for the trackers
+  for scene in controller.scenes:
+    for tracker in scene.tracker.trackers.values():
+      tracker.waitForComplete()
+  result.elapsed = time.perf_counter() - result.started
+  reader.close()
+  result.report()
+  return 0 if result.messages else 1
+
+def build_argparser():
+  controller_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "..", "..", "controller")
+  parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  record_parser = commands.add_parser("record", help="Record camera and sensor messages",
+                                      formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  record_parser.add_argument("--output", required=True, help="Recording file to write")
+  record_parser.add_argument("--duration", type=float, default=60, help="Seconds to record")
+  record_parser.add_argument("--broker", default="broker.scenescape.intel.com", help="MQTT broker")
+  record_parser.add_argument("--rootcert", default="/run/secrets/certs/scenescape-ca.pem",
+                             help="Path to the broker CA certificate")
+  record_parser.add_argument("--auth", help="user:password or path to a JSON file with credentials,"
+                             " admin with $SUPASS when not set")
+
+  replay_parser = commands.add_parser("replay", help="Replay a recording into a local controller",
+                                      formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  replay_parser.add_argument("--input", required=True, help="Recording file to replay")
+  replay_parser.add_argument("--data_source", nargs="+", required=True, help="Scene json files")
+  replay_parser.add_argument("--speed", type=parseSpeed, default=1.0,
+                             help="Replay speed, 1x, Nx or max")
+  replay_parser.add_argument("--maxlag", type=float, default=float("inf"),
+                             help="Maximum lag in seconds, recorded timestamps are kept by default")
+  replay_parser.add_argument("--rewriteBadTime", action="store_true",
+                             help="Rewrite time stamps over the maximum lag instead of dropping")
+  replay_parser.add_argument("--tracker_config_file", help="JSON file with tracker configuration",
+                             default=os.path.join(controller_dir, "config", "tracker-config.json"))
+  replay_parser.add_argument("--schema_file", help="JSON file with metadata schema",
+                             default=os.path.join(controller_dir, "src", "schema", "metadata.schema.json"))
+  replay_parser.add_argument("--visibility_topic", default="regulated",
+                             help="'unregulated', 'regulated', or 'none'")
+  return parser
+
+def main():
+  args = build_argparser().parse_args()
+  if args.command == "record":
+    return record(args)
+  return replayCommand(args)
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""! Startup benchmark for the scene controller.
+
+Imports the controller in fresh interpreters with `python -X importtime`,
+reports the slowest modules and the total import time, and fails when the
+median total is over the budget or when one of the heavy dependencies that
+should only load on first use was imported.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE = "controller.scene_controller"
+BUDGET = 1.5
+DEFERRED_MODULES = ("open3d", "cv2", "trimesh", "scipy.spatial", "robot_vision", "vdms")
+
+def build_argparser():
+  parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--module", default=MODULE, help="Module to import")
+  parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+  parser.add_argument("--budget", type=float, default=BUDGET,
+                      help="Maximum median import time in seconds")
+  parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+  return parser
+
+def measureImport(module):
+  """! Imports a module in a fresh interpreter with -X importtime.
+  @param   module  Name of the module to import.
+  @return  Dictionary of imported module names to cumulative import time in seconds.
+  """
+  result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=os.environ.copy())
+  if result.returncode != 0:
+    raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+  times = {}
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "|" not in line:
+      continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    if cumulative.strip().isdigit():
+      times[name.strip()] = int(cumulative) / 1e6
+  return times
+
+def deferredImports(times):
+  return sorted(name for name in times
+                if any(name == deferred or name.startswith(deferred + ".")
+                       for deferred in DEFERRED_MODULES))
+
+def main():
+  args = build_argparser().parse_args()
+
+  runs = [measureImport(args.module) for _ in range(args.runs)]
+  totals = [times[args.module] for times in runs]
+  total = statistics.median(totals)
+
+  slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+  for name, seconds in slowest:
+    print(f"{seconds * 1000:10.1f} ms  {name}")
+  print(f"Import of {args.module}: median {total:.3f} s, min {min(totals):.3f} s,"
+        f" max {max(totals):.3f} s, budget {args.budget:.3f} s")
+
+  failed = False
+  deferred = deferredImports(runs[-1])
+  if deferred:
+    print("Imported at startup:", ", ".join(deferred))
+    failed = True
+  if total > args.budget:
+    print("Import time over budget")
+    failed = True
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""! Allocation and memory benchmark for MovingObject creation.
+
+Simulates the per-frame churn of the scene controller: every frame a batch of
+detections is turned into MovingObjects and mapped to the world, a small share
+of them survives as tracks for a few frames and the rest is discarded after
+matching. Reports allocation volume (tracemalloc), garbage collector activity
+and pauses, and resident set size.
+
+The script only relies on Tracking.createObject(), so it can be run against an
+older tree to get the "before" numbers. The object pool is used when available
+unless --no-pool is given.
+"""
+
+import argparse
+import base64
+import gc
+import resource
+import struct
+import time
+import tracemalloc
+
+from scene_common.camera import Camera
+from controller.tracking import Tracking
+
+try:
+  from controller.moving_object import object_pool
+except ImportError:
+  object_pool = None
+
+CAMERA_ID = "camera1"
+CATEGORY = "person"
+REID_DIMENSIONS = 256
+
+def build_argparser():
+  parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--frames", type=int, default=500, help="Number of frames to simulate")
+  parser.add_argument("--detections", type=int, default=50, help="Detections per frame")
+  parser.add_argument("--survivors", type=float, default=0.1,
+                      help="Share of detections kept as tracks")
+  parser.add_argument("--track_lifetime", type=int, default=30,
+                      help="Number of frames a surviving track is kept")
+  parser.add_argument("--reid", action="store_true", help="Attach a re-id vector to detections")
+  parser.add_argument("--no-pool", dest="pool", action="store_false",
+                      help="Do not return discarded detections to the object pool")
+  return parser
+
+def createCamera():
+  info = {
+    'width': 640,
+    'height': 480,
+    'camera points': [[278, 61], [621, 132], [559, 460], [66, 289]],
+    'map points': [[0.1, 5.38, 0], [3.04, 5.35, 0], [3.05, 2.42, 0], [0.1, 2.45, 0]],
+    'intrinsics': 70,
+  }
+  return Camera(CAMERA_ID, info)
+
+def createDetections(count, frame, reid):
+  detections = []
+  vector = None
+  if reid:
+    vector = base64.b64encode(struct.pack("%df" % REID_DIMENSIONS,
+                                          *[float(x) for x in range(REID_DIMENSIONS)])).decode()
+  for idx in range(count):
+    x = 20 + (idx * 37 + frame) % 560
+    info = {
+      'id': idx + 1,
+      'category': CATEGORY,
+      'confidence': 0.9,
+      'bounding_box_px': {'x': x, 'y': 60, 'width': 60, 'height': 250},
+    }
+    if vector is not None:
+      info['reid'] = vector
+    detections.append(info)
+  return detections
+
+class GCMonitor:
+  def __init__(self):
+    self.collections = [0, 0, 0]
+    self.pause = 0.0
+    self.max_pause = 0.0
+    self._start = None
+    return
+
+  def __call__(self, phase, info):
+    if phase == "start":
+      self._start = time.perf_counter()
+    elif self._start is not None:
+      elapsed = time.perf_counter() - self._start
+      self.pause += elapsed
+      self.max_pause = max(self.max_pause, elapsed)
+      self.collections[info['generation']] += 1
+      self._start = None
+    return
+
+def runBenchmark(args):
+  camera = createCamera()
+  use_pool = args.pool and object_pool is not None
+  keep = max(1, int(args.detections * args.survivors))
+  tracks = []
+
+  monitor = GCMonitor()
+  gc.collect()
+  gc.callbacks.append(monitor)
+  tracemalloc.start()
+  start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  start = time.perf_counter()
+  allocated = 0
+  last_size, _ = tracemalloc.get_traced_memory()
+
+  for frame in range(args.frames):
+    when = 1700000000.0 + frame / 30.0
+    objects = [Tracking.createObject(CATEGORY, info, when, camera)
+               for info in createDetections(args.detections, frame, args.reid)]
+    for obj in objects:
+      obj.sceneLoc
+      if args.reid:
+        obj.reidVector
+    tracks.append(objects[:keep])
+    if len(tracks) > args.track_lifetime:
+      tracks.pop(0)
+    if use_pool:
+      object_pool.release(objects[keep:])
+    del objects
+
+    size, _ = tracemalloc.get_traced_memory()
+    allocated += max(0, size - last_size)
+    last_size = size
+
+  elapsed = time.perf_counter() - start
+  current, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  gc.callbacks.remove(monitor)
+  end_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+  total = args.frames * args.detections
+  print("Object pool:", "enabled" if use_pool else "disabled")
+  print("Detections: %d in %.3f s (%.0f detections/s)" % (total, elapsed, total / elapsed))
+  print("Traced memory: current %.1f KiB, peak %.1f KiB" % (current / 1024, peak / 1024))
+  print("Net growth per frame: %.1f KiB" % (allocated / args.frames / 1024))
+  print("GC collections (gen0, gen1, gen2):", tuple(monitor.collections))
+  print("GC pause: total %.2f ms, max %.3f ms" % (monitor.pause * 1000, monitor.max_pause * 1000))
+  print("Max RSS: %.1f MiB (grew %.1f MiB)" % (end_rss / 1024, (end_rss - start_rss) / 1024))
+  return 0
+
+def main():
+  args = build_argparser().parse_args()
+  return runBenchmark(args)
+
+if __name__ == '__main__':
+  exit(main() or 0)
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""! Synthetic load generator for scene controller stress tests.
+
+Builds a scene with a grid of cameras, regions and tripwires, and simulates
+people walking between random waypoints. Every camera publishes a detector
+message per frame with the people it sees, projected to pixel bounding
+boxes, optionally with re-id vectors, like the DL Streamer adapter does.
+
+The messages go to a broker, to be processed by a controller started with
+the scene written to --scene_output, or to a controller running in this
+process on a LocalPubSub. Sustained throughput and drops are read from the
+Prometheus endpoint of the controller metrics, which the in-process
+controller serves on a free local port. The in-process controller handles
+every message before the next one is published, so a published rate under
+the target is the rate the controller sustains.
+
+    tc_synthetic_load.py --cameras 200 --walkers 2000 --fps 10 --duration 60
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import re
+import socket
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+import numpy as np
+import orjson
+from scipy.spatial.transform import Rotation
+
+from scene_common import latency_trace
+from scene_common.local_pubsub import LocalPubSub
+from scene_common.mqtt import PubSub
+from scene_common.timestamp import get_iso_time
+
+CELL_SIZE = 10.0
+CAMERA_HEIGHT = 4.0
+CAMERA_PITCH = 40.0
+CAMERA_FOV = 70.0
+RESOLUTION = (1280, 720)
+PERSON_HEIGHT = 1.7
+PERSON_WIDTH = 0.5
+REID_SIZE = 256
+REID_VARIANTS = 4
+WALK_SPEED = (0.8, 1.6)
+MAX_PAUSE = 5.0
+MESSAGES_METRIC = "scenescape_controller_mqtt_messages_total"
+DROPPED_METRIC = "scenescape_controller_mqtt_messages_dropped_total"
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+METRIC_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def buildScene(cameras, regions, tripwires, seed=0):
+  """! Builds a scene with cameras on a grid, each looking at the center of
+  its cell, and randomly placed regions and tripwires.
+  @param   cameras    Number of cameras.
+  @param   regions    Number of regions.
+  @param   tripwires  Number of tripwires.
+  @param   seed       Seed for the placement of regions and tripwires.
+  @return  Scene dictionary as read by FileSceneDataSource.
+  """
+  rng = np.random.default_rng(seed)
+  columns = max(1, math.ceil(math.sqrt(cameras)))
+  rows = max(1, math.ceil(cameras / columns))
+  size = (columns * CELL_SIZE, rows * CELL_SIZE)
+  fx = (RESOLUTION[0] / 2) / math.tan(math.radians(CAMERA_FOV / 2))
+  intrinsics = {'fx': fx, 'fy': fx, 'cx': RESOLUTION[0] / 2, 'cy': RESOLUTION[1] / 2}
+  distance = CAMERA_HEIGHT / math.tan(math.radians(CAMERA_PITCH))
+
+  scene_cameras = []
+  for idx in range(cameras):
+    center = np.array([(idx % columns + 0.5) * CELL_SIZE, (idx // columns + 0.5) * CELL_SIZE])
+    yaw = rng.uniform(0, 360)
+    # Looking straight down, tilted up to the pitch and turned to the yaw
+    rotation = Rotation.from_euler('z', yaw, degrees=True) \
+      * Rotation.from_euler('x', -(90 + CAMERA_PITCH), degrees=True)
+    forward = rotation.apply([0, 0, 1])[:2]
+    position = center - forward / np.linalg.norm(forward) * distance
+    scene_cameras.append({
+      'uid': f"camera{idx + 1}",
+      'name': f"camera{idx + 1}",
+      'resolution': list(RESOLUTION),
+      'intrinsics': intrinsics,
+      'translation': [float(position[0]), float(position[1]), CAMERA_HEIGHT],
+      'rotation': rotation.as_quat().tolist(),
+      'scale': [1.0, 1.0, 1.0],
+    })
+
+  scene_regions = []
+  for idx in range(regions):
+    width, height = rng.uniform(2, 6, size=2)
+    x, y = rng.uniform(0, size[0] - width), rng.uniform(0, size[1] - height)
+    scene_regions.append({'uid': f"region{idx + 1}", 'name': f"region{idx + 1}",
+                          'points': [[x, y], [x + width, y], [x + width, y + height],
+                                     [x, y + height]]})
+
+  scene_tripwires = []
+  for idx in range(tripwires):
+    start = rng.uniform((0, 0), size)
+    angle = rng.uniform(0, 2 * math.pi)
+    end = np.clip(start + 4 * np.array([math.cos(angle), math.sin(angle)]), 0, size)
+    scene_tripwires.append({'uid': f"tripwire{idx + 1}", 'name': f"tripwire{idx + 1}",
+                            'points': [start.tolist(), end.tolist()]})
+
+  return {
+    'uid': "synthetic-load",
+    'name': "Synthetic Load",
+    'scale': 100.0,
+    'regulated_rate': 30,
+    'external_update_rate': 30,
+    'size': list(size),
+    'cameras': scene_cameras,
+    'regions': scene_regions,
+    'tripwires': scene_tripwires,
+  }
+
+def projectionMatrices(scene):
+  """! Computes the world to pixel projection of every camera.
+  @param   scene  Scene dictionary from buildScene.
+  @return  Array of shape (cameras, 3, 4).
+  """
+  matrices = []
+  for camera in scene['cameras']:
+    intrinsics = camera['intrinsics']
+    k_mat = np.array([[intrinsics['fx'], 0, intrinsics['cx']],
+                      [0, intrinsics['fy'], intrinsics['cy']],
+                      [0, 0, 1]])
+    rmat = Rotation.from_quat(camera['rotation']).as_matrix()
+    world_to_camera = np.hstack((rmat.T, -rmat.T @ np.array(camera['translation']).reshape(3, 1)))
+    matrices.append(k_mat @ world_to_camera)
+  return np.array(matrices)
+
+class Walkers:
+  """! People walking between random waypoints with a random speed each,
+  turning smoothly and pausing now and then at a waypoint."""
+
+  def __init__(self, count, size, reid=False, seed=0):
+    self.rng = np.random.default_rng(seed)
+    self.size = np.array(size, dtype=float)
+    self.positions = self.rng.uniform((0, 0), self.size, size=(count, 2))
+    self.targets = self.rng.uniform((0, 0), self.size, size=(count, 2))
+    self.speeds = self.rng.uniform(*WALK_SPEED, size=count)
+    self.headings = self.rng.uniform(0, 2 * math.pi, size=count)
+    self.paused = np.zeros(count)
+    self.reid = None
+    if reid:
+      # A few noisy variants of one vector per walker, encoded once
+      base = self.rng.normal(size=(count, REID_SIZE)).astype(np.float32)
+      self.reid = [[base64.b64encode((vector + self.rng.normal(scale=0.05, size=REID_SIZE))
+                                     .astype(np.float32).tobytes()).decode()
+                    for _ in range(REID_VARIANTS)] for vector in base]
+    return
+
+  def step(self, dt):
+    """! Moves the walkers dt seconds ahead."""
+    self.paused = np.maximum(self.paused - dt, 0)
+    moving = self.paused == 0
+    offset = self.targets - self.positions
+    wanted = np.arctan2(offset[:, 1], offset[:, 0])
+    turn = (wanted - self.headings + math.pi) % (2 * math.pi) - math.pi
+    self.headings += np.clip(turn, -math.pi * dt, math.pi * dt)
+    direction = np.stack((np.cos(self.headings), np.sin(self.headings)), axis=1)
+    self.positions += direction * (self.speeds * dt * moving)[:, None]
+    self.positions = np.clip(self.positions, 0, self.size)
+
+    arrived = np.linalg.norm(self.targets - self.positions, axis=1) < 0.5
+    count = int(arrived.sum())
+    if count:
+      self.targets[arrived] = self.rng.uniform((0, 0), self.size, size=(count, 2))
+      self.paused[arrived] = np.where(self.rng.random(count) < 0.3,
+                                      self.rng.uniform(0, MAX_PAUSE, size=count), 0)
+    return
+
+  def pixelBoxes(self, projections):
+    """! Projects the walkers into every camera.
+    @param   projections  Array of shape (cameras, 3, 4) from projectionMatrices.
+    @return  Boolean visibility and x, y, width, height in pixels, each of shape (cameras, walkers).
+    """
+    count = len(self.positions)
+    feet = np.hstack((self.positions, np.zeros((count, 1)), np.ones((count, 1))))
+    heads = feet.copy()
+    heads[:, 2] = PERSON_HEIGHT
+    feet_px = projections @ feet.T
+    heads_px = projections @ heads.T
+    in_front = (feet_px[:, 2] > 0.1) & (heads_px[:, 2] > 0.1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      foot_u, foot_v = feet_px[:, 0] / feet_px[:, 2], feet_px[:, 1] / feet_px[:, 2]
+      head_v = heads_px[:, 1] / heads_px[:, 2]
+      height = foot_v - head_v
+      width = height * PERSON_WIDTH / PERSON_HEIGHT
+    visible = in_front & (height > 8) & (foot_u - width / 2 >= 0) & (foot_u + width / 2 < RESOLUTION[0]) \
+      & (head_v >= 0) & (foot_v < RESOLUTION[1])
+    return visible, foot_u - width / 2, head_v, width, height
+
+class LoadGenerator:
+  """! Publishes one detector message per camera and frame at a fixed rate.
+  Cameras are spread evenly over each frame interval."""
+
+  def __init__(self, scene, walkers, fps, publish):
+    self.cameras = [camera['uid'] for camera in scene['cameras']]
+    self.projections = projectionMatrices(scene)
+    self.walkers = walkers
+    self.fps = fps
+    self.publish = publish
+    self.sent = 0
+    self.detections = 0
+    self.late = 0
+    return
+
+  def buildMessages(self, now):
+    visible, xs, ys, widths, heights = self.walkers.pixelBoxes(self.projections)
+    reid = self.walkers.reid
+    variant = self.sent % REID_VARIANTS
+    for cam_idx, camera in enumerate(self.cameras):
+      objects = []
+      for obj_idx, walker in enumerate(np.flatnonzero(visible[cam_idx])):
+        obj = {
+          'id': obj_idx + 1,
+          'category': "person",
+          'confidence': 0.9,
+          'bounding_box_px': {'x': float(xs[cam_idx, walker]), 'y': float(ys[cam_idx, walker]),
+                              'width': float(widths[cam_idx, walker]),
+                              'height': float(heights[cam_idx, walker])},
+        }
+        if reid is not None:
+          obj['reid'] = reid[walker][variant]
+        objects.append(obj)
+      yield camera, {'id': camera, 'timestamp': get_iso_time(now), 'rate': self.fps,
+                     'objects': {'person': objects}}
+    return
+
+  def run(self, duration):
+    """! Publishes for duration seconds.
+    @return  Seconds actually taken.
+    """
+    interval = 1.0 / self.fps
+    spacing = interval / len(self.cameras)
+    start = time.monotonic()
+    frame = 0
+    while time.monotonic() - start < duration:
+      frame_start = start + frame * interval
+      for cam_idx, (camera, message) in enumerate(self.buildMessages(time.time())):
+        delay = frame_start + cam_idx * spacing - time.monotonic()
+        if delay > 0:
+          time.sleep(delay)
+        elif delay < -interval:
+          self.late += 1
+        self.detections += len(message['objects']['person'])
+        latency_trace.stampStage(message, latency_trace.STAGE_ADAPTER_PUBLISH)
+        self.publish(PubSub.formatTopic(PubSub.DATA_CAMERA, camera_id=camera), orjson.dumps(message))
+        self.sent += 1
+      frame += 1
+      self.walkers.step(interval)
+    return time.monotonic() - start
+
+def readMetrics(url):
+  """! Reads the metrics of a Prometheus text endpoint.
+  @param   url  URL of the metrics endpoint.
+  @return  Dictionary of metric name to dictionary of label tuples to value.
+  """
+  with urllib.request.urlopen(url, timeout=5) as response:
+    return parseMetrics(response.read().decode())
+
+def parseMetrics(text):
+  """! Parses metrics in the Prometheus text format.
+  @param   text  Metrics as served by the endpoint.
+  @return  Dictionary of metric name to dictionary of label tuples to value.
+  """
+  values = defaultdict(dict)
+  for line in text.splitlines():
+    match = METRIC_LINE.match(line)
+    if match is None:
+      continue
+    name, labels, value = match.groups()
+    values[name][tuple(sorted(METRIC_LABEL.findall(labels or "")))] = float(value)
+  return values
+
+def metricDelta(before, after, name, label=None):
+  """! Sums the increase of a counter, by the value of one label when given."""
+  totals = defaultdict(float)
+  for labels, value in after.get(name, {}).items():
+    key = dict(labels).get(label, "") if label else ""
+    totals[key] += value - before.get(name, {}).get(labels, 0.0)
+  return dict(totals)
+
+def freePort():
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    return sock.getsockname()[1]
+
+def startLocalController(scene_file, args):
+  """! Starts a controller in this process on a LocalPubSub, with metrics
+  served on a free local port.
+  @return  The LocalPubSub and the metrics URL.
+  """
+  port = freePort()
+  os.environ["CONTROLLER_ENABLE_METRICS"] = "true"
+  os.environ["CONTROLLER_METRICS_PROMETHEUS_PORT"] = str(port)
+  os.environ["CONTROLLER_METRICS_PROMETHEUS_ADDR"] = "127.0.0.1"
+
+  from controller.observability import metrics
+  from controller.scene_controller import SceneController
+
+  metrics.init()
+  pubsub = LocalPubSub()
+  SceneController(False, False, args.maxlag, None, None, None, None, None, None, None,
+                  args.tracker_config_file, args.schema_file, "regulated", [scene_file],
+                  pubsub=pubsub)
+  pubsub.loopStart()
+  return pubsub, f"http://127.0.0.1:{port}/metrics"
+
+def build_argparser():
+  controller_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "controller")
+  parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--cameras", type=int, default=200, help="Number of cameras")
+  parser.add_argument("--walkers", type=int, default=2000, help="Number of simulated people")
+  parser.add_argument("--regions", type=int, default=20, help="Number of regions")
+  parser.add_argument("--tripwires", type=int, default=10, help="Number of tripwires")
+  parser.add_argument("--fps", type=float, default=10, help="Frames per second of every camera")
+  parser.add_argument("--duration", type=float, default=60, help="Seconds to publish")
+  parser.add_argument("--reid", action="store_true", help="Add re-id vectors to the detections")
+  parser.add_argument("--seed", type=int, default=0, help="Seed of the scene and the walkers")
+  parser.add_argument("--scene_output", help="Write the scene JSON to this file")
+  parser.add_argument("--scene_only", action="store_true",
+                      help="Only write the scene to --scene_output, to start a controller with")
+  parser.add_argument("--latency", action="store_true",
+                      help="Subscribe to the scene output and report latency percentiles")
+  parser.add_argument("--broker", help="Publish to this broker instead of a controller in this process")
+  parser.add_argument("--rootcert", default="/run/secrets/certs/scenescape-ca.pem",
+                      help="Path to the broker CA certificate")
+  parser.add_argument("--auth", help="user:password or path to a JSON file with credentials,"
+                      " admin with $SUPASS when not set")
+  parser.add_argument("--metrics_url", help="Prometheus endpoint of the controller metrics when"
+                      " publishing to a broker, e.g. http://scene:9464/metrics")
+  parser.add_argument("--max_drop_ratio", type=float,
+                      help="Fail when the controller drops more than this ratio of the messages")
+  parser.add_argument("--maxlag", type=float, default=1.0,
+                      help="Maximum lag in seconds of the controller in this process")
+  parser.add_argument("--tracker_config_file", help="JSON file with tracker configuration",
+                      default=os.path.join(controller_dir, "config", "tracker-config.json"))
+  parser.add_argument("--schema_file", help="JSON file with metadata schema",
+                      default=os.path.join(controller_dir, "src", "schema", "metadata.schema.json"))
+  return parser
+
+def main():
+  args = build_argparser().parse_args()
+  scene = buildScene(args.cameras, args.regions, args.tripwires, args.seed)
+  scene_file = args.scene_output or os.path.join(tempfile.mkdtemp(), "synthetic-scene.json")
+  with open(scene_file, "w") as f:
+    json.dump(scene, f)
+  print(f"Scene with {args.cameras} cameras, {args.regions} regions, {args.tripwires} tripwires,"
+        f" {scene['size'][0]:.0f} x {scene['size'][1]:.0f} m, written to {scene_file}")
+  if args.scene_only:
+    return 0
+
+  if args.broker:
+    auth = args.auth or f"admin:{os.getenv('SUPASS')}"
+    pubsub = PubSub(auth, None, args.rootcert, args.broker)
+    pubsub.connect()
+    pubsub.loopStart()
+    metrics_url = args.metrics_url
+  else:
+    pubsub, metrics_url = startLocalController(scene_file, args)
+
+  latency_stats = None
+  if args.latency:
+    from tests.perf_tests.scene_perf.scene_latency_recorder import LatencyStats
+    latency_stats = LatencyStats()
+    pubsub.addCallback(PubSub.formatTopic(PubSub.DATA_SCENE, scene_id=scene['uid'], thing_type="+"),
+                       lambda client, userdata, msg: latency_stats.add(orjson.loads(msg.payload)))
+
+  walkers = Walkers(args.walkers, scene['size'], args.reid, args.seed)
+  generator = LoadGenerator(scene, walkers, args.fps, pubsub.publish)
+  before = None
+  if metrics_url:
+    try:
+      before = readMetrics(metrics_url)
+    except OSError as e:
+      print(f"Cannot read controller metrics from {metrics_url}: {e}")
+      metrics_url = None
+  elapsed = generator.run(args.duration)
+  if metrics_url:
+    # Let the last messages go through
+    time.sleep(1)
+    after = readMetrics(metrics_url)
+  if args.broker:
+    pubsub.loopStop()
+
+  target = args.cameras * args.fps
+  print(f"Published {generator.sent} messages with {generator.detections} detections in"
+        f" {elapsed:.1f} s, {generator.sent / elapsed:.1f} messages/s of {target:.1f} targeted")
+  if generator.late:
+    print(f"{generator.late} messages published more than a frame late")
+  result = 0
+  if metrics_url:
+    processed = sum(metricDelta(before, after, MESSAGES_METRIC).values())
+    dropped = metricDelta(before, after, DROPPED_METRIC, "reason")
+    total_dropped = sum(dropped.values())
+    print(f"Controller processed {processed:.0f} messages, {processed / elapsed:.1f} messages/s")
+    print(f"Controller dropped {total_dropped:.0f} messages"
+          + "".join(f", {count:.0f} {reason}" for reason, count in sorted(dropped.items())))
+    if args.max_drop_ratio is not None and processed \
+       and total_dropped / processed > args.max_drop_ratio:
+      print(f"FAIL: drop ratio {total_dropped / processed:.3f} over {args.max_drop_ratio}")
+      result = 1
+  else:
+    print("No controller metrics, set --metrics_url to report processed and dropped messages")
+  if latency_stats is not None:
+    latency_stats.report()
+  return result
+
+if __name__ == '__main__':
+  sys.exit(main())
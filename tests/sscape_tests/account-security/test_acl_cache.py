@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from manager.acl import acl_cache, grantedAccess
+from manager.models import PubSubACL
+from scene_common.options import READ_ONLY, WRITE_ONLY, READ_AND_WRITE, CAN_SUBSCRIBE
+
+CAMERA_TOPIC = "scenescape/data/camera/camera1"
+
+class ACLCacheTestCase(TestCase):
+  """! Checks that broker authorization decisions are cached and that the
+  cache is invalidated when the ACLs of a user change."""
+
+  def setUp(self):
+    acl_cache.clear()
+    self.user = User.objects.create_user('camera_user', 'camera_user@intel.com', 'testpassword')
+    self.client = APIClient()
+    return
+
+  def check(self, topic=CAMERA_TOPIC, access=WRITE_ONLY, username='camera_user'):
+    return self.client.post('/api/v1/aclcheck', {'username': username, 'topic': topic,
+                                                  'acc': access}, format='json')
+
+  def test_decision_cached(self):
+    PubSubACL.objects.create(user=self.user, topic='DATA_CAMERA', access=READ_AND_WRITE)
+    response = self.check()
+    self.assertEqual(response.json(), {'result': 'allow', 'acc': WRITE_ONLY})
+
+    with CaptureQueriesContext(connection) as context:
+      response = self.check()
+      other = self.check(topic="scenescape/data/camera/camera2")
+    self.assertEqual(response.json(), {'result': 'allow', 'acc': WRITE_ONLY})
+    self.assertEqual(other.json(), {'result': 'allow', 'acc': WRITE_ONLY})
+    self.assertEqual(len(context.captured_queries), 0)
+    return
+
+  def test_invalidated_on_acl_change(self):
+    acl = PubSubACL.objects.create(user=self.user, topic='DATA_CAMERA', access=READ_ONLY)
+    self.assertEqual(self.check().status_code, 403)
+
+    acl.access = WRITE_ONLY
+    acl.save()
+    self.assertEqual(self.check().json(), {'result': 'allow', 'acc': WRITE_ONLY})
+
+    acl.delete()
+    self.assertEqual(self.check().status_code, 403)
+    return
+
+  def test_invalidated_on_user_change(self):
+    self.assertEqual(self.check().status_code, 403)
+    self.user.is_superuser = True
+    self.user.save()
+    self.assertEqual(self.check().json(), {'result': 'allow', 'acc': READ_AND_WRITE})
+    return
+
+  def test_last_match_wins(self):
+    PubSubACL.objects.create(user=self.user, topic='DATA_CAMERA', access=READ_ONLY)
+    PubSubACL.objects.create(user=self.user, topic='CMD_CAMERA', access=WRITE_ONLY)
+    self.assertEqual(self.check(access=CAN_SUBSCRIBE).json(),
+                     {'result': 'allow', 'acc': CAN_SUBSCRIBE})
+    self.assertEqual(self.check(topic="scenescape/data/camera/a/b").status_code, 403)
+    return
+
+  def test_missing_parameters(self):
+    response = self.client.post('/api/v1/aclcheck', {'username': 'camera_user'}, format='json')
+    self.assertEqual(response.status_code, 400)
+    return
+
+  def test_granted_access(self):
+    expected = {
+      (READ_AND_WRITE, CAN_SUBSCRIBE): CAN_SUBSCRIBE,
+      (READ_AND_WRITE, WRITE_ONLY): WRITE_ONLY,
+      (READ_AND_WRITE, READ_ONLY): CAN_SUBSCRIBE,
+      (CAN_SUBSCRIBE, READ_ONLY): CAN_SUBSCRIBE,
+      (READ_ONLY, CAN_SUBSCRIBE): CAN_SUBSCRIBE,
+    }
+    accesses = (READ_ONLY, WRITE_ONLY, READ_AND_WRITE, CAN_SUBSCRIBE)
+    for acl_access in accesses:
+      for requested in accesses:
+        if acl_access == requested:
+          granted = requested
+        else:
+          granted = expected.get((acl_access, requested))
+        self.assertEqual(grantedAccess(acl_access, requested), granted)
+    return
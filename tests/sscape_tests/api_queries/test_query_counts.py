@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from manager.models import Cam, ChildScene, Region, RegionOccupancyThreshold, RegionPoint, \
+  Scene, SingletonAreaPoint, SingletonScalarThreshold, SingletonSensor, Tripwire, TripwirePoint
+
+class QueryCountTestCase(TestCase):
+  """! Checks that the number of queries needed to serialize things does not
+  grow with the number of things. Each test measures a request, adds more
+  things and expects the same request to issue the same number of queries."""
+
+  def setUp(self):
+    self.user = User.objects.create_superuser('test_user', 'test_user@intel.com', 'testpassword')
+    self.client = APIClient()
+    self.client.force_authenticate(user=self.user)
+    self.scene_count = 0
+    return
+
+  def createScene(self, cameras=2, regions=2, tripwires=1, sensors=1):
+    idx = self.scene_count
+    self.scene_count += 1
+    scene = Scene.objects.create(name=f"scene_{idx}", map="test_map")
+    for cam in range(cameras):
+      Cam.objects.create(sensor_id=f"cam_{idx}_{cam}", name=f"cam_{idx}_{cam}", scene=scene)
+    for sensor_idx in range(sensors):
+      sensor = SingletonSensor.objects.create(sensor_id=f"sensor_{idx}_{sensor_idx}",
+                                              name=f"sensor_{idx}_{sensor_idx}",
+                                              scene=scene, area="poly")
+      SingletonScalarThreshold.objects.create(singleton=sensor, sectors=[], range_max=5)
+      for seq in range(3):
+        SingletonAreaPoint.objects.create(singleton=sensor, sequence=seq, x=seq, y=seq)
+    for region_idx in range(regions):
+      region = Region.objects.create(name=f"region_{idx}_{region_idx}", scene=scene)
+      RegionOccupancyThreshold.objects.create(region=region, sectors=[], range_max=5)
+      for seq in (2, 0, 1):
+        RegionPoint.objects.create(region=region, sequence=seq, x=seq, y=seq)
+    for tripwire_idx in range(tripwires):
+      tripwire = Tripwire.objects.create(name=f"tripwire_{idx}_{tripwire_idx}", scene=scene)
+      for seq in range(2):
+        TripwirePoint.objects.create(tripwire=tripwire, sequence=seq, x=seq, y=seq)
+    return scene
+
+  def countQueries(self, url):
+    # The first request for a new scene builds the scene model cached by
+    # SceneLoader, only count the queries of a warm request
+    self.client.get(url)
+    with CaptureQueriesContext(connection) as context:
+      response = self.client.get(url)
+    self.assertEqual(response.status_code, 200)
+    return len(context.captured_queries)
+
+  def assertConstantQueries(self, url, grow):
+    grow()
+    baseline = self.countQueries(url)
+    for _ in range(3):
+      grow()
+    self.assertEqual(self.countQueries(url), baseline)
+    return
+
+  def test_scene_list(self):
+    self.assertConstantQueries('/api/v1/scenes', self.createScene)
+    return
+
+  def test_scene_list_with_children(self):
+    def grow():
+      parent = self.createScene()
+      ChildScene.objects.create(parent=parent, child=self.createScene())
+      return
+    self.assertConstantQueries('/api/v1/scenes', grow)
+    return
+
+  def test_scene_config(self):
+    self.assertConstantQueries('/api/v1/scenes/config', self.createScene)
+    return
+
+  def test_scene_detail(self):
+    scene = self.createScene(cameras=1, regions=1, tripwires=1, sensors=1)
+    baseline = self.countQueries(f'/api/v1/scene/{scene.pk}')
+    scene.delete()
+
+    scene = self.createScene(cameras=5, regions=5, tripwires=5, sensors=5)
+    self.assertEqual(self.countQueries(f'/api/v1/scene/{scene.pk}'), baseline)
+    return
+
+  def test_thing_lists(self):
+    for url in ('/api/v1/cameras', '/api/v1/sensors', '/api/v1/regions', '/api/v1/tripwires'):
+      with self.subTest(url=url):
+        self.assertConstantQueries(url, self.createScene)
+    return
+
+  def test_region_points_in_sequence(self):
+    scene = self.createScene(regions=1)
+    response = self.client.get(f'/api/v1/scene/{scene.pk}')
+    self.assertEqual(response.json()['regions'][0]['points'], [[0, 0], [1, 1], [2, 2]])
+    return
+
+  def test_roi_and_tripwire_json(self):
+    scene = self.createScene(regions=1, tripwires=1)
+    with CaptureQueriesContext(connection) as context:
+      scene.roiJSON()
+      scene.tripwireJSON()
+    baseline = len(context.captured_queries)
+
+    scene = self.createScene(regions=5, tripwires=5)
+    with CaptureQueriesContext(connection) as context:
+      scene.roiJSON()
+      scene.tripwireJSON()
+    self.assertEqual(len(context.captured_queries), baseline)
+    return
@@ -260,3 +260,55 @@ def test_getHeading():
     error = np.linalg.norm(calc_pt - expected_outputs[i])
     assert error < 1  # degrees
   return
+
+def test_convertLLAToECEFArray():
+  """! Verifies that the array conversion matches the single point conversion. """
+  lla_pts = np.random.rand(1000, 3) * np.array([180.0, 360.0, 1000.0]) \
+    - np.array([90.0, 180.0, 500.0])
+  calc_pts = earth_lla.convertLLAToECEFArray(lla_pts)
+  assert calc_pts.shape == (1000, 3)
+  for i, pt in enumerate(lla_pts):
+    assert np.linalg.norm(calc_pts[i] - earth_lla.convertLLAToECEF(pt)) < 1e-6
+  return
+
+def test_convertECEFToLLAArray():
+  """! Verifies that the array conversion matches the single point conversion,
+  including the points close to the center of the earth where both fall back
+  to the spherical approximation. """
+  lla_pts = np.random.rand(1000, 3) * np.array([170.0, 360.0, 1000.0]) \
+    - np.array([85.0, 180.0, 500.0])
+  ecef_pts = np.vstack([earth_lla.convertLLAToECEFArray(lla_pts),
+                        [[100.0, 200.0, 300.0], [-5000.0, 10.0, -20.0]]])
+  calc_pts = earth_lla.convertECEFToLLAArray(ecef_pts)
+  for i, pt in enumerate(ecef_pts):
+    expected = earth_lla.convertECEFToLLA(pt)
+    assert np.allclose(calc_pts[i], expected, rtol=0, atol=1e-8)
+  return
+
+def test_convertXYZToLLAArray(lla_datafile):
+  """! Verifies batch conversion of scene points against the single point version. """
+  with open(lla_datafile, 'r') as f:
+    inputs = json.load(f)
+  for input in inputs:
+    trs_mat = earth_lla.calculateTRSLocal2LLAFromSurfacePoints(input['map points'][:4],
+                                                               input['lat, long, altitude points'][:4])
+    map_pts = np.random.rand(100, 3) * np.array([200.0, 200.0, 10.0])
+    calc_pts = earth_lla.convertXYZToLLAArray(trs_mat, map_pts)
+    for i, pt in enumerate(map_pts):
+      assert calcLLAError(calc_pts[i], earth_lla.convertXYZToLLA(trs_mat, pt)) < 1e-6
+  return
+
+def test_calculateHeadingArray(lla_datafile):
+  """! Verifies batch heading calculation against the single point version. """
+  with open(lla_datafile, 'r') as f:
+    inputs = json.load(f)
+  trs_mat = earth_lla.calculateTRSLocal2LLAFromSurfacePoints(inputs[0]['map points'][:4],
+                                                             inputs[0]['lat, long, altitude points'][:4])
+  map_pts = np.random.rand(100, 3) * np.array([200.0, 200.0, 10.0])
+  velocities = np.random.rand(100, 3) * 20 - 10
+  headings = earth_lla.calculateHeadingArray(trs_mat, map_pts, velocities)
+  for i, pt in enumerate(map_pts):
+    expected = earth_lla.calculateHeading(trs_mat, pt, velocities[i])
+    diff = abs(headings[i] - expected) % 360
+    assert min(diff, 360 - diff) < 1e-6  # degrees
+  return
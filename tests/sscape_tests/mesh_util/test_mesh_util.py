@@ -10,10 +10,13 @@ import open3d as o3d
 import pytest
 
 from scene_common.geometry import Region, Point
-from scene_common.mesh_util import createRegionMesh, createObjectMesh, mergeMesh
+from scene_common import mesh_util
+from scene_common.mesh_util import createRegionMesh, createObjectMesh, mergeMesh, \
+  extractCachedTriangleMesh, extractTriangleMesh
 
 dir = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA = os.path.join(dir, "test_data/scene.glb")
+TEST_MAP = os.path.join(dir, "../../../sample_data/scene.png")
 
 @pytest.mark.parametrize("input,expected", [
   (TEST_DATA, 1),
@@ -95,3 +98,29 @@ def test_create_object_mesh():
   assert bbox_max[1] - bbox_min[1] == pytest.approx(size[1])
   assert bbox_max[2] - bbox_min[2] == pytest.approx(size[2])
 
+
+@pytest.mark.parametrize("map_info", [
+  [TEST_MAP, 100],
+  [TEST_DATA],
+])
+def test_cached_triangle_mesh(map_info, tmp_path, monkeypatch):
+  expected, _ = extractTriangleMesh(list(map_info))
+  mesh = extractCachedTriangleMesh(list(map_info), cache_dir=str(tmp_path))
+  assert len(os.listdir(tmp_path)) == 1
+
+  def notExtracted(map_info, rotation=None):
+    raise AssertionError("Mesh extracted again")
+  monkeypatch.setattr(mesh_util, 'extractTriangleMesh', notExtracted)
+  cached = extractCachedTriangleMesh(list(map_info), cache_dir=str(tmp_path))
+  for result in (mesh, cached):
+    assert np.array_equal(result.vertex.positions.numpy(), expected.vertex.positions.numpy())
+    assert np.array_equal(result.triangle.indices.numpy(), expected.triangle.indices.numpy())
+  return
+
+def test_cached_triangle_mesh_keyed_by_scale(tmp_path):
+  small = extractCachedTriangleMesh([TEST_MAP, 100], cache_dir=str(tmp_path))
+  large = extractCachedTriangleMesh([TEST_MAP, 50], cache_dir=str(tmp_path))
+  assert len(os.listdir(tmp_path)) == 2
+  assert np.allclose(large.vertex.positions.numpy().max(axis=0)[:2],
+                     2 * small.vertex.positions.numpy().max(axis=0)[:2])
+  return
@@ -0,0 +1,140 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import os
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from scene_common import mqtt as mqtt_module
+from scene_common.mqtt import CHUNK_HEADER, PubSub
+
+class FakeBroker:
+  """! Delivers messages between clients from a separate thread, dropping the
+  first delivery of the chunks listed in drop."""
+
+  def __init__(self, drop=()):
+    self.callbacks = {}
+    self.drop = set(drop)
+    self.messages = queue.Queue()
+    self.thread = threading.Thread(target=self.deliver, daemon=True)
+    self.thread.start()
+    return
+
+  def deliver(self):
+    while True:
+      topic, payload = self.messages.get()
+      callback = self.callbacks.get(topic)
+      if callback is not None:
+        callback(None, None, SimpleNamespace(topic=topic, payload=payload))
+    return
+
+  def publish(self, topic, payload):
+    if isinstance(payload, bytes) and len(payload) >= 12:
+      idx = mqtt_module.struct.unpack(CHUNK_HEADER, payload[:12])[3]
+      if idx in self.drop:
+        self.drop.discard(idx)
+        return
+    self.messages.put((topic, payload))
+    return
+
+class FakePubSub(PubSub):
+  def __init__(self, broker):
+    self.broker = broker
+    return
+
+  def addCallback(self, topic, callback, qos=0):
+    self.broker.callbacks[topic] = callback
+    return
+
+  def removeCallback(self, topic):
+    self.broker.callbacks.pop(topic, None)
+    return
+
+  def publish(self, topic, payload, qos=0, retain=False):
+    self.broker.publish(topic, payload)
+    return
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+  monkeypatch.setattr(mqtt_module, 'CHUNK_SIZE', 1000)
+  monkeypatch.setattr(mqtt_module, 'CHUNK_ACK_TIMEOUT', 0.2)
+  return
+
+def transfer(broker, data, output=None, window=4):
+  sender = FakePubSub(broker)
+  receiver = FakePubSub(broker)
+  result = {}
+  thread = threading.Thread(target=lambda: result.update(
+    received=receiver.receiveFile("scenescape/channel/test", timeout=1, output=output)))
+  thread.start()
+  while "scenescape/channel/test" not in broker.callbacks:
+    pass
+  sent = sender.sendFile("scenescape/channel/test", io.BytesIO(data), window=window, timeout=2)
+  thread.join()
+  return sent, result['received']
+
+def test_windowed_transfer():
+  """! Verifies that a file is received intact with acknowledged chunks. """
+  data = os.urandom(10500)
+  sent, received = transfer(FakeBroker(), data)
+  assert sent
+  assert bytes(received) == data
+  return
+
+def test_lost_chunks_resent():
+  """! Verifies that chunks lost on the way are sent again. """
+  data = os.urandom(10500)
+  sent, received = transfer(FakeBroker(drop={0, 3, 10}), data)
+  assert sent
+  assert bytes(received) == data
+  return
+
+def test_window_bounded():
+  """! Verifies that no more than the window of chunks is unacknowledged. """
+  broker = FakeBroker()
+  sent = []
+  acked = set()
+  original = broker.publish
+  def publish(topic, payload):
+    if topic.endswith("-ack"):
+      acked.update(mqtt_module.json.loads(payload).get('ack', []))
+    else:
+      idx = mqtt_module.struct.unpack(CHUNK_HEADER, payload[:12])[3]
+      sent.append(idx)
+      assert len(set(sent) - acked) <= 2
+    original(topic, payload)
+    return
+  broker.publish = publish
+
+  data = os.urandom(10500)
+  assert transfer(broker, data, window=2)[0]
+  return
+
+def test_stream_to_file(tmp_path):
+  """! Verifies that chunks can be written straight to a file. """
+  data = os.urandom(5500)
+  path = str(tmp_path / "video.mp4")
+  sent, received = transfer(FakeBroker(), data, output=path)
+  assert received == path
+  with open(path, "rb") as f:
+    assert f.read() == data
+  return
+
+def test_stream_to_buffer():
+  """! Verifies that chunks can be written into a preallocated buffer. """
+  data = os.urandom(5500)
+  buffer = bytearray(len(data))
+  sent, received = transfer(FakeBroker(), data, output=memoryview(buffer))
+  assert buffer == data
+  return
+
+def test_unwindowed_transfer():
+  """! Verifies that a sender without flow control is still understood. """
+  data = os.urandom(3500)
+  sent, received = transfer(FakeBroker(), data, window=0)
+  assert bytes(received) == data
+  return
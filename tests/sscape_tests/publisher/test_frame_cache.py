@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from manager.frame_cache import FrameCache
+
+class FakePublisher:
+  def __init__(self):
+    self.callbacks = {}
+    self.published = []
+    return
+
+  def subscribe(self, topic, callback, qos=0):
+    self.callbacks[topic] = callback
+    return True
+
+  def publish(self, topic, payload, qos=0):
+    self.published.append((topic, payload))
+    return
+
+  def sendFrame(self, camera, timestamp):
+    message = SimpleNamespace(topic=f"scenescape/image/camera/{camera}",
+                              payload=json.dumps({'id': camera, 'timestamp': timestamp,
+                                                  'image': "aW1hZ2U="}).encode())
+    self.callbacks["scenescape/image/camera/+"](None, None, message)
+    return
+
+@pytest.fixture
+def publisher():
+  return FakePublisher()
+
+def test_served_from_cache(publisher):
+  """! Verifies that a recent frame is returned without asking the camera. """
+  cache = FrameCache(publisher, ttl=10)
+  cache.subscribe()
+  publisher.sendFrame("camera1", "t1")
+
+  assert cache.getFrame("camera1")['timestamp'] == "t1"
+  assert publisher.published == []
+  return
+
+def test_stale_frame_refreshed(publisher):
+  """! Verifies that an old frame is served while a new one is requested once. """
+  cache = FrameCache(publisher, ttl=0)
+  cache.subscribe()
+  publisher.sendFrame("camera1", "t1")
+
+  cache.ttl = 10
+  cache.frames["camera1"] = (cache.frames["camera1"][0], time.monotonic() - 11)
+  assert cache.getFrame("camera1")['timestamp'] == "t1"
+  assert cache.getFrame("camera1")['timestamp'] == "t1"
+  assert publisher.published == [("scenescape/cmd/camera/camera1", "getimage")]
+  return
+
+def test_cold_camera_waits(publisher):
+  """! Verifies that concurrent requests for an unknown camera share one request. """
+  cache = FrameCache(publisher)
+  results = []
+  threads = [threading.Thread(target=lambda: results.append(cache.getFrame("camera2", wait=2)))
+             for _ in range(4)]
+  for thread in threads:
+    thread.start()
+  time.sleep(0.1)
+  publisher.sendFrame("camera2", "t2")
+  for thread in threads:
+    thread.join()
+
+  assert [frame['timestamp'] for frame in results] == ["t2"] * 4
+  assert publisher.published == [("scenescape/cmd/camera/camera2", "getimage")]
+  return
+
+def test_no_wait(publisher):
+  """! Verifies that a request without wait returns immediately on a miss. """
+  cache = FrameCache(publisher)
+  start = time.monotonic()
+  assert cache.getFrame("camera3") is None
+  assert time.monotonic() - start < 0.5
+  return
+
+def test_invalid_frame(publisher):
+  """! Verifies that frames are only decoded when requested and that an
+  invalid frame is not served. """
+  cache = FrameCache(publisher, ttl=10)
+  cache.subscribe()
+  message = SimpleNamespace(topic="scenescape/image/camera/camera4", payload=b"{not json")
+  publisher.callbacks["scenescape/image/camera/+"](None, None, message)
+
+  assert cache.frames["camera4"][0] == b"{not json"
+  assert cache.getFrame("camera4") is None
+  return
@@ -0,0 +1,137 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+from types import SimpleNamespace
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from manager import publisher as publisher_module
+from manager.publisher import ManagerPublisher, formatUpdateCommand
+from scene_common.mqtt import PubSub
+
+class FakeMessageInfo:
+  def __init__(self, rc):
+    self.rc = rc
+    return
+
+class FakePubSub:
+  instances = []
+
+  def __init__(self, auth, cert, rootca, broker):
+    self.published = []
+    self.connected = True
+    self.client = self
+    FakePubSub.instances.append(self)
+    return
+
+  def connect(self):
+    return
+
+  def reconnect_delay_set(self, min_delay, max_delay):
+    return
+
+  def loopStart(self):
+    return
+
+  def isConnected(self):
+    return self.connected
+
+  def publish(self, topic, payload, qos=0, retain=False):
+    if not self.connected:
+      return FakeMessageInfo(mqtt.MQTT_ERR_NO_CONN)
+    self.published.append((topic, payload, qos))
+    return FakeMessageInfo(mqtt.MQTT_ERR_SUCCESS)
+
+@pytest.fixture
+def publisher(monkeypatch):
+  FakePubSub.instances = []
+  monkeypatch.setattr(publisher_module, 'PubSub', FakePubSub)
+  return ManagerPublisher("broker.scenescape.intel.com", debounce=0.05)
+
+def test_lazy_single_connection(publisher):
+  """! Verifies that the connection is opened on first use and then reused. """
+  assert FakePubSub.instances == []
+  threads = [threading.Thread(target=publisher.publish, args=("scenescape/cmd/kubeclient", str(idx)))
+             for idx in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert publisher.flush(timeout=2)
+  assert len(FakePubSub.instances) == 1
+  assert sorted(msg[1] for msg in FakePubSub.instances[0].published) == [str(idx) for idx in range(8)]
+  return
+
+def test_updates_coalesced(publisher):
+  """! Verifies that a burst of update commands is sent once per topic. """
+  database = PubSub.formatTopic(PubSub.CMD_DATABASE)
+  scene = PubSub.formatTopic(PubSub.CMD_SCENE_UPDATE, scene_id="scene1")
+  for _ in range(20):
+    publisher.publish(scene, "update")
+    publisher.publish(database, "update", qos=1)
+
+  assert publisher.flush(timeout=2)
+  assert sorted(FakePubSub.instances[0].published) == [(database, "update", 1), (scene, "update", 0)]
+  return
+
+def test_scoped_updates_merged(publisher):
+  """! Verifies that scoped updates keep their scenes and that an unscoped
+  update coalesced with them refreshes everything. """
+  database = PubSub.formatTopic(PubSub.CMD_DATABASE)
+  publisher.publish(database, formatUpdateCommand(["scene1"]), qos=1)
+  publisher.publish(database, formatUpdateCommand(["scene2"]), qos=1)
+  publisher.publish(database, formatUpdateCommand(["scene1"]), qos=1)
+  assert publisher.flush(timeout=2)
+  assert FakePubSub.instances[0].published == [(database, "update scene1 scene2", 1)]
+
+  publisher.publish(database, formatUpdateCommand(["scene1"]), qos=1)
+  publisher.publish(database, formatUpdateCommand(), qos=1)
+  assert publisher.flush(timeout=2)
+  assert FakePubSub.instances[0].published[-1] == (database, "update", 1)
+  return
+
+def test_requeued_while_disconnected(publisher):
+  """! Verifies that messages wait in the queue until the broker is back. """
+  publisher.getPubSub().connected = False
+  publisher.publish("scenescape/cmd/kubeclient", "camera")
+  assert not publisher.flush(timeout=0.2)
+
+  publisher.getPubSub().connected = True
+  assert publisher.flush(timeout=2)
+  assert FakePubSub.instances[0].published == [("scenescape/cmd/kubeclient", "camera", 0)]
+  return
+
+def test_queue_bounded(publisher):
+  """! Verifies that the oldest messages are dropped when the queue is full. """
+  publisher.max_queue = 4
+  publisher.getPubSub().connected = False
+  for idx in range(10):
+    publisher.publish("scenescape/cmd/kubeclient", str(idx))
+  assert len(publisher.pending) + publisher.sending <= 4
+  return
+
+def test_send_update_command(monkeypatch):
+  """! Verifies that a change sends a single database update, scoped to the
+  scene it belongs to. """
+  from manager import models
+
+  published = []
+  recorder = SimpleNamespace(publish=lambda topic, payload, qos=0: published.append((topic, payload)))
+  monkeypatch.setattr(models, 'getPublisher', lambda: recorder)
+  database = PubSub.formatTopic(PubSub.CMD_DATABASE)
+
+  models.sendUpdateCommand(scene_id="scene1")
+  assert published == [(PubSub.formatTopic(PubSub.CMD_SCENE_UPDATE, scene_id="scene1"), "update"),
+                       (database, "update scene1")]
+
+  published.clear()
+  models.sendUpdateCommand(scoped_to="scene2")
+  assert published == [(database, "update scene2")]
+
+  published.clear()
+  models.sendUpdateCommand()
+  assert published == [(database, "update")]
+  return
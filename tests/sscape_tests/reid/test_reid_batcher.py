@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+
+import numpy as np
+
+from controller.reid import InProcessDatabase
+from controller.reid_batcher import ReIDBatcher
+
+DIMENSIONS = 8
+
+class RecordingDatabase(InProcessDatabase):
+  def __init__(self):
+    super().__init__(dimensions=DIMENSIONS)
+    self.query_batches = []
+    self.entry_batches = []
+    return
+
+  def addEntries(self, entries, set_name=None):
+    self.entry_batches.append(list(entries))
+    super().addEntries(entries)
+    return
+
+  def findSimilarityScoresBatch(self, requests, set_name=None, k_neighbors=1):
+    self.query_batches.append(requests)
+    return super().findSimilarityScoresBatch(requests)
+
+def vector(value):
+  return np.full(DIMENSIONS, value, dtype=np.float32)
+
+def test_queries_are_batched():
+  """! Verifies that queries from several tracks are sent in one request. """
+  database = RecordingDatabase()
+  database.connect()
+  database.addEntry("uuid-1", 1, "person", [vector(1.0)])
+  batcher = ReIDBatcher(database, flush_interval=60)
+  results = {}
+
+  for track in range(3):
+    assert batcher.submitQuery("person", [vector(1.0 + track)],
+                               lambda scores, track=track: results.update({track: scores}))
+  batcher.start(connect=False)
+  batcher.stop()
+
+  assert len(database.query_batches) == 1
+  assert len(database.query_batches[0]) == 3
+  assert sorted(results) == [0, 1, 2]
+  assert results[0][0][0]['uuid'] == "uuid-1"
+  return
+
+def test_entries_are_flushed_in_bulk():
+  """! Verifies that entries are buffered until the size threshold is reached. """
+  database = RecordingDatabase()
+  database.connect()
+  batcher = ReIDBatcher(database, query_interval=0.01, flush_interval=60, flush_size=4)
+  batcher.start(connect=False)
+
+  for track in range(3):
+    batcher.submitEntry(f"uuid-{track}", track, "person", [vector(track)])
+  time.sleep(0.1)
+  assert database.entry_batches == []
+
+  batcher.submitEntry("uuid-3", 3, "person", [vector(3)])
+  batcher.stop()
+
+  assert len(database.entry_batches) == 1
+  assert len(database.entry_batches[0]) == 4
+  assert batcher.backlog == 0
+  return
+
+class FailingDatabase(RecordingDatabase):
+  """Database whose first connect and every write and query raise."""
+
+  def __init__(self):
+    super().__init__()
+    self.connect_attempts = 0
+    return
+
+  def connect(self, hostname=None):
+    self.connect_attempts += 1
+    if self.connect_attempts == 1:
+      raise ConnectionResetError("connection reset")
+    super().connect()
+    return
+
+  def addEntries(self, entries, set_name=None):
+    super().addEntries(entries)
+    raise ValueError("bad entry")
+
+  def findSimilarityScoresBatch(self, requests, set_name=None, k_neighbors=1):
+    super().findSimilarityScoresBatch(requests)
+    raise ConnectionResetError("connection reset")
+
+def test_database_errors():
+  """! Verifies that database errors are logged and the batcher keeps running. """
+  database = FailingDatabase()
+  batcher = ReIDBatcher(database, query_interval=0.01, flush_size=1, reconnect_interval=0.05)
+  results = []
+  batcher.start()
+
+  # Not connected yet, queries are answered without the database
+  assert batcher.submitQuery("person", [vector(0)], results.append)
+  batcher.submitEntry("uuid-0", 0, "person", [vector(0)])
+  time.sleep(0.2)
+  assert database.connect_attempts == 2
+  assert results[0] is None
+
+  # Writes and queries fail once connected
+  batcher.submitEntry("uuid-1", 1, "person", [vector(1)])
+  time.sleep(0.1)
+  assert batcher.submitQuery("person", [vector(1)], results.append)
+  time.sleep(0.1)
+  assert batcher.thread.is_alive()
+  assert len(database.entry_batches) == 2
+  assert batcher.dropped_vectors == 2
+  assert len(database.query_batches) == 1
+  assert results == [None, None]
+  batcher.stop()
+  return
+
+def test_backpressure():
+  """! Verifies that queries are refused and old entries dropped when limits are hit. """
+  batcher = ReIDBatcher(RecordingDatabase(), max_pending_queries=2, max_pending_vectors=2)
+
+  assert batcher.submitQuery("person", [vector(0)], lambda scores: None)
+  assert batcher.submitQuery("person", [vector(0)], lambda scores: None)
+  assert not batcher.submitQuery("person", [vector(0)], lambda scores: None)
+
+  for track in range(3):
+    batcher.submitEntry(f"uuid-{track}", track, "person", [vector(track)])
+  assert [entry[0] for entry in batcher.pending_entries] == ["uuid-1", "uuid-2"]
+  assert batcher.dropped_vectors == 1
+  return
+
+def test_slow_queries_hold_back_new_queries():
+  """! Verifies that queries are refused while the recent latency is too high. """
+  batcher = ReIDBatcher(RecordingDatabase(), max_query_time=1)
+
+  batcher.query_times.append((time.monotonic(), 5.0))
+  assert not batcher.submitQuery("person", [vector(0)], lambda scores: None)
+
+  batcher.query_times.clear()
+  assert batcher.submitQuery("person", [vector(0)], lambda scores: None)
+  return
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import numpy as np
+import pytest
+
+from controller.reid import SCHEMA_NAME, InProcessDatabase
+
+DIMENSIONS = 32
+
+@pytest.fixture
+def vectors():
+  rng = np.random.default_rng(42)
+  return rng.normal(size=(600, DIMENSIONS)).astype(np.float32)
+
+def create_database(vectors, **kwargs):
+  database = InProcessDatabase(dimensions=DIMENSIONS, **kwargs)
+  database.connect()
+  for idx, vector in enumerate(vectors):
+    database.addEntry(f"uuid-{idx}", idx, "person", [vector])
+  return database
+
+def test_schema():
+  """! Verifies that connect() creates the default schema. """
+  database = InProcessDatabase(dimensions=DIMENSIONS)
+  assert not database.findSchema(SCHEMA_NAME)
+  database.connect()
+  assert database.findSchema(SCHEMA_NAME)
+  return
+
+def test_brute_force(vectors):
+  """! Verifies exact nearest neighbour results and squared L2 distances. """
+  database = create_database(vectors)
+  query = vectors[7] + 0.01
+
+  result = database.findSimilarityScores("person", [query], k_neighbors=3)
+
+  assert len(result) == 1
+  expected = np.argsort(((vectors - query) ** 2).sum(axis=1))[:3]
+  assert [entity['uuid'] for entity in result[0]] == [f"uuid-{idx}" for idx in expected]
+  assert result[0][0]['rvid'] == "7"
+  assert result[0][0]['_distance'] == pytest.approx(float(((vectors[7] - query) ** 2).sum()),
+                                                    rel=1e-4)
+  return
+
+def test_partitioned_by_type(vectors):
+  """! Verifies that queries only match entries of the same object type. """
+  database = create_database(vectors[:10])
+  database.addEntry("vehicle-0", 100, "vehicle", [vectors[0]])
+
+  assert database.findSimilarityScores("vehicle", [vectors[0]])[0][0]['uuid'] == "vehicle-0"
+  assert database.findSimilarityScores("person", [vectors[0]])[0][0]['uuid'] == "uuid-0"
+  assert database.findSimilarityScores("bicycle", [vectors[0]]) == []
+  return
+
+def test_ivf_pq(vectors):
+  """! Verifies that the IVF-PQ index finds the stored vectors. """
+  database = create_database(vectors, ivf_threshold=256, nprobe=4)
+  # Training runs in the background, wait for it
+  database.maintain()
+  partition = database.partitions[(SCHEMA_NAME, "person")]
+  assert partition.ivf is not None
+  assert not database.pending_training
+  assert sum(len(ids) for ids in partition.ivf.lists) == len(vectors)
+
+  queries = vectors[:50] + 0.01
+  result = database.findSimilarityScores("person", queries)
+
+  found = [entities[0]['uuid'] == f"uuid-{idx}" for idx, entities in enumerate(result)]
+  assert sum(found) >= 45
+  return
+
+def test_snapshot(vectors, tmp_path):
+  """! Verifies that a saved snapshot is loaded, memory mapped, and still writable. """
+  database = create_database(vectors[:20], snapshot_path=str(tmp_path))
+  database.saveSnapshot()
+
+  restored = InProcessDatabase(dimensions=DIMENSIONS, snapshot_path=str(tmp_path))
+  restored.connect()
+  partition = restored.partitions[(SCHEMA_NAME, "person")]
+  assert isinstance(partition.vectors, np.memmap)
+  assert restored.findSimilarityScores("person", [vectors[3]])[0][0]['uuid'] == "uuid-3"
+
+  restored.addEntry("uuid-new", 99, "person", [vectors[20]])
+  assert restored.findSimilarityScores("person", [vectors[20]])[0][0]['uuid'] == "uuid-new"
+  return
+
+def test_periodic_snapshot(vectors, tmp_path):
+  """! Verifies that maintenance saves a snapshot once entries changed. """
+  database = create_database(vectors[:5], snapshot_path=str(tmp_path), snapshot_interval=0)
+  database.maintain()
+  assert (tmp_path / "reid_index.json").exists()
+  assert not database.changed
+
+  connected = database.thread
+  database.connect()
+  assert database.thread is connected
+  return
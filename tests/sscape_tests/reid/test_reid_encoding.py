@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import base64
+import struct
+
+import numpy as np
+import pytest
+
+from controller.moving_object import MovingObject
+from controller.reid import (Int8Embedding, compressEmbedding, decodeReIDVector,
+                             encodeReIDVector)
+
+@pytest.fixture
+def vector():
+  rng = np.random.default_rng(7)
+  return rng.normal(scale=0.3, size=256).astype(np.float32)
+
+def test_decode_matches_struct(vector):
+  """! Verifies that decoding gives the same values as the struct based decoder. """
+  encoded = base64.b64encode(struct.pack("256f", *vector.tolist()))
+
+  decoded = decodeReIDVector(encoded)
+
+  assert decoded.shape == (1, 256)
+  assert decoded.dtype == np.float32
+  assert np.array_equal(decoded, np.array(struct.unpack("256f", base64.b64decode(encoded)),
+                                          dtype=np.float32).reshape(1, -1))
+  return
+
+def test_encode_round_trip(vector):
+  """! Verifies that encodeReIDVector() is the inverse of decodeReIDVector(). """
+  encoded = encodeReIDVector(vector.reshape(1, -1))
+
+  assert isinstance(encoded, str)
+  assert np.array_equal(decodeReIDVector(encoded).reshape(-1), vector)
+  return
+
+def test_invalid_vectors(vector):
+  """! Verifies that vectors of the wrong length are rejected and that detections
+  drop them instead of failing. """
+  short = base64.b64encode(struct.pack("128f", *vector[:128].tolist()))
+  with pytest.raises(ValueError):
+    decodeReIDVector(short)
+  with pytest.raises(ValueError):
+    decodeReIDVector("not base64!")
+
+  info = {'id': 1, 'category': "person", 'confidence': 0.9, 'reid': short,
+          'bounding_box': {'x': 0.1, 'y': 0.2, 'width': 0.3, 'height': 0.4}}
+  mobj = MovingObject(info, 1.0, None)
+  assert mobj.reidVector is None
+  assert 'reid' not in mobj.info
+  return
+
+@pytest.mark.parametrize("dtype, itemsize, tolerance",
+                         [("float32", 4, 0.0), ("float16", 2, 1e-3), ("int8", 1, 1e-2)])
+def test_compress(vector, dtype, itemsize, tolerance):
+  """! Verifies the size and accuracy of the compact embedding representations. """
+  compact = compressEmbedding(vector.reshape(1, -1), dtype)
+
+  values = compact.values if isinstance(compact, Int8Embedding) else compact
+  assert values.nbytes == 256 * itemsize
+  restored = np.asarray(compact, dtype=np.float32)
+  assert restored.shape == (256,)
+  assert np.abs(restored - vector).max() <= tolerance
+  return
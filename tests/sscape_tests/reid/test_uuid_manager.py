@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from controller.reid import medoidEmbeddings, weightedMeanEmbedding
+from controller.uuid_manager import (QUERY_AGGREGATION_MEAN, QUERY_AGGREGATION_MEDOIDS,
+                                     UUIDManager)
+
+def create_object(rv_id, gid):
+  return SimpleNamespace(rv_id=rv_id, gid=gid, category="person")
+
+@pytest.fixture
+def uuid_manager():
+  return UUIDManager("IN_PROCESS")
+
+def test_reverse_index(uuid_manager):
+  """! Verifies that database IDs in use are tracked and released with their track. """
+  uuid_manager.quality_features = {1: [], 2: []}
+  uuid_manager.active_ids = {1: [None, None], 2: [None, None]}
+
+  uuid_manager.updateActiveDict(create_object(1, "gid-1"), "db-1", 10.0)
+  assert uuid_manager.database_ids == {"db-1": 1}
+  assert not uuid_manager.isNewID("db-1")
+
+  # The database ID is already taken, so track 2 keeps its own ID
+  uuid_manager.updateActiveDict(create_object(2, "gid-2"), "db-1", 12.0)
+  assert uuid_manager.active_ids[2] == ["gid-2", None]
+  assert uuid_manager.database_ids == {"db-1": 1, "gid-2": 2}
+
+  uuid_manager.pruneInactiveTracks([SimpleNamespace(id=2)])
+  assert list(uuid_manager.active_ids) == [2]
+  assert uuid_manager.database_ids == {"gid-2": 2}
+  assert uuid_manager.isNewID("db-1")
+  return
+
+def test_shared_database():
+  """! Verifies that trackers share the in-process store of the process. """
+  first = UUIDManager("IN_PROCESS")
+  second = UUIDManager("IN_PROCESS")
+  assert first.reid_database is second.reid_database
+  assert first.batcher is not second.batcher
+  return
+
+def test_weighted_mean():
+  """! Verifies that higher quality vectors contribute more to the mean. """
+  vectors = [np.zeros(4, dtype=np.float16), np.ones(4, dtype=np.float16)]
+
+  mean = weightedMeanEmbedding(vectors, [1.0, 3.0])
+
+  assert mean.dtype == np.float32
+  assert np.allclose(mean, 0.75)
+  assert np.allclose(weightedMeanEmbedding(vectors, [0.0, 0.0]), 0.5)
+  return
+
+def test_medoids():
+  """! Verifies that one medoid is picked from each cluster of vectors. """
+  rng = np.random.default_rng(3)
+  centers = np.array([[0.0] * 8, [10.0] * 8, [-10.0] * 8])
+  vectors = [center + rng.normal(scale=0.1, size=8) for center in centers for _ in range(5)]
+
+  medoids = medoidEmbeddings(vectors, 3)
+
+  assert len(medoids) == 3
+  nearest = sorted(int(np.argmin(((centers - medoid) ** 2).sum(axis=1))) for medoid in medoids)
+  assert nearest == [0, 1, 2]
+  assert len(medoidEmbeddings(vectors[:2], 3)) == 2
+  return
+
+@pytest.mark.parametrize("aggregation, count", [("all", 12), (QUERY_AGGREGATION_MEAN, 1),
+                                                (QUERY_AGGREGATION_MEDOIDS, 3)])
+def test_query_vectors(aggregation, count):
+  """! Verifies the number of vectors sent for each query aggregation setting. """
+  uuid_manager = UUIDManager("IN_PROCESS", query_aggregation=aggregation)
+  uuid_manager.quality_features[1] = [np.full(8, idx, dtype=np.float16) for idx in range(12)]
+  uuid_manager.quality_weights[1] = [1.0] * 12
+
+  assert len(uuid_manager.queryVectors(1)) == count
+  return
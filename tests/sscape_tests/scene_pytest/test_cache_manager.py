@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from types import SimpleNamespace
+
+import pytest
+
+from controller import cache_manager as cache_manager_module
+from controller.cache_manager import CacheManager
+from controller.data_source import FileSceneDataSource
+from controller.scene_controller import SceneController
+
+class FakeScene:
+  def __init__(self, data):
+    self.uid = data['uid']
+    self.updateScene(data)
+    return
+
+  @classmethod
+  def deserialize(cls, data):
+    return cls(data)
+
+  def updateScene(self, data):
+    self.cameras = {camera['uid']: None for camera in data.get('cameras', [])}
+    self.sensors = {sensor['uid']: None for sensor in data.get('sensors', [])}
+    return
+
+class CountingDataSource(FileSceneDataSource):
+  def __init__(self, scenes):
+    self.paths = []
+    self.scenes = scenes
+    self.calls = []
+    self.fail = False
+    return
+
+  def getScenes(self):
+    self.calls.append('getScenes')
+    return super().getScenes()
+
+  def getScene(self, scene_uid):
+    self.calls.append(('getScene', scene_uid))
+    if self.fail:
+      return {}
+    return super().getScene(scene_uid)
+
+@pytest.fixture
+def data_source():
+  return CountingDataSource([
+    {'uid': 'scene1', 'cameras': [{'uid': 'cam1'}], 'sensors': [{'uid': 'sensor1'}]},
+    {'uid': 'scene2', 'cameras': [{'uid': 'cam2'}]},
+  ])
+
+@pytest.fixture
+def cache(monkeypatch, data_source, tmp_path):
+  monkeypatch.setattr(cache_manager_module, 'Scene', FakeScene)
+  scene_file = tmp_path / "scenes.json"
+  scene_file.write_text("[]")
+  cache = CacheManager(data_source=[str(scene_file)])
+  cache.data_source = data_source
+  cache.refreshScenes()
+  data_source.calls.clear()
+  return cache
+
+def test_refresh_scene(cache, data_source):
+  """! Verifies that a single scene and its camera index are refreshed. """
+  scene2 = cache.sceneWithID('scene2')
+  data_source.scenes[0]['cameras'] = [{'uid': 'cam3'}]
+
+  assert cache.refreshScene('scene1')
+
+  assert data_source.calls == [('getScene', 'scene1')]
+  assert cache.sceneWithCameraID('cam1') is None
+  assert cache.sceneWithCameraID('cam3') is cache.sceneWithID('scene1')
+  assert cache.sceneWithSensorID('sensor1') is cache.sceneWithID('scene1')
+  assert cache.sceneWithID('scene2') is scene2
+  return
+
+def test_refresh_deleted_scene(cache, data_source):
+  """! Verifies that a scene which no longer exists is removed from the cache. """
+  data_source.scenes.pop(0)
+
+  assert cache.refreshScene('scene1')
+
+  assert cache.sceneWithID('scene1') is None
+  assert cache.sceneWithCameraID('cam1') is None
+  assert cache.sceneWithCameraID('cam2') is not None
+  return
+
+def test_database_message_scope(cache, data_source):
+  """! Verifies that a scoped database update refreshes only its scenes and
+  that an unscoped one reloads all of them. """
+  refreshes = []
+  controller = SimpleNamespace(cache_manager=cache,
+                               updateSubscriptions=lambda refresh=True: refreshes.append(refresh),
+                               updateObjectClasses=lambda: None, updateCameras=lambda: None,
+                               updateRegulateCache=lambda: None, updateTRSMatrix=lambda: None)
+
+  handle = SceneController.handleDatabaseMessage
+  handle(controller, None, None, SimpleNamespace(payload=b"update scene1"))
+  assert data_source.calls == [('getScene', 'scene1')]
+  assert refreshes == [False]
+
+  handle(controller, None, None, SimpleNamespace(payload=b"update"))
+  assert refreshes == [False, True]
+  return
+
+def test_invalidate_scene_backoff(cache, data_source, monkeypatch):
+  """! Verifies that failing scenes are refreshed alone and with increasing delays. """
+  now = [1000.0]
+  monkeypatch.setattr(cache_manager_module, 'get_epoch_time', lambda: now[0])
+  data_source.fail = True
+
+  cache.invalidateScene('scene1')
+  cache.sceneWithCameraID('cam1')
+  assert data_source.calls == [('getScene', 'scene1')]
+
+  # The refresh failed, the next one is delayed
+  cache.sceneWithCameraID('cam1')
+  assert len(data_source.calls) == 1
+  now[0] += 1
+  cache.sceneWithCameraID('cam1')
+  assert len(data_source.calls) == 2
+
+  # Backoff doubles with every failure
+  now[0] += 1
+  cache.sceneWithCameraID('cam1')
+  assert len(data_source.calls) == 2
+  now[0] += 1
+  cache.sceneWithCameraID('cam1')
+  assert len(data_source.calls) == 3
+  assert 'getScenes' not in data_source.calls
+
+  # A successful refresh resets the backoff
+  data_source.fail = False
+  now[0] += 4
+  cache.sceneWithCameraID('cam1')
+  assert len(data_source.calls) == 4
+  cache.invalidateScene('scene1')
+  cache.sceneWithCameraID('cam1')
+  assert len(data_source.calls) == 5
+  return
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from types import SimpleNamespace
+
+import pytest
+
+from controller import child_scene_controller as child_module
+from controller.child_scene_controller import ChildConnectionManager
+from scene_common.mqtt import PubSub
+
+class FakePubSub(PubSub):
+  instances = []
+
+  def __init__(self, auth, cert, rootca, broker, keepalive=60):
+    self.broker = broker
+    self.auth = auth
+    self.client = SimpleNamespace(reconnect_delay_set=lambda min_delay, max_delay: None)
+    self.callbacks = set()
+    self.running = False
+    self.onConnect = None
+    self.onDisconnect = None
+    FakePubSub.instances.append(self)
+    return
+
+  def connectAsync(self):
+    return
+
+  def loopStart(self):
+    self.running = True
+    return
+
+  def loopStop(self):
+    self.running = False
+    return
+
+  def disconnect(self):
+    return
+
+  def addCallback(self, topic, callback, qos=0):
+    self.callbacks.add(topic)
+    return
+
+  def removeCallback(self, topic):
+    self.callbacks.discard(topic)
+    return
+
+class FakeParent:
+  def __init__(self):
+    self.status = []
+    self.pubsub = SimpleNamespace(publish=lambda topic, payload: self.status.append((topic, payload)))
+    return
+
+  def republishEvents(self, client, userdata, message):
+    return
+
+  def handleMovingObjectMessage(self, client, userdata, message):
+    return
+
+def childInfo(child_id, host="site1.example.com", password="pass"):
+  return {'name': f"child {child_id}", 'remote_child_id': child_id, 'host_name': host,
+          'mqtt_username': "user", 'mqtt_password': password}
+
+@pytest.fixture
+def manager(monkeypatch):
+  FakePubSub.instances = []
+  monkeypatch.setattr(child_module, 'PubSub', FakePubSub)
+  return ChildConnectionManager(None, FakeParent())
+
+def test_shared_connection(manager):
+  """! Verifies that children on the same broker share one connection. """
+  children = manager.update([childInfo("a"), childInfo("b"), childInfo("c", host="site2.example.com")])
+
+  assert sorted(children) == ["a", "b", "c"]
+  assert len(FakePubSub.instances) == 2
+  assert all(pubsub.running for pubsub in FakePubSub.instances)
+
+  connection = manager.connections[ChildConnectionManager.connectionKey(childInfo("a"))]
+  connection.onConnect(connection.client, None, None, 0)
+  assert len(connection.client.callbacks) == 4
+  assert children["a"].connected and children["b"].connected
+  return
+
+def test_update_diff(manager):
+  """! Verifies that an update only touches the children that changed. """
+  first = manager.update([childInfo("a"), childInfo("b")])
+  second = manager.update([childInfo("a"), childInfo("b")])
+  assert len(FakePubSub.instances) == 1
+  assert second["a"] is first["a"]
+
+  manager.update([childInfo("a")])
+  assert FakePubSub.instances[0].running
+  assert list(manager.connections.values())[0].children.keys() == {"a"}
+
+  manager.update([childInfo("a", password="changed")])
+  assert len(FakePubSub.instances) == 2
+  assert not FakePubSub.instances[0].running
+  assert FakePubSub.instances[1].running
+
+  manager.update([])
+  assert manager.connections == {}
+  assert not FakePubSub.instances[1].running
+  return
+
+def test_child_added_while_connected(manager):
+  """! Verifies that a child added to a live connection subscribes right away. """
+  manager.update([childInfo("a")])
+  connection = list(manager.connections.values())[0]
+  connection.onConnect(connection.client, None, None, 0)
+
+  children = manager.update([childInfo("a"), childInfo("b")])
+  assert children["b"].connected
+  assert len(connection.client.callbacks) == 4
+
+  manager.update([childInfo("b")])
+  assert len(connection.client.callbacks) == 2
+  return
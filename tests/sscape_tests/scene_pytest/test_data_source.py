@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from http import HTTPStatus
+
+import pytest
+
+from controller import data_source as data_source_module
+from controller.data_source import RestSceneDataSource
+from scene_common.rest_client import RESTResult
+
+class FakeRESTClient:
+  def __init__(self, url, rootcert=None, auth=None):
+    self.replies = []
+    self.requests = []
+    return
+
+  def reply(self, status_code, content=None, etag=None):
+    result = RESTResult(status_code, etag=etag)
+    result.update(content or {})
+    self.replies.append(result)
+    return
+
+  def getSceneConfig(self, since=None, etag=None):
+    self.requests.append(('config', since, etag))
+    return self.replies.pop(0)
+
+  def getScenes(self, filter):
+    self.requests.append(('scenes',))
+    return self.replies.pop(0)
+
+  def getChildScene(self, filter):
+    self.requests.append(('child', filter['parent']))
+    return {'results': []}
+
+def bundle(version, full, results, deleted=(), child_scenes=None):
+  return {'version': version, 'full': full, 'results': results,
+          'child_scenes': child_scenes or {}, 'deleted': list(deleted)}
+
+@pytest.fixture
+def data_source(monkeypatch):
+  monkeypatch.setattr(data_source_module, 'RESTClient', FakeRESTClient)
+  return RestSceneDataSource("https://web.scenescape.intel.com/api/v1", "user:password")
+
+def test_conditional_refresh(data_source):
+  """! Verifies that the bundle is fetched once and then only revalidated. """
+  rest = data_source.rest
+  links = [{'uid': '1', 'child': 'scene2', 'child_type': 'local'}]
+  rest.reply(HTTPStatus.OK, bundle(3, True, [{'uid': 'scene1'}, {'uid': 'scene2'}],
+                                   child_scenes={'scene1': links, 'scene2': []}), etag='"3"')
+  rest.reply(HTTPStatus.NOT_MODIFIED)
+
+  assert len(data_source.getScenes()['results']) == 2
+  assert len(data_source.getScenes()['results']) == 2
+  assert data_source.getChildScenes('scene1') == {'results': links}
+
+  assert rest.requests == [('config', None, None), ('config', 3, '"3"')]
+  return
+
+def test_delta_refresh(data_source):
+  """! Verifies that changed scenes are replaced and deleted scenes removed. """
+  rest = data_source.rest
+  rest.reply(HTTPStatus.OK, bundle(3, True, [{'uid': 'scene1'}, {'uid': 'scene2'}]), etag='"3"')
+  rest.reply(HTTPStatus.OK, bundle(5, False, [{'uid': 'scene1', 'name': 'new'}],
+                                   deleted=['scene2']), etag='"5"')
+  rest.reply(HTTPStatus.NOT_MODIFIED)
+  data_source.getScenes()
+
+  assert data_source.getScene('scene1') == {'uid': 'scene1', 'name': 'new'}
+  assert data_source.getScene('scene2') is None
+
+  assert rest.requests[1:] == [('config', 3, '"3"'), ('config', 5, '"5"')]
+  return
+
+def test_fallback_without_bundle(data_source):
+  """! Verifies that the scene list is used when the manager has no bundle endpoint. """
+  rest = data_source.rest
+  rest.reply(HTTPStatus.NOT_FOUND)
+  rest.reply(HTTPStatus.OK, {'results': [{'uid': 'scene1'}]})
+  rest.reply(HTTPStatus.OK, {'results': [{'uid': 'scene1'}]})
+
+  data_source.getScenes()
+  data_source.getScenes()
+  data_source.getChildScenes('scene1')
+
+  assert rest.requests == [('config', None, None), ('scenes',), ('scenes',), ('child', 'scene1')]
+  return
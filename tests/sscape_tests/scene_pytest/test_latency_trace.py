@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from types import SimpleNamespace
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from controller.observability import tracing
+from scene_common import latency_trace
+from tests.perf_tests.scene_perf.scene_latency_recorder import ALL_CAMERAS, TOTAL, LatencyStats
+
+def tracedMessage(camera, start_ms, durations):
+  jdata = {latency_trace.TRACE_CAMERA_KEY: camera}
+  when = start_ms
+  for stage, duration in zip(latency_trace.STAGES, (0,) + tuple(durations)):
+    when += duration
+    latency_trace.stampStage(jdata, stage, when / 1000.0)
+  return jdata
+
+def test_stamp_stage():
+  """! Verifies that stages are appended in order and repeated stages replaced. """
+  jdata = {}
+  latency_trace.stampStage(jdata, latency_trace.STAGE_CONTROLLER_RECEIVE, 1.0)
+  latency_trace.stampStage(jdata, latency_trace.STAGE_TRACKER_QUEUED, 1.004)
+  latency_trace.stampStage(jdata, latency_trace.STAGE_PUBLISH, 1.005)
+  latency_trace.stampStage(jdata, latency_trace.STAGE_PUBLISH, 1.0062)
+
+  assert jdata[latency_trace.TRACE_KEY] == [["recv", 1000.0], ["trkq", 1004.0], ["pub", 1006.2]]
+  latencies = latency_trace.stageLatencies(jdata)
+  assert [stage for stage, _ in latencies] == ["trkq", "pub"]
+  assert abs(latencies[1][1] - 2.2) < 1e-6
+  assert abs(latency_trace.totalLatency(jdata) - 6.2) < 1e-6
+  return
+
+def test_invalid_trace():
+  """! Verifies that malformed traces are ignored instead of failing. """
+  assert latency_trace.readTrace({}) == []
+  assert latency_trace.readTrace({latency_trace.TRACE_KEY: "dec"}) == []
+  jdata = {latency_trace.TRACE_KEY: [["dec", 1.0], ["inf"], [3, 4.0], ["apub", 5.0]]}
+  assert latency_trace.readTrace(jdata) == [("dec", 1.0), ("apub", 5.0)]
+  assert latency_trace.totalLatency({latency_trace.TRACE_KEY: [["dec", 1.0]]}) is None
+  return
+
+def test_percentiles():
+  """! Verifies per camera and overall percentiles of every stage. """
+  stats = LatencyStats()
+  for idx in range(100):
+    stats.add(tracedMessage("camera1", 1000.0 * idx, (30, 2, 5, idx + 1, 1)))
+    stats.add(tracedMessage("camera2", 1000.0 * idx, (30, 2, 5, 1, 1)))
+  assert not stats.add({'id': "untraced"})
+
+  summary = stats.summary()
+  assert list(summary) == ["camera1", "camera2", ALL_CAMERAS]
+  assert list(summary["camera1"]) == list(latency_trace.STAGES[1:]) + [TOTAL]
+  count, p50, p95, p99 = summary["camera1"]["trkq"]
+  assert count == 100
+  assert abs(p50 - 50.5) < 0.1 and abs(p95 - 95.05) < 0.1 and abs(p99 - 99.01) < 0.1
+  assert abs(summary["camera2"][TOTAL][1] - 39) < 0.1
+  assert summary[ALL_CAMERAS]["inf"][0] == 200
+  assert stats.untraced == 1
+  return
+
+def test_tracing_spans(monkeypatch):
+  """! Verifies that a latency trace becomes a parent span with one span per stage. """
+  exporter = InMemorySpanExporter()
+  provider = TracerProvider()
+  provider.add_span_processor(SimpleSpanProcessor(exporter))
+  monkeypatch.setattr(tracing, '_tracing_instance',
+                      SimpleNamespace(_enabled=True, _tracer=provider.get_tracer(__name__)))
+
+  jdata = tracedMessage("camera1", 1760000000000.0, (30, 2, 5, 4, 1))
+  tracing.record_latency_trace(latency_trace.readTrace(jdata), {"camera": "camera1"})
+
+  spans = {span.name: span for span in exporter.get_finished_spans()}
+  parent = spans[tracing.LATENCY_TRACE_SPAN_NAME]
+  assert set(spans) == {tracing.LATENCY_TRACE_SPAN_NAME} | set(latency_trace.STAGES[1:])
+  assert parent.attributes["camera"] == "camera1"
+  assert (parent.end_time - parent.start_time) == 42_000_000
+  assert spans["inf"].parent.span_id == parent.context.span_id
+  assert spans["trkq"].attributes["latency.ms"] == 4
+  return
+
+def test_tracing_disabled(monkeypatch):
+  """! Verifies that nothing is recorded when tracing is off or not initialized. """
+  monkeypatch.setattr(tracing, '_tracing_instance', None)
+  tracing.record_latency_trace([("dec", 1.0), ("inf", 2.0)])
+  monkeypatch.setattr(tracing, '_tracing_instance', SimpleNamespace(_enabled=False))
+  tracing.record_latency_trace([("dec", 1.0), ("inf", 2.0)])
+  return
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from controller.moving_object import ATagObject, MovingObject, MovingObjectPool
+
+TAG_INFO = {'id': 1, 'category': "apriltag", 'tag_family': "tag36h11", 'tag_id': 5,
+            'confidence': 0.9, 'bounding_box': {'x': 0.1, 'y': 0.2, 'width': 0.3, 'height': 0.4}}
+
+def test_release_resets_fields():
+  """! Verifies that released objects drop their frame data and that a reused
+  object only has the optional attributes of its new detection. """
+  pool = MovingObjectPool()
+  tag = ATagObject(TAG_INFO, 1.0, None)
+  tag.visibility = ["camera1"]
+  pool.release([tag])
+
+  assert tag.tag_id is None
+  assert tag.info is None and tag.camera is None and tag.boundingBox is None
+  assert not hasattr(tag, 'visibility')
+
+  info = dict(TAG_INFO, tag_id=7)
+  assert pool.acquire(ATagObject, info, 2.0, None) is tag
+  assert tag.tag_id == "apriltag-tag36h11-7"
+  assert tag.first_seen == 2.0
+  assert not hasattr(tag, 'visibility')
+  assert pool.acquire(ATagObject, info, 2.0, None) is not tag
+  assert isinstance(pool.acquire(MovingObject, info, 2.0, None), MovingObject)
+  return
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import numpy as np
+import pytest
+
+from scene_common.geometry import Point
+
+from controller.object_snapshot import ObjectSnapshot
+from controller.tracking import Tracking
+from tests.sscape_tests.scene_pytest.config import *
+
+def create_objects(camera_obj):
+  """! Creates a MovingObject for each detection in the sample frame.
+  @param    camera_obj    Camera class object
+  @return   List of MovingObjects
+  """
+  objects = []
+  for idx, detection in enumerate(frame['objects'][thing_type]):
+    mobj = Tracking.createObject(thing_type, detection, when, camera_obj)
+    mobj.sceneLoc
+    mobj.setGID("gid-%d" % idx)
+    objects.append(mobj)
+  return objects
+
+def test_columns(camera_obj):
+  """! Verifies that the snapshot columns match the per-object values.
+
+  @param    camera_obj    Camera class object
+  """
+  objects = create_objects(camera_obj)
+  objects[0].velocity = Point(1.0, 2.0)
+  objects[1].velocity = Point(0.5, -0.5, 0.25)
+  objects[1].rotation = None
+  objects[1].confidence = None
+
+  snapshot = ObjectSnapshot(objects)
+
+  assert len(snapshot) == len(objects)
+  assert list(snapshot.gids) == [obj.gid for obj in objects]
+  for row, obj in enumerate(objects):
+    assert snapshot[row] is obj
+    assert np.allclose(snapshot.positions[row], obj.sceneLoc.asCartesianVector)
+    assert np.allclose(snapshot.sizes[row], obj.size)
+  assert np.allclose(snapshot.velocities, [[1.0, 2.0, 0.0], [0.5, -0.5, 0.25]])
+  assert np.allclose(snapshot.rotations[0], objects[0].rotation)
+  assert np.isnan(snapshot.rotations[1]).all()
+  assert snapshot.confidences[0] == pytest.approx(objects[0].confidence)
+  assert np.isnan(snapshot.confidences[1])
+  return
+
+def test_lazy_columns(camera_obj):
+  """! Verifies that the columns are built on first access and that missing
+  velocities are NaN.
+
+  @param    camera_obj    Camera class object
+  """
+  objects = create_objects(camera_obj)
+  objects[0].velocity = None
+  snapshot = ObjectSnapshot(objects)
+
+  assert list(snapshot) == objects
+  with pytest.raises(AttributeError):
+    object.__getattribute__(snapshot, 'positions')
+  assert np.isnan(snapshot.velocities[0]).all()
+  assert object.__getattribute__(snapshot, 'positions') is snapshot.positions
+  with pytest.raises(AttributeError):
+    snapshot.unknown
+  return
+
+def test_visibility(camera_obj):
+  """! Verifies the visibility bitmask and the per-camera masks.
+
+  @param    camera_obj    Camera class object
+  """
+  objects = create_objects(camera_obj)
+  objects[0].visibility = ["camera2", "camera1"]
+  objects[1].visibility = ["camera2"]
+
+  snapshot = ObjectSnapshot(objects)
+
+  assert snapshot.cameras == ("camera1", "camera2")
+  assert snapshot.visibility.tolist() == [[0b11], [0b10]]
+  assert snapshot.visibleFrom("camera1").tolist() == [True, False]
+  assert snapshot.visibleFrom("camera2").tolist() == [True, True]
+  assert snapshot.visibleFrom("camera3").tolist() == [False, False]
+  assert snapshot.visibleCameras(0) == ["camera1", "camera2"]
+  assert snapshot.visibleCameras(1) == ["camera2"]
+  return
+
+def test_immutable(camera_obj):
+  """! Verifies that neither the snapshot nor its columns can be modified.
+
+  @param    camera_obj    Camera class object
+  """
+  snapshot = ObjectSnapshot(create_objects(camera_obj))
+
+  with pytest.raises(AttributeError):
+    snapshot.gids = None
+  with pytest.raises(ValueError):
+    snapshot.positions[0, 0] = 1.0
+  return
+
+def test_empty():
+  """! Verifies the shape of the columns of an empty snapshot. """
+  snapshot = ObjectSnapshot()
+
+  assert len(snapshot) == 0
+  assert list(snapshot) == []
+  assert snapshot.positions.shape == (0, 3)
+  assert snapshot.rotations.shape == (0, 4)
+  assert snapshot.visibility.shape == (0, 0)
+  return
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import time
+
+import orjson
+import pytest
+
+from controller import scene as scene_module
+from controller.offline import OfflineProcessor
+from controller.reid import InProcessDatabase
+from controller.tracking import Tracking
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "..",
+                           "controller", "src", "schema", "metadata.schema.json")
+
+class SlowTracking(Tracking):
+  """Tracker that takes its time, so asynchronous tracking would skip frames."""
+
+  def __init__(self, max_unreliable_time, non_measurement_time_dynamic, non_measurement_time_static,
+               reid_database):
+    super().__init__(reid_database)
+    self.daemon = True
+    self.frames = 0
+    return
+
+  def trackCategory(self, objects, when, tracks):
+    time.sleep(0.01)
+    for obj in objects:
+      obj.setGID(f"{obj.category}-1")
+    self.frames += 1
+    self.all_tracker_objects = objects
+    return
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch):
+  monkeypatch.setattr(scene_module.Scene, 'available_trackers', {'intel_labs': SlowTracking})
+  scene = {
+    'uid': "scene1", 'name': "Demo", 'scale': 100.0, 'regulated_rate': 30,
+    'external_update_rate': 30,
+    'cameras': [{'uid': "camera1", 'name': "camera1", 'resolution': [640, 480], 'intrinsics': 70,
+                 'camera points': [[278, 61], [621, 132], [559, 460], [66, 289]],
+                 'map points': [[0.1, 5.38, 0], [3.04, 5.35, 0], [3.05, 2.42, 0], [0.1, 2.45, 0]]}],
+  }
+  (tmp_path / "scene.json").write_text(json.dumps(scene))
+  for camera in ("camera1", "camera2"):
+    with open(tmp_path / f"{camera}.json", "w") as f:
+      for idx in range(11):
+        frame = {'timestamp': f"2025-01-01T00:00:{idx:02d}.{500 if camera == 'camera2' else 0:03d}Z",
+                 'id': camera, 'rate': 1.0,
+                 'objects': {'person': [{'id': 1, 'category': "person", 'confidence': 0.99,
+                                         'bounding_box_px': {'x': 394, 'y': 89,
+                                                             'width': 70, 'height': 262}}]}}
+        f.write(json.dumps(frame) + "\n")
+  return tmp_path
+
+def test_offline(recorded):
+  """! Verifies that every recorded frame is tracked and written to the output files. """
+  output = recorded / "output"
+  processor = OfflineProcessor([str(recorded / "scene.json")], str(output),
+                               schema_file=SCHEMA_FILE)
+  scene = processor.controller.cache_manager.sceneWithID("scene1")
+  assert scene.tracker.synchronous
+
+  # CamManager skips the first frame of every file
+  assert processor.process([str(recorded / "camera1.json"), str(recorded / "camera2.json")]) == 10
+  tracker = scene.tracker.trackers['person']
+  assert isinstance(tracker.uuid_manager.reid_database, InProcessDatabase)
+  processor.close()
+
+  assert processor.skipped == 10
+  assert tracker.frames == 10
+  lines = (output / "scene.jsonl").read_bytes().splitlines()
+  assert len(lines) == processor.counts['scene'] == 10
+  first = orjson.loads(lines[0])
+  assert first['scene_id'] == "scene1" and first['thing_type'] == "person"
+  assert first['message']['timestamp'] == "2025-01-01T00:00:01.000Z"
+  assert first['message']['objects'][0]['id'] == "person-1"
+  assert (output / "region.jsonl").exists() and (output / "event.jsonl").exists()
+  return
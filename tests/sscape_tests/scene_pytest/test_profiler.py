@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import marshal
+import threading
+import time
+from types import SimpleNamespace
+
+import orjson
+import paho.mqtt.client as mqtt
+import pytest
+
+from controller.observability.profiler import Profiler
+from scene_common.mqtt import PubSub
+
+class FakePubSub:
+  def __init__(self, receive=True):
+    self.receive = receive
+    self.status = []
+    self.files = {}
+    return
+
+  def publish(self, topic, payload, qos=0, retain=False):
+    self.status.append(orjson.loads(payload))
+    return
+
+  def sendFile(self, topic, file):
+    if self.receive:
+      self.files[topic] = file.read()
+    return self.receive
+
+  def waitForState(self, state, timeout=5):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+      if any(status['state'] == state for status in self.status):
+        return True
+      time.sleep(0.01)
+    return False
+
+def queuingWork(profiler, scene, stop):
+  while not stop.is_set():
+    with profiler.scene_scope(scene):
+      sum(range(1000))
+  return
+
+def otherWork(profiler, scene, stop):
+  while not stop.is_set():
+    with profiler.scene_scope(scene):
+      sum(range(1000))
+  return
+
+@pytest.fixture
+def scenes():
+  return (SimpleNamespace(uid="uid-queuing", name="Queuing"),
+          SimpleNamespace(uid="uid-other", name="Other"))
+
+def runWorkers(profiler, scenes, stop):
+  threads = [threading.Thread(target=queuingWork, args=(profiler, scenes[0], stop)),
+             threading.Thread(target=otherWork, args=(profiler, scenes[1], stop))]
+  for thread in threads:
+    thread.start()
+  return threads
+
+def test_stack_profile_scene_filter(scenes, tmp_path):
+  """! Verifies that stack samples are limited to the requested scene and
+  written to disk. """
+  pubsub = FakePubSub()
+  profiler = Profiler(pubsub, str(tmp_path))
+  stop = threading.Event()
+  threads = runWorkers(profiler, scenes, stop)
+  try:
+    assert profiler.start(id="filtered", duration=0.3, interval=0.002,
+                          scenes=["Queuing"], output="disk")
+    assert pubsub.waitForState("done")
+  finally:
+    stop.set()
+    for thread in threads:
+      thread.join()
+
+  collapsed = (tmp_path / "profile-filtered.collapsed").read_text()
+  assert "queuingWork" in collapsed
+  assert "otherWork" not in collapsed
+  assert pubsub.status[-1]['path'].endswith("profile-filtered.collapsed")
+  return
+
+def test_cprofile_over_mqtt(scenes):
+  """! Verifies that a cProfile result is sent as pstats data. """
+  pubsub = FakePubSub()
+  profiler = Profiler(pubsub)
+  stop = threading.Event()
+  threads = runWorkers(profiler, scenes, stop)
+  try:
+    profiler.handle_command(None, None, SimpleNamespace(
+      payload=orjson.dumps({'id': "cprof", 'mode': "cprofile", 'duration': 0.2,
+                            'scenes': ["uid-other"]})))
+    assert pubsub.waitForState("done")
+  finally:
+    stop.set()
+    for thread in threads:
+      thread.join()
+
+  stats = marshal.loads(pubsub.files["scenescape/sys/profile/result/cprof"])
+  functions = {function for _, _, function in stats}
+  assert "<built-in method builtins.sum>" in functions
+  assert pubsub.status[-1]['topic'] == "scenescape/sys/profile/result/cprof"
+  # Results never mix with the status, whatever their id
+  results = PubSub.formatTopic(PubSub.SYS_PROFILE, profile_id="+")
+  assert not mqtt.topic_matches_sub(results, PubSub.formatTopic(PubSub.SYS_PROFILE_STATUS))
+  return
+
+class ActiveToolProfile:
+  """cProfile stand-in that fails like Python 3.12 when another tool is active."""
+
+  def __init__(self):
+    self.enabled = 0
+    return
+
+  def enable(self):
+    if self.enabled:
+      raise ValueError("Another profiling tool is already active")
+    self.enabled += 1
+    return
+
+  def disable(self):
+    self.enabled = 0
+    return
+
+def test_cprofile_overlapping_scopes(scenes):
+  """! Verifies that overlapping scopes enable cProfile once and that profiler
+  errors do not reach the scene processing. """
+  pubsub = FakePubSub()
+  profiler = Profiler(pubsub)
+  assert profiler.start(id="overlap", mode="cprofile", duration=60)
+  session = profiler.session
+  session.profile = ActiveToolProfile()
+
+  with profiler.scene_scope(scenes[0]):
+    with profiler.scene_scope(scenes[1]):
+      assert session.profile.enabled == 1
+    assert session.profile.enabled == 1
+  assert session.profile.enabled == 0
+
+  session.profile.enabled = 1
+  with profiler.scene_scope(scenes[0]):
+    pass
+  assert session.active_scopes == 0
+  return
+
+def test_busy_and_invalid(tmp_path):
+  """! Verifies that only one profile runs at a time and bad commands are reported. """
+  pubsub = FakePubSub(receive=False)
+  profiler = Profiler(pubsub, str(tmp_path))
+  assert profiler.start(id="first", duration=0.2)
+  assert not profiler.start(id="second")
+  assert pubsub.status[-1] == {'id': "second", 'state': "busy", 'running': "first"}
+
+  profiler.handle_command(None, None, SimpleNamespace(payload=b'{"mode": "perf"}'))
+  assert pubsub.status[-1]['state'] == "failed"
+
+  # Nobody received the result, so it is kept on disk
+  assert pubsub.waitForState("done")
+  assert (tmp_path / "profile-first.collapsed").exists()
+  return
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import orjson
+import pytest
+
+from scene_common.local_pubsub import LocalPubSub
+from scene_common.mqtt import PubSub
+from tests.perf_tests.scene_perf.scene_replay import (RecordingReader, RecordingWriter,
+                                                      parseSpeed, replay)
+
+CAMERA_TOPIC = PubSub.formatTopic(PubSub.DATA_CAMERA, camera_id="camera1")
+SCENE_TOPIC = PubSub.formatTopic(PubSub.DATA_SCENE, scene_id="scene1", thing_type="person")
+
+def test_local_pubsub():
+  """! Verifies synchronous delivery by topic filter and the deferred onConnect. """
+  pubsub = LocalPubSub()
+  received = []
+  connected = []
+  pubsub.onConnect = lambda client, userdata, flags, rc: connected.append(rc)
+  pubsub.connect()
+  assert connected == []
+  pubsub.loopStart()
+  assert connected == [0] and pubsub.isConnected()
+
+  pubsub.addCallback(PubSub.formatTopic(PubSub.DATA_CAMERA, camera_id="+"),
+                     lambda client, userdata, msg: received.append((client, msg.topic, msg.payload)))
+  pubsub.publish(CAMERA_TOPIC, '{"id": "camera1"}')
+  pubsub.publish(SCENE_TOPIC, b"{}")
+  assert received == [(pubsub, CAMERA_TOPIC, b'{"id": "camera1"}')]
+
+  pubsub.removeCallback(PubSub.formatTopic(PubSub.DATA_CAMERA, camera_id="+"))
+  pubsub.publish(CAMERA_TOPIC, b"{}")
+  assert len(received) == 1
+  return
+
+def test_recording(tmp_path):
+  """! Verifies that recordings read back with and without their index. """
+  path = tmp_path / "traffic.ssrec"
+  with RecordingWriter(path) as writer:
+    for idx in range(3):
+      writer.write(CAMERA_TOPIC, orjson.dumps({'id': "camera1", 'frame': idx}), 100.0 + idx)
+
+  reader = RecordingReader(path)
+  assert len(reader) == 3
+  assert reader[2] == (102.0, CAMERA_TOPIC, b'{"id":"camera1","frame":2}')
+  assert [orjson.loads(payload)['frame'] for _, _, payload in reader] == [0, 1, 2]
+  reader.close()
+
+  # A recorder that was killed leaves no index and maybe a partial record
+  data = path.read_bytes()
+  truncated = tmp_path / "truncated.ssrec"
+  truncated.write_bytes(data[:reader.offsets[2] + 10])
+  reader = RecordingReader(truncated)
+  assert [when for when, _, _ in reader] == [100.0, 101.0]
+  reader.close()
+
+  (tmp_path / "other.ssrec").write_bytes(b"not a recording")
+  with pytest.raises(ValueError):
+    RecordingReader(tmp_path / "other.ssrec")
+  return
+
+def test_replay():
+  """! Verifies that replay drives the handlers and counts scene outputs. """
+  pubsub = LocalPubSub()
+  handled = []
+
+  def handleCamera(client, userdata, message):
+    handled.append(orjson.loads(message.payload)['frame'])
+    client.publish(SCENE_TOPIC, message.payload)
+    return
+
+  pubsub.addCallback(CAMERA_TOPIC, handleCamera)
+  records = [(100.0 + idx * 0.05, CAMERA_TOPIC, orjson.dumps({'frame': idx})) for idx in range(5)]
+
+  result = replay(pubsub, records, parseSpeed("max"))
+  assert handled == [0, 1, 2, 3, 4]
+  assert result.messages == 5 and result.outputs == 5 and len(result.latencies) == 5
+
+  result = replay(pubsub, records, parseSpeed("2x"))
+  assert result.elapsed >= 0.1
+  assert result.late == 0
+  assert pubsub.callbacks.keys() == {CAMERA_TOPIC}
+  return
@@ -8,6 +8,7 @@ import pytest
 
 from scene_common.timestamp import get_epoch_time
 from scene_common.geometry import Region, Point
+from scene_common.scene_model import SceneModel
 
 from tests.sscape_tests.scene_pytest.config import *
 
@@ -29,6 +30,27 @@ def test_init(scene_obj, scene_obj_with_scale):
   assert scene_obj_with_scale.scale == scale
   return
 
+def test_lazy_map_loading(monkeypatch):
+  """! Verifies that the map image and mesh are only read when used. """
+  from scene_common import scene_model
+  reads = []
+  original = cv2.imread
+  def imread(path):
+    reads.append(path)
+    return original(path)
+  monkeypatch.setattr(scene_model.cv2, 'imread', imread)
+  monkeypatch.setattr(scene_model, 'extractCachedTriangleMesh', lambda map_info: map_info)
+
+  scene = SceneModel(name, mapFile, scale)
+  assert reads == []
+  assert scene._map_triangle_mesh is None
+
+  assert scene.background.shape[0] > 0
+  assert scene.background is scene.background
+  assert reads == [mapFile]
+  assert scene.map_triangle_mesh == [mapFile, scale]
+  return
+
 @pytest.mark.parametrize("jdata", [(jdata)])
 def test_processCameraData(scene_obj, camera_obj, jdata):
   """! Verifies the output of 'Scene.processCameraData' method.
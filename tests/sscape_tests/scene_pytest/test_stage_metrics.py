@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import collections
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from controller.observability import metrics
+from controller.scene_controller import SceneController
+from scene_common.mqtt import PubSub
+
+class RecordingMetrics:
+  def __init__(self, ratio):
+    self.enable_metrics = True
+    self.stage_sample_ratio = ratio
+    self.records = []
+    return
+
+  def histogram_record(self, attr_name, value, attributes=None):
+    self.records.append((attr_name, value, attributes))
+    return
+
+@pytest.fixture
+def recorder(monkeypatch):
+  instance = RecordingMetrics(1.0)
+  monkeypatch.setattr(metrics, '_metrics_instance', instance)
+  return instance
+
+def test_stage_recorded(recorder):
+  """! Verifies that a sampled stage is recorded with its attributes. """
+  with metrics.time_stage(metrics.STAGE_PROJECTION, "Queuing", "person"):
+    time.sleep(0.01)
+
+  name, duration, attributes = recorder.records[0]
+  assert name == metrics.METRIC_STAGE_DURATION
+  assert 10 <= duration < 1000
+  assert attributes == {"stage": "projection", "scene": "Queuing", "category": "person"}
+  return
+
+def test_stage_across_threads(recorder):
+  """! Verifies stages started in one place and recorded in another. """
+  start = metrics.stage_start()
+  metrics.record_stage(metrics.STAGE_TRACKER_WAIT, start, category="vehicle")
+  assert recorder.records[0][2] == {"stage": "tracker_wait", "category": "vehicle"}
+
+  metrics.record_stage(metrics.STAGE_TRACKER_WAIT, None, category="vehicle")
+  assert len(recorder.records) == 1
+  return
+
+def test_stage_deferred(recorder):
+  """! Verifies that a deferred stage keeps its duration until it is recorded
+  with the scene and category. """
+  timer = metrics.time_stage_deferred(metrics.STAGE_DECODE)
+  with timer:
+    time.sleep(0.01)
+  time.sleep(0.05)
+  assert recorder.records == []
+
+  timer.record("Queuing", "person")
+  name, duration, attributes = recorder.records[0]
+  assert name == metrics.METRIC_STAGE_DURATION
+  assert 10 <= duration < 50
+  assert attributes == {"stage": "decode", "scene": "Queuing", "category": "person"}
+
+  metrics.time_stage_deferred(metrics.STAGE_VALIDATE).record("Queuing")
+  assert len(recorder.records) == 1
+
+  recorder.stage_sample_ratio = 0.0
+  timer = metrics.time_stage_deferred(metrics.STAGE_DECODE)
+  with timer:
+    pass
+  timer.record("Queuing")
+  assert len(recorder.records) == 1
+  return
+
+def test_stage_not_sampled(recorder, monkeypatch):
+  """! Verifies that unsampled runs and disabled metrics record nothing. """
+  recorder.stage_sample_ratio = 0.0
+  with metrics.time_stage(metrics.STAGE_DECODE):
+    pass
+  assert metrics.stage_start() is None
+
+  monkeypatch.setattr(metrics, '_metrics_instance', None)
+  with metrics.time_stage(metrics.STAGE_DECODE):
+    pass
+  assert recorder.records == []
+  return
+
+@pytest.fixture
+def collected(monkeypatch):
+  from opentelemetry.sdk.metrics import MeterProvider
+  from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+  monkeypatch.setattr(metrics, '_gauge_sources', {})
+  reader = InMemoryMetricReader()
+  instance = metrics._metrics(False, "", 60)
+  instance.enable_metrics = True
+  instance.meter = MeterProvider(metric_readers=[reader]).get_meter(__name__)
+  instance.init_metrics()
+  monkeypatch.setattr(metrics, '_metrics_instance', instance)
+
+  def collect():
+    points = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+      for scope_metrics in resource_metrics.scope_metrics:
+        for metric in scope_metrics.metrics:
+          points[metric.name] = {tuple(sorted(point.attributes.items())): point.value
+                                 for point in metric.data.data_points}
+    return points
+  return collect
+
+def test_gauges_collected(collected):
+  """! Verifies that gauge sources are read when the metrics are collected. """
+  calls = []
+  def queueDepths():
+    calls.append(1)
+    return [(3, {"scene": "Queuing", "category": "person"})]
+
+  metrics.add_gauge_source(metrics.METRIC_TRACKER_QUEUE_DEPTH, queueDepths)
+  metrics.add_gauge_source(metrics.METRIC_PUBLISH_QUEUE_DEPTH, lambda: [(7, {})])
+  assert calls == []
+
+  points = collected()
+  assert points[metrics.METRIC_TRACKER_QUEUE_DEPTH] == {(("category", "person"), ("scene", "Queuing")): 3}
+  assert points[metrics.METRIC_PUBLISH_QUEUE_DEPTH] == {(): 7}
+  assert calls == [1]
+  return
+
+def test_publish_queue_depth():
+  """! Verifies that the publish queue depth is only reported when the MQTT
+  client exposes its outgoing queue. """
+  pubsub = PubSub.__new__(PubSub)
+  controller = SimpleNamespace(pubsub=pubsub)
+
+  pubsub.client = SimpleNamespace(_out_packet=collections.deque([1, 2]))
+  assert pubsub.queueDepth() == 2
+  assert SceneController.publishQueueDepth(controller) == [(2, {})]
+
+  pubsub.client = SimpleNamespace()
+  assert pubsub.queueDepth() is None
+  assert SceneController.publishQueueDepth(controller) == []
+  return
+
+def test_gauge_source_failure(collected):
+  """! Verifies that a failing source does not stop the other gauges. """
+  def broken():
+    raise RuntimeError("dictionary changed size during iteration")
+
+  metrics.add_gauge_source(metrics.METRIC_ACTIVE_TRACKS, broken)
+  metrics.add_gauge_source(metrics.METRIC_REID_BACKLOG, lambda: [(2, {"scene": "Queuing"})])
+  points = collected()
+  assert points[metrics.METRIC_REID_BACKLOG] == {(("scene", "Queuing"),): 2}
+  assert not points.get(metrics.METRIC_ACTIVE_TRACKS)
+  return
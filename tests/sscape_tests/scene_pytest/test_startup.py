@@ -0,0 +1,12 @@
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from tests.perf_tests.tc_controller_startup import BUDGET, MODULE, deferredImports, measureImport
+
+def test_controller_startup():
+  """! Verifies that importing the controller stays within the startup budget
+  and does not load dependencies that are only needed on first use. """
+  times = measureImport(MODULE)
+  assert deferredImports(times) == []
+  assert times[MODULE] < BUDGET
+  return
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+
+import numpy as np
+
+from scene_common.camera import Camera
+from scene_common.geometry import Point
+from scene_common.schema import SchemaValidation
+from tests.perf_tests.tc_synthetic_load import (WALK_SPEED, LoadGenerator, Walkers, buildScene,
+                                                metricDelta, parseMetrics)
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "..",
+                           "controller", "src", "schema", "metadata.schema.json")
+
+def test_scene_and_messages():
+  """! Verifies that detections project like the controller cameras and that
+  the messages are valid detector messages. """
+  scene = buildScene(9, 4, 3, seed=1)
+  assert len(scene['cameras']) == 9 and len(scene['regions']) == 4 and len(scene['tripwires']) == 3
+  walkers = Walkers(300, scene['size'], reid=True, seed=1)
+  generator = LoadGenerator(scene, walkers, 10, None)
+  messages = dict(generator.buildMessages(1735689600.0))
+  assert messages.keys() == {camera['uid'] for camera in scene['cameras']}
+  assert all(messages[camera]['objects']['person'] for camera in messages)
+
+  schema = SchemaValidation(SCHEMA_FILE)
+  for camera_data in scene['cameras']:
+    message = messages[camera_data['uid']]
+    assert schema.validateMessage("detector", message)
+    pose = Camera(camera_data['uid'], camera_data).pose
+    for obj in message['objects']['person']:
+      box = obj['bounding_box_px']
+      foot = np.array([box['x'] + box['width'] / 2, box['y'] + box['height']])
+      distances = [np.linalg.norm(foot - pose.projectWorldPointToCameraPixels(
+        Point(position[0], position[1], 0)).as2Dxy.asCartesianVector)
+                   for position in walkers.positions]
+      assert min(distances) < 1e-3
+  return
+
+def test_walkers():
+  """! Verifies that walkers stay in the scene at walking speed. """
+  walkers = Walkers(200, (30, 20), seed=2)
+  previous = walkers.positions.copy()
+  for _ in range(100):
+    walkers.step(0.1)
+    assert np.all(walkers.positions >= 0) and np.all(walkers.positions <= (30, 20))
+    assert np.all(np.linalg.norm(walkers.positions - previous, axis=1) <= WALK_SPEED[1] * 0.1 + 1e-9)
+    previous = walkers.positions.copy()
+  assert walkers.reid is None
+  return
+
+def test_metrics():
+  """! Verifies counter deltas read from the Prometheus text format. """
+  before = parseMetrics('# TYPE scenescape_controller_mqtt_messages_total counter\n'
+                        'scenescape_controller_mqtt_messages_total{topic="camera"} 10.0\n')
+  after = parseMetrics('scenescape_controller_mqtt_messages_total{topic="camera"} 25.0\n'
+                       'scenescape_controller_mqtt_messages_dropped_total{reason="fell_behind",'
+                       'topic="camera"} 3.0\n'
+                       'scenescape_controller_mqtt_messages_dropped_total{reason="tracker_busy",'
+                       'topic="camera"} 2.0\n')
+  assert metricDelta(before, after, "scenescape_controller_mqtt_messages_total") == {"": 15.0}
+  assert metricDelta(before, after, "scenescape_controller_mqtt_messages_dropped_total",
+                     "reason") == {"fell_behind": 3.0, "tracker_busy": 2.0}
+  return